@@ -1599,7 +1599,8 @@ export const Workflows: React.FC<WorkflowsProps> = ({ entities, onViewChange, on
                                     info: result.info,
                                     metadata: result.metadata,
                                     useGCS: true,
-                                    pdfText: undefined // Remove inline text to save space
+                                    pdfText: undefined, // Remove inline text to save space
+                                    pageTexts: undefined
                                 }
                             }
                             : n
@@ -1625,6 +1626,7 @@ export const Workflows: React.FC<WorkflowsProps> = ({ entities, onViewChange, on
                                     ...n.config,
                                     fileName: file.name,
                                     pdfText: result.text,
+                                    pageTexts: result.pageTexts,
                                     pages: result.pages,
                                     info: result.info,
                                     metadata: result.metadata,
@@ -2308,6 +2310,7 @@ export const Workflows: React.FC<WorkflowsProps> = ({ entities, onViewChange, on
                                             ...n.config,
                                             fileName: file.name,
                                             pdfText: result.text,
+                                            pageTexts: result.pageTexts,
                                             pages: result.pages,
                                             info: result.info,
                                             metadata: result.metadata
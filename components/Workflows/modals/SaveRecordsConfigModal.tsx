@@ -10,12 +10,12 @@ import { Database, Clock, Sparkle } from '@phosphor-icons/react';
 interface SaveRecordsConfigModalProps {
   isOpen: boolean;
   entityId?: string;
-  saveMode?: 'insert' | 'upsert' | 'update';
+  saveMode?: 'insert' | 'insertNew' | 'upsert' | 'update' | 'append'; // 'insert' is the legacy name of append
   availableEntities?: Array<{ id: string; name: string }>;
   inputDataPreview?: any; // Preview of data that will be saved
   onSave: (config: {
     entityId: string;
-    saveMode: 'insert' | 'upsert' | 'update';
+    saveMode: 'insertNew' | 'upsert' | 'update' | 'append';
     autoCreateEntity?: boolean;
     entityName?: string;
   }) => void;
@@ -69,17 +69,24 @@ function detectTimeSeriesFormat(data: any): { isTimeSeries: boolean; format?: st
   return { isTimeSeries: false };
 }
 
+// Workflows saved with 'insert' created a record every time, which is what append does
+function normalizeSaveMode(saveMode?: string): 'insertNew' | 'upsert' | 'update' | 'append' {
+  if (saveMode === 'insert') return 'append';
+  if (saveMode === 'insertNew' || saveMode === 'update' || saveMode === 'append') return saveMode;
+  return 'upsert';
+}
+
 export const SaveRecordsConfigModal: React.FC<SaveRecordsConfigModalProps> = ({
   isOpen,
   entityId,
-  saveMode = 'insert',
+  saveMode = 'upsert',
   availableEntities = [],
   inputDataPreview,
   onSave,
   onClose,
 }) => {
   const [selectedEntityId, setSelectedEntityId] = useState(entityId || '');
-  const [selectedSaveMode, setSelectedSaveMode] = useState<'insert' | 'upsert' | 'update'>(saveMode);
+  const [selectedSaveMode, setSelectedSaveMode] = useState<'insertNew' | 'upsert' | 'update' | 'append'>(normalizeSaveMode(saveMode));
   const [autoCreateEntity, setAutoCreateEntity] = useState(false);
   const [newEntityName, setNewEntityName] = useState('');
 
@@ -91,7 +98,7 @@ export const SaveRecordsConfigModal: React.FC<SaveRecordsConfigModalProps> = ({
   useEffect(() => {
     if (isOpen) {
       setSelectedEntityId(entityId || '');
-      setSelectedSaveMode(saveMode || 'insert');
+      setSelectedSaveMode(normalizeSaveMode(saveMode));
       setAutoCreateEntity(false);
       
       // Auto-suggest entity name if time-series detected
@@ -267,17 +274,19 @@ export const SaveRecordsConfigModal: React.FC<SaveRecordsConfigModalProps> = ({
           </label>
           <select
             value={selectedSaveMode}
-            onChange={(e) => setSelectedSaveMode(e.target.value as 'insert' | 'upsert' | 'update')}
+            onChange={(e) => setSelectedSaveMode(e.target.value as 'insertNew' | 'upsert' | 'update' | 'append')}
             className="w-full px-3 py-2.5 border border-[var(--border-light)] rounded-lg text-sm text-[var(--text-primary)] bg-[var(--bg-tertiary)] focus:outline-none focus:ring-1 focus:ring-[var(--accent-primary)] focus:border-[var(--accent-primary)]"
           >
-            <option value="insert">Insert - Always create new records</option>
             <option value="upsert">Upsert - Update if exists, insert if not</option>
+            <option value="insertNew">Insert New - Create new records, skip existing</option>
             <option value="update">Update - Only update existing records</option>
+            <option value="append">Append - Always create new records</option>
           </select>
           <p className="text-xs text-[var(--text-tertiary)] mt-1.5">
-            {selectedSaveMode === 'insert' && 'New records will always be created, even if duplicates exist.'}
+            {selectedSaveMode === 'insertNew' && 'New records will be created. Records whose ID already exists will be skipped.'}
             {selectedSaveMode === 'upsert' && 'Records will be updated if they exist (by ID), or created if they don\'t.'}
             {selectedSaveMode === 'update' && 'Only existing records will be updated. New records will be skipped.'}
+            {selectedSaveMode === 'append' && 'New records will always be created, even if duplicates exist.'}
           </p>
         </div>
 
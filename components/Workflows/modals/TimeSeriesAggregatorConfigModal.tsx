@@ -9,12 +9,12 @@ import { X } from '@phosphor-icons/react';
 
 interface TimeSeriesAggregatorConfigModalProps {
   isOpen: boolean;
-  aggregationType?: 'avg' | 'min' | 'max' | 'sum' | 'count';
+  aggregationType?: 'avg' | 'min' | 'max' | 'sum' | 'count' | 'median' | 'p95' | 'first' | 'last';
   interval?: string;
   fields?: string[];
   availableFields?: string[];
   onSave: (config: {
-    timeSeriesAggregationType: 'avg' | 'min' | 'max' | 'sum' | 'count';
+    timeSeriesAggregationType: 'avg' | 'min' | 'max' | 'sum' | 'count' | 'median' | 'p95' | 'first' | 'last';
     timeSeriesInterval: string;
     timeSeriesFields?: string[];
   }) => void;
@@ -30,7 +30,7 @@ export const TimeSeriesAggregatorConfigModal: React.FC<TimeSeriesAggregatorConfi
   onSave,
   onClose,
 }) => {
-  const [aggType, setAggType] = useState<'avg' | 'min' | 'max' | 'sum' | 'count'>(aggregationType);
+  const [aggType, setAggType] = useState<'avg' | 'min' | 'max' | 'sum' | 'count' | 'median' | 'p95' | 'first' | 'last'>(aggregationType);
   const [intervalValue, setIntervalValue] = useState(interval);
   const [fieldsList, setFieldsList] = useState<string[]>(fields);
   const [fieldInput, setFieldInput] = useState('');
@@ -104,7 +104,7 @@ export const TimeSeriesAggregatorConfigModal: React.FC<TimeSeriesAggregatorConfi
           </label>
           <select
             value={aggType}
-            onChange={(e) => setAggType(e.target.value as 'avg' | 'min' | 'max' | 'sum' | 'count')}
+            onChange={(e) => setAggType(e.target.value as 'avg' | 'min' | 'max' | 'sum' | 'count' | 'median' | 'p95' | 'first' | 'last')}
             className="w-full px-3 py-2.5 border border-[var(--border-light)] rounded-lg text-sm text-[var(--text-primary)] bg-[var(--bg-tertiary)] focus:outline-none focus:ring-1 focus:ring-[var(--accent-primary)] focus:border-[var(--accent-primary)]"
           >
             <option value="avg">Average - Mean value per interval</option>
@@ -112,6 +112,10 @@ export const TimeSeriesAggregatorConfigModal: React.FC<TimeSeriesAggregatorConfi
             <option value="max">Maximum - Highest value per interval</option>
             <option value="sum">Sum - Total value per interval</option>
             <option value="count">Count - Number of data points per interval</option>
+            <option value="median">Median - Middle value per interval</option>
+            <option value="p95">95th Percentile - Value below which 95% of points fall</option>
+            <option value="first">First - Earliest value per interval</option>
+            <option value="last">Last - Latest value per interval</option>
           </select>
           <p className="text-xs text-[var(--text-tertiary)] mt-1.5">
             How to aggregate multiple data points within each time interval
@@ -63,6 +63,17 @@ export interface ConditionRule {
 export interface NodeConfig {
   entityId?: string;
   entityName?: string;
+  // For fetchData nodes (evaluated in SQL):
+  fetchProperties?: string[]; // property ids or names to return (default: all)
+  fetchFilters?: { property: string; operator: string; value?: string }[];
+  fetchOrderBy?: string; // property, 'id' or 'createdAt'
+  fetchOrderDirection?: 'asc' | 'desc';
+  fetchLimit?: number;
+  fetchPageSize?: number; // stream the result in pages of this many records (default: one list)
+  // For saveRecords nodes:
+  tableName?: string;
+  saveMode?: 'insertNew' | 'upsert' | 'update' | 'append' | 'insert'; // default upsert; legacy 'insert' appends
+  saveKey?: string; // field (or comma-separated fields) identifying a record, default 'id'
   // For condition nodes:
   conditionField?: string;
   conditionOperator?: string;
@@ -75,6 +86,24 @@ export interface NodeConfig {
   llmPrompt?: string;
   llmContextEntities?: string[];
   llmIncludeInput?: boolean;
+  // Per-row LLM mode (processingMode 'perRow'): llmPrompt is a {{field}} template
+  llmModel?: string;
+  llmOutputField?: string; // default 'llmResponse'
+  llmConcurrency?: number;
+  llmRequestsPerMinute?: number;
+  llmTokensPerMinute?: number;
+  llmMaxTokens?: number;
+  llmCache?: boolean; // false skips the persistent response cache
+  // Context encoding of the input (batch mode)
+  llmContextFormat?: 'auto' | 'json'; // 'json' keeps pretty-printed JSON
+  llmContextColumns?: string[];
+  llmContextTokens?: number; // estimated token budget before rows are summarized and sampled
+  // Map-reduce mode (processingMode 'mapReduce'): long text (e.g. a PDF) is answered chunk by chunk, then combined
+  llmChunkBy?: 'tokens' | 'pages';
+  llmChunkTokens?: number;
+  llmChunkOverlap?: number; // tokens, or pages when chunking by pages
+  llmPagesPerChunk?: number;
+  llmReducePrompt?: string; // instructions for combining the partial answers
   pythonCode?: string;
   pythonAiPrompt?: string;
   // For manual input nodes:
@@ -84,6 +113,15 @@ export interface NodeConfig {
   commentText?: string;
   // For http nodes:
   httpUrl?: string;
+  // Per-row mode (processingMode 'perRow'): URL, headers, query and body are {{field}} templates
+  httpHeaders?: { key: string; value: string }[];
+  httpQueryParams?: { key: string; value: string }[];
+  httpBody?: string | Record<string, any>; // default: the record itself
+  httpConcurrency?: number;
+  httpRateLimit?: number; // requests per second per host
+  httpRetries?: number; // retries on 429/5xx and connection errors (default 2)
+  httpResponseField?: string; // default 'response'
+  httpFailOnError?: boolean;
   // For esios nodes:
   esiosArchiveId?: string;
   esiosDate?: string;
@@ -112,6 +150,7 @@ export interface NodeConfig {
   useGCS?: boolean;
   // For PDF input nodes:
   pdfText?: string;
+  pageTexts?: string[]; // text of each page (page-based LLM chunking)
   pdfTextPreview?: string;
   pdfGcsPath?: string;
   pages?: number;
@@ -209,10 +248,19 @@ export interface NodeConfig {
   dataHistorianStartTime?: string;
   dataHistorianEndTime?: string;
   dataHistorianAggregation?: string;
+  dataHistorianOutputFormat?: 'records' | 'columnar'; // default records: dataPoints + per-tag record lists; columnar: per-tag {timestamps, values} arrays
+  dataHistorianMaxPoints?: number; // downsample each tag to at most this many points
+  dataHistorianDownsampling?: 'lttb' | 'minmax';
   // For Time-Series Aggregator nodes:
-  timeSeriesAggregationType?: 'avg' | 'min' | 'max' | 'sum' | 'count';
+  timeSeriesAggregationType?: 'avg' | 'min' | 'max' | 'sum' | 'count' | 'median' | 'p95' | 'first' | 'last';
   timeSeriesInterval?: string; // e.g., "5m", "1h", "1d"
   timeSeriesFields?: string[];
+  timeSeriesAggregations?: string[]; // several aggregations, e.g. ['avg', 'p99'] (fields become <field>_<aggregation>)
+  timeSeriesGroupBy?: string | string[]; // tag field(s), one series per value
+  timeSeriesTimestampField?: string; // default: timestamp, time, createdAt, date or datetime
+  timeSeriesWindowType?: 'tumbling' | 'sliding';
+  timeSeriesSlide?: string; // sliding window step, e.g. "1m" (default: half the interval)
+  timeSeriesIncremental?: boolean; // reuse closed windows from the previous run
   // For OSIsoft PI nodes:
   osiPiHost?: string;
   osiPiApiKey?: string;
@@ -246,6 +246,17 @@ async function initDb() {
       FOREIGN KEY(executionId) REFERENCES workflow_executions(id) ON DELETE CASCADE
     );
 
+    -- Large node payloads written by the Prefect worker, stored once (zlib)
+    -- and referenced from execution rows as {"$payloadRef": "sha256:..."}
+    CREATE TABLE IF NOT EXISTS execution_payloads (
+      hash TEXT PRIMARY KEY,
+      encoding TEXT,
+      size INTEGER,
+      storedSize INTEGER,
+      data BLOB,
+      createdAt TEXT
+    );
+
     CREATE TABLE IF NOT EXISTS report_templates (
       id TEXT PRIMARY KEY,
       organizationId TEXT NOT NULL,
@@ -333,6 +344,14 @@ async function initDb() {
     );
   `);
 
+  // Indexes for entity record lookups (fetchData pivots record_values per record)
+  try {
+    await db.exec(`CREATE INDEX IF NOT EXISTS idx_records_entity ON records(entityId)`);
+    await db.exec(`CREATE INDEX IF NOT EXISTS idx_record_values_record_property ON record_values(recordId, propertyId)`);
+  } catch (e) {
+    // Indexes might already exist
+  }
+
   // Create AI assistant files table
   await db.exec(`
     CREATE TABLE IF NOT EXISTS ai_assistant_files (
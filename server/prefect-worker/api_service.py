@@ -4,7 +4,10 @@ FastAPI Service for Workflow Execution API
 This service receives workflow execution requests and delegates them to Prefect.
 It runs independently of the frontend and provides status endpoints.
 """
+import asyncio
+import json
 import secrets
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, Optional
 from fastapi import FastAPI, HTTPException, BackgroundTasks
@@ -12,18 +15,50 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 
+from cancellation import cancellation_registry
+from cpu_pool import cpu_pool
 from database import Database
+from execution_log_sink import execution_log_sink
 from flows.workflow_flow import execute_workflow_flow
-from flows.workflow_flow_optimized import workflow_flow_optimized
+from flows.workflow_flow_optimized import seed_from_previous_execution, workflow_flow_optimized
+from flows.workflow_plan import get_workflow_plan
+from http_clients import http_clients
+from llm_cache import llm_cache
+from node_result_cache import node_result_cache
+from payload_store import payload_store
+from sandbox_pool import sandbox_pool
 from tasks.node_handlers import NODE_HANDLERS
 import config
 
 
 # ==================== FastAPI App ====================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared worker resources on startup and drain them on shutdown"""
+    await execution_log_sink.start()
+    await cpu_pool.warm_up()
+    await sandbox_pool.warm_up()
+    payload_collector = None
+    if config.PAYLOAD_GC_INTERVAL > 0:
+        payload_collector = asyncio.create_task(
+            payload_store.run_collector(config.PAYLOAD_GC_INTERVAL, config.PAYLOAD_GC_MIN_AGE)
+        )
+    try:
+        yield
+    finally:
+        if payload_collector:
+            payload_collector.cancel()
+        await http_clients.aclose()
+        await sandbox_pool.shutdown()
+        await cpu_pool.shutdown()
+        await execution_log_sink.stop()
+
+
 app = FastAPI(
     title="Workflow Orchestration Service",
     description="Background workflow execution with Prefect",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -44,6 +79,15 @@ class ExecuteWorkflowRequest(BaseModel):
     mode: Optional[str] = "optimized"  # "optimized" or "legacy"
 
 
+class ExecuteFromNodeRequest(BaseModel):
+    """Request model for re-running a workflow from a changed node"""
+    workflowId: str
+    previousExecutionId: str
+    nodeId: str
+    inputs: Optional[Dict] = None  # Defaults to the previous execution's inputs
+    organizationId: Optional[str] = None
+
+
 class ExecuteNodeRequest(BaseModel):
     """Request model for single node execution"""
     workflowId: str
@@ -78,6 +122,19 @@ async def root():
     }
 
 
+@app.get("/api/metrics/pools")
+async def pool_metrics():
+    """Usage of the worker's shared pools (HTTP connections, CPU lane, python sandboxes, result caches)"""
+    return {
+        "http": http_clients.stats(),
+        "cpuPool": cpu_pool.stats(),
+        "sandboxPool": sandbox_pool.stats(),
+        "nodeResultCache": node_result_cache.stats(),
+        "llmCache": llm_cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @app.post("/api/workflows/execute")
 async def execute_workflow(request: ExecuteWorkflowRequest, background_tasks: BackgroundTasks):
     """
@@ -139,12 +196,98 @@ async def execute_workflow(request: ExecuteWorkflowRequest, background_tasks: Ba
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/workflows/execute-from-node")
+async def execute_workflow_from_node(request: ExecuteFromNodeRequest, background_tasks: BackgroundTasks):
+    """
+    Re-run a workflow from a changed node
+    
+    This endpoint:
+    1. Creates a new execution record
+    2. Runs only the given node and everything downstream of it
+    3. Reuses the stored outputs of unchanged upstream nodes from the
+       previous execution (upstream nodes without a reusable output run again)
+    4. Returns immediately with the new execution ID
+    """
+    db = Database()
+    
+    try:
+        workflow = await db.get_workflow(request.workflowId)
+        if not workflow:
+            raise HTTPException(status_code=404, detail=f"Workflow {request.workflowId} not found")
+        
+        previous = await db.get_execution(request.previousExecutionId)
+        if not previous:
+            raise HTTPException(status_code=404, detail=f"Execution {request.previousExecutionId} not found")
+        if previous["workflowId"] != request.workflowId:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Execution {request.previousExecutionId} belongs to another workflow"
+            )
+        
+        plan = get_workflow_plan(workflow["data"])
+        if request.nodeId not in plan.nodes_by_id:
+            raise HTTPException(status_code=400, detail=f"Node {request.nodeId} not found in workflow")
+        
+        inputs = request.inputs if request.inputs is not None else json.loads(previous.get("inputs") or "{}")
+        organization_id = request.organizationId or previous.get("organizationId")
+        
+        # Preview of what the flow will reuse (it plans the rerun again when it starts)
+        previous_logs = await db.get_completed_node_logs(request.previousExecutionId)
+        rerun, seeded, upstream_reruns = await seed_from_previous_execution(plan, previous_logs, request.nodeId)
+        
+        execution_id = secrets.token_hex(8)
+        
+        await db.create_execution(
+            execution_id=execution_id,
+            workflow_id=request.workflowId,
+            organization_id=organization_id,
+            inputs=inputs,
+            status="pending"
+        )
+        
+        print(f"📨 Received rerun request for workflow {request.workflowId} from node {request.nodeId}")
+        print(f"🆔 Execution ID: {execution_id} (previous: {request.previousExecutionId})")
+        
+        background_tasks.add_task(
+            execute_workflow_background,
+            workflow_id=request.workflowId,
+            execution_id=execution_id,
+            inputs=inputs,
+            organization_id=organization_id,
+            mode="optimized",
+            from_node_id=request.nodeId,
+            previous_execution_id=request.previousExecutionId
+        )
+        
+        return {
+            "success": True,
+            "executionId": execution_id,
+            "status": "pending",
+            "message": f"Workflow re-run from node {request.nodeId} started in background",
+            "workflowId": request.workflowId,
+            "previousExecutionId": request.previousExecutionId,
+            "fromNodeId": request.nodeId,
+            "rerunNodes": len(rerun),
+            "reusedNodes": len(seeded),
+            # Upstream nodes whose previous output can't be reused: {nodeId: reason}
+            "upstreamReruns": upstream_reruns
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error starting workflow re-run: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 async def execute_workflow_background(
     workflow_id: str,
     execution_id: str,
     inputs: Dict,
     organization_id: Optional[str],
-    mode: str = "optimized"
+    mode: str = "optimized",
+    from_node_id: Optional[str] = None,
+    previous_execution_id: Optional[str] = None
 ):
     """
     Background task that executes the workflow using Prefect
@@ -161,7 +304,9 @@ async def execute_workflow_background(
             result = await workflow_flow_optimized(
                 workflow_id=workflow_id,
                 execution_id=execution_id,
-                inputs=inputs or {}
+                inputs=inputs or {},
+                from_node_id=from_node_id,
+                previous_execution_id=previous_execution_id
             )
         else:
             # Legacy mode (sequential execution)
@@ -205,11 +350,12 @@ async def execute_single_node(request: ExecuteNodeRequest):
                 detail=f"No handler found for node type: {request.nodeType}"
             )
         
-        # Execute handler directly
-        result = await handler(
-            node=request.node,
-            input_data=request.inputData,
-            execution_context={
+        # Execute handler directly (CPU-bound handlers in the process pool)
+        result = await cpu_pool.run_handler(
+            {**request.node, 'type': request.nodeType},
+            handler,
+            request.inputData,
+            {
                 'mode': 'single_node',
                 'workflow_id': request.workflowId,
                 'node_id': request.nodeId
@@ -284,7 +430,7 @@ async def get_execution_logs(execution_id: str):
     """Get detailed execution logs"""
     db = Database()
     
-    logs = await db.get_execution_logs(execution_id)
+    logs = await db.get_execution_logs(execution_id, resolve_payloads=True)
     if not logs:
         # Check if execution exists
         execution = await db.get_execution(execution_id)
@@ -304,8 +450,10 @@ async def cancel_execution(execution_id: str):
     
     This endpoint:
     1. Marks the execution as 'cancelled' in the database
-    2. The workflow_flow_optimized checks for cancellation between layers
-    3. Any currently running node will complete, but no new nodes start
+    2. If the execution runs in this process, cancels its in-flight nodes
+       immediately (HTTP/LLM calls are aborted, Python subprocesses killed)
+    3. Executions running elsewhere notice the database status within
+       CANCELLATION_POLL_INTERVAL seconds
     """
     db = Database()
     
@@ -330,6 +478,10 @@ async def cancel_execution(execution_id: str):
         status="cancelled",
         error="Execution cancelled by user"
     )
+    # Commit right away so other processes see the cancellation too
+    await execution_log_sink.flush()
+    
+    cancelled_in_process = cancellation_registry.cancel(execution_id)
     
     print(f"🛑 Execution {execution_id} cancelled by user")
     
@@ -337,7 +489,8 @@ async def cancel_execution(execution_id: str):
         "success": True,
         "executionId": execution_id,
         "message": "Execution cancelled successfully",
-        "previousStatus": current_status
+        "previousStatus": current_status,
+        "cancelledInProcess": cancelled_in_process
     }
 
 
@@ -353,6 +506,7 @@ async def get_workflow_executions(workflow_id: str, limit: int = 50):
     
     # Get executions (simplified - you may want to add this method to Database class)
     import aiosqlite
+    await execution_log_sink.flush()
     async with aiosqlite.connect(config.DATABASE_PATH) as conn:
         conn.row_factory = aiosqlite.Row
         async with conn.execute(
@@ -0,0 +1,84 @@
+"""
+In-process cancellation registry
+
+Each running execution registers a token keyed by its execution_id. Cancelling
+the token cancels the execution's in-flight node tasks immediately, so awaited
+HTTP/LLM calls are interrupted and Python subprocesses are killed instead of
+running to completion.
+
+Cancels issued in another process only reach the database; the flow polls the
+execution status as a fallback for those.
+"""
+import asyncio
+from typing import Dict, Optional, Set
+
+
+class CancellationToken:
+    """Cancellation state and in-flight tasks of a single execution"""
+
+    def __init__(self, execution_id: str):
+        self.execution_id = execution_id
+        self.cancelled = False
+        self.reason: Optional[str] = None
+        self._loop = asyncio.get_running_loop()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add_task(self, task: asyncio.Task):
+        """Track a node task so it is cancelled together with the execution"""
+        if self.cancelled:
+            task.cancel()
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def cancel(self, reason: str = "Execution was cancelled by user"):
+        """Cancel the execution; safe to call from any thread or event loop"""
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+
+        if same_loop:
+            self._cancel(reason)
+        else:
+            self._loop.call_soon_threadsafe(self._cancel, reason)
+
+    def _cancel(self, reason: str):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        self.reason = reason
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class CancellationRegistry:
+    """Process-wide map of execution_id -> CancellationToken"""
+
+    def __init__(self):
+        self._tokens: Dict[str, CancellationToken] = {}
+
+    def register(self, execution_id: str) -> CancellationToken:
+        """Create the token for an execution (must be called on the flow's event loop)"""
+        token = CancellationToken(execution_id)
+        self._tokens[execution_id] = token
+        return token
+
+    def unregister(self, execution_id: str):
+        """Forget an execution once its flow has finished"""
+        self._tokens.pop(execution_id, None)
+
+    def get(self, execution_id: str) -> Optional[CancellationToken]:
+        return self._tokens.get(execution_id)
+
+    def cancel(self, execution_id: str, reason: str = "Execution was cancelled by user") -> bool:
+        """Cancel an execution running in this process; returns False if it isn't running here"""
+        token = self._tokens.get(execution_id)
+        if token is None:
+            return False
+        token.cancel(reason)
+        return True
+
+
+# Process-wide registry shared by the API and the flows
+cancellation_registry = CancellationRegistry()
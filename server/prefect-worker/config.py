@@ -22,6 +22,9 @@ PREFECT_API_URL = os.getenv("PREFECT_API_URL", "http://127.0.0.1:4200/api")
 
 # External Services
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# OpenAI-compatible API used by LLM nodes (point it at a compatible server to swap providers)
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", DEFAULT_OPENAI_BASE_URL).rstrip("/")
 CLIMATIQ_API_KEY = os.getenv("CLIMATIQ_API_KEY")
 
 # Email Configuration
@@ -32,6 +35,100 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 
+# Execution Engine
+# Number of compiled workflow plans kept in memory (one per workflow version)
+WORKFLOW_PLAN_CACHE_SIZE = int(os.getenv("WORKFLOW_PLAN_CACHE_SIZE", 64))
+
+# Execution log sink (buffered group commits for execution logs/status)
+LOG_SINK_QUEUE_SIZE = int(os.getenv("LOG_SINK_QUEUE_SIZE", 10000))
+LOG_SINK_BATCH_SIZE = int(os.getenv("LOG_SINK_BATCH_SIZE", 500))
+LOG_SINK_FLUSH_INTERVAL = float(os.getenv("LOG_SINK_FLUSH_INTERVAL", 0.25))
+
+# Node payloads larger than this (JSON bytes) are stored once, compressed,
+# in execution_payloads and referenced from log/execution rows
+PAYLOAD_INLINE_MAX_BYTES = int(os.getenv("PAYLOAD_INLINE_MAX_BYTES", 4096))
+# Seconds between sweeps deleting payloads no row references any more (0
+# disables them) and minimum age of a payload before it can be deleted
+PAYLOAD_GC_INTERVAL = float(os.getenv("PAYLOAD_GC_INTERVAL", 3600))
+PAYLOAD_GC_MIN_AGE = float(os.getenv("PAYLOAD_GC_MIN_AGE", 3600))
+
+# Seconds between database checks for cancels issued by another process
+# (cancels through this service's API take effect immediately)
+CANCELLATION_POLL_INTERVAL = float(os.getenv("CANCELLATION_POLL_INTERVAL", 1.0))
+
+# Row-wise nodes (condition, addField, splitColumns, join, timeSeriesAggregator, saveRecords) stream record lists
+# of at least RECORD_STREAM_MIN_ROWS rows in chunks instead of copying them
+# whole (0 disables streaming)
+RECORD_STREAM_MIN_ROWS = int(os.getenv("RECORD_STREAM_MIN_ROWS", 10000))
+RECORD_STREAM_CHUNK_SIZE = int(os.getenv("RECORD_STREAM_CHUNK_SIZE", 5000))
+# Streamed chunks of plain records are columnar NumPy batches ("false" keeps lists of dicts)
+RECORD_BATCH_COLUMNAR = os.getenv("RECORD_BATCH_COLUMNAR", "true").lower() == "true"
+# Execution logs record streamed and columnar node data as its row count and
+# first LOG_SAMPLE_ROWS records; only results leaving the worker carry every record
+LOG_SAMPLE_ROWS = int(os.getenv("LOG_SAMPLE_ROWS", 20))
+
+# Result memoization for nodes marked `cacheable` (seconds / entries / bytes of JSON)
+NODE_RESULT_CACHE_TTL = float(os.getenv("NODE_RESULT_CACHE_TTL", 3600))
+NODE_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("NODE_RESULT_CACHE_MAX_ENTRIES", 256))
+NODE_RESULT_CACHE_MAX_BYTES = int(os.getenv("NODE_RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Process pool for CPU-bound node handlers (0 runs them on the event loop);
+# inputs smaller than CPU_POOL_MIN_ROWS records, or without records, run inline
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+CPU_POOL_MIN_ROWS = int(os.getenv("CPU_POOL_MIN_ROWS", 5000))
+
+# Warm sandbox interpreters for the python node (every call runs in a process
+# forked from one): pool size, calls served by a worker before it is replaced,
+# per-call timeout in seconds and memory for user code in MB on top of the
+# preloaded interpreter (0 = unlimited)
+PYTHON_SANDBOX_WORKERS = int(os.getenv("PYTHON_SANDBOX_WORKERS", 2))
+PYTHON_SANDBOX_MAX_CALLS = int(os.getenv("PYTHON_SANDBOX_MAX_CALLS", 100))
+PYTHON_SANDBOX_TIMEOUT = float(os.getenv("PYTHON_SANDBOX_TIMEOUT", 30))
+PYTHON_SANDBOX_MEMORY_MB = int(os.getenv("PYTHON_SANDBOX_MEMORY_MB", 1024))
+
+# Estimated size of a join's build side (input B) above which the join node
+# switches from an in-memory hash join to a sort-merge join spilled to disk
+JOIN_MEMORY_BUDGET_MB = int(os.getenv("JOIN_MEMORY_BUDGET_MB", 256))
+
+# saveRecords writes this many rows per transaction (executemany), on a
+# connection with the given PRAGMA synchronous level (OFF/NORMAL/FULL/EXTRA)
+SAVE_RECORDS_BATCH_SIZE = int(os.getenv("SAVE_RECORDS_BATCH_SIZE", 5000))
+SAVE_RECORDS_SYNCHRONOUS = os.getenv("SAVE_RECORDS_SYNCHRONOUS", "NORMAL")
+
+# Shared HTTP connection pool for node handlers (see http_clients.py):
+# connections per event loop, idle keep-alive connections and their expiry in
+# seconds, in-flight requests per host, and HTTP/2 (needs the `h2` package)
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", 100))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", 20))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", 30))
+HTTP_POOL_MAX_PER_HOST = int(os.getenv("HTTP_POOL_MAX_PER_HOST", 32))
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "false").lower() == "true"
+# Concurrent requests of an HTTP node in per-row mode unless the node sets httpConcurrency
+HTTP_FANOUT_CONCURRENCY = int(os.getenv("HTTP_FANOUT_CONCURRENCY", 16))
+
+# LLM nodes: default model, process-wide requests/tokens per minute budgets
+# (0 = unlimited), concurrent calls of a per-row LLM node and retries on 429/5xx
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 200000))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 8))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+# Estimated tokens an LLM node's input may take in its prompt before it is
+# summarized and sampled (nodes can set llmContextTokens)
+LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", 8000))
+# Map-reduce LLM mode: estimated tokens per chunk of a long text, tokens shared
+# by consecutive chunks, and pages per chunk when chunking by pages
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", 3000))
+LLM_CHUNK_OVERLAP_TOKENS = int(os.getenv("LLM_CHUNK_OVERLAP_TOKENS", 200))
+LLM_CHUNK_PAGES = int(os.getenv("LLM_CHUNK_PAGES", 4))
+
+# Persistent LLM response cache (see llm_cache.py): entry lifetime in seconds,
+# max entries and max bytes of stored responses
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 100000))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
 # Paths
 BASE_DIR = Path(__file__).parent
 FLOWS_DIR = BASE_DIR / "flows"
@@ -0,0 +1,56 @@
+"""
+Shared pytest fixtures for the Prefect worker
+
+The worker's process-wide singletons (log sink, payload store, LLM cache)
+read DATABASE_PATH when they are imported, so the tests point it at a
+scratch database before anything imports config. Tests are plain functions
+that drive coroutines with asyncio.run.
+
+test_service.py, test_api_executions.py and test_python_node.py are manual
+scripts run against a live service; pytest skips them.
+"""
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+_TEST_DIR = tempfile.mkdtemp(prefix="prefect-worker-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(_TEST_DIR, "database.sqlite")
+os.environ.setdefault("PREFECT_HOME", os.path.join(_TEST_DIR, "prefect"))
+
+collect_ignore = ["test_service.py", "test_api_executions.py", "test_python_node.py"]
+
+# Tables the Node.js backend creates (server/db.js) that the worker reads and writes
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (id TEXT PRIMARY KEY, organizationId TEXT, name TEXT, description TEXT, author TEXT, lastEdited TEXT, entityType TEXT DEFAULT 'generic');
+CREATE TABLE IF NOT EXISTS properties (id TEXT PRIMARY KEY, entityId TEXT, name TEXT, type TEXT, defaultValue TEXT, relatedEntityId TEXT, unit TEXT);
+CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, entityId TEXT, createdAt TEXT);
+CREATE TABLE IF NOT EXISTS record_values (id TEXT PRIMARY KEY, recordId TEXT, propertyId TEXT, value TEXT);
+CREATE TABLE IF NOT EXISTS workflows (id TEXT PRIMARY KEY, organizationId TEXT, name TEXT NOT NULL, data TEXT NOT NULL, tags TEXT, createdAt TEXT, updatedAt TEXT);
+CREATE TABLE IF NOT EXISTS workflow_executions (id TEXT PRIMARY KEY, workflowId TEXT NOT NULL, organizationId TEXT, status TEXT DEFAULT 'pending', triggerType TEXT DEFAULT 'manual', inputs TEXT, currentNodeId TEXT, nodeResults TEXT, finalOutput TEXT, error TEXT, createdAt TEXT, startedAt TEXT, completedAt TEXT);
+CREATE TABLE IF NOT EXISTS execution_logs (id TEXT PRIMARY KEY, executionId TEXT NOT NULL, nodeId TEXT, nodeType TEXT, nodeLabel TEXT, status TEXT, inputData TEXT, outputData TEXT, error TEXT, duration INTEGER, timestamp TEXT);
+"""
+
+
+@pytest.fixture
+def database():
+    """Path of the scratch database, with the backend's tables created and emptied"""
+    path = os.environ["DATABASE_PATH"]
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for table in tables:
+        conn.execute(f'DELETE FROM "{table}"')
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture(scope="session")
+def prefect_harness():
+    """Temporary Prefect API for tests that run flows or tasks through the engine"""
+    from prefect.testing.utilities import prefect_test_harness
+
+    with prefect_test_harness():
+        yield
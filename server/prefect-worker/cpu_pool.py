@@ -0,0 +1,354 @@
+"""
+Process-pool lane for CPU-bound node handlers
+
+Node handlers are coroutines on the worker's event loop, so a handler that
+crunches records (a large join or time-series aggregation) blocks every other
+execution and the API until it is done. Nodes with the 'cpu' execution hint
+(see NODE_EXECUTION_HINTS, overridable per node with `executionHint` in its
+config) run their handler in one of CPU_POOL_WORKERS spawned worker
+processes instead; calls wait for a free worker.
+
+Streamed records cross the process boundary chunk by chunk as columnar
+RecordBatches (NumPy columns pickle as raw buffers; list chunks are converted
+in a worker thread); everything else is pickled in the thread that waits for
+the worker's answer, off the event loop. Only inputs of at least CPU_POOL_MIN_ROWS
+records go to the pool: smaller inputs, and inputs without records, run
+inline, where the transfer would cost more than the work.
+
+A cancelled node's worker is killed and replaced by a fresh process, so a
+cancelled flow's heavy node doesn't keep a worker busy.
+"""
+import asyncio
+import importlib
+import multiprocessing
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import config
+from tasks.columnar import RecordBatch, is_table
+from tasks.node_handlers import NODE_EXECUTION_HINTS
+from tasks.record_stream import Chunk, RecordStream, contains_stream
+
+
+class _PackedStream:
+    """The chunks of a stream on their way across the process boundary"""
+
+    def __init__(self, chunks: List[Chunk]):
+        self.chunks = chunks
+
+
+async def _pack(value: Any, depth: int = 2) -> Any:
+    """
+    Read streams (top level or within `depth` dict levels) chunk by chunk so
+    they can cross the process boundary; list chunks become RecordBatches in
+    a worker thread
+    """
+    if isinstance(value, RecordStream):
+        chunks = []
+        async for chunk in value:
+            if not isinstance(chunk, RecordBatch) and is_table(chunk):
+                chunk = await asyncio.to_thread(RecordBatch.from_records, chunk)
+            chunks.append(chunk)
+        return _PackedStream(chunks)
+    if depth > 0 and isinstance(value, dict) and contains_stream(value, depth):
+        return {k: await _pack(v, depth - 1) for k, v in value.items()}
+    return value
+
+
+def _unpack_streams(value: Any, depth: int = 2) -> Any:
+    """Turn packed streams back into (cached) streams"""
+    if isinstance(value, _PackedStream):
+        return RecordStream.from_chunks(value.chunks)
+    if depth > 0 and isinstance(value, dict):
+        return {k: _unpack_streams(v, depth - 1) for k, v in value.items()}
+    return value
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """Records in a node input (top level or one dict level, e.g. a join's inputs), None if it has none"""
+    if isinstance(value, (list, RecordBatch)):
+        return len(value)
+    if isinstance(value, RecordStream):
+        return value.length
+    if isinstance(value, dict):
+        counts = [count_rows(v) for v in value.values() if isinstance(v, (list, RecordBatch, RecordStream))]
+        return sum(count or 0 for count in counts) if counts else None
+    return None
+
+
+class CpuWorkerError(RuntimeError):
+    """A pool worker died, or the pool was shut down, before the call finished"""
+
+
+def _init_worker():
+    # Import the handlers once per worker instead of on the first call
+    importlib.import_module("tasks.node_handlers")
+
+
+def _run_handler(node: Dict, packed_input: Any, execution_context: Optional[Dict]) -> Any:
+    """Worker side: run a node's handler function (without the Prefect task wrapper)"""
+    from tasks.node_handlers import NODE_HANDLERS
+
+    handler = NODE_HANDLERS[node["type"]]
+    # Only streaming node types get streams: the flow materializes the others' inputs
+    input_data = _unpack_streams(packed_input)
+
+    async def run():
+        result = await handler.fn(node=node, input_data=input_data, execution_context=execution_context)
+        return await _pack(result)
+
+    return asyncio.run(run())
+
+
+def _worker_main(conn):
+    """Worker process: answer (node, packed input, context) calls until told to stop"""
+    _init_worker()
+    conn.send(("ready", None))
+    while True:
+        try:
+            call = conn.recv()
+        except EOFError:
+            return
+        if call is None:
+            return
+        try:
+            reply = ("ok", _run_handler(*call))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception doesn't pickle
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    """A spawned worker process and the parent's end of its pipe"""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def wait_ready(self):
+        """Block until the worker has imported the handlers"""
+        with self._ready_lock:
+            if not self._ready:
+                self._receive()
+                self._ready = True
+
+    def _receive(self) -> Tuple[str, Any]:
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=5)
+            raise CpuWorkerError(f"CPU pool worker exited unexpectedly (code {self.process.exitcode})")
+
+    def call(self, node: Dict, packed_input: Any, execution_context: Optional[Dict]) -> Tuple[str, Any]:
+        """Blocking round trip (pickling included), run in a thread"""
+        self.wait_ready()
+        try:
+            self.conn.send((node, packed_input, execution_context))
+        except OSError:
+            return self._receive()
+        return self._receive()
+
+    def kill(self):
+        # The pipe is closed once the thread blocked on it sees the end of input
+        self.process.kill()
+        self.process.join(timeout=5)
+
+    def close(self):
+        """Let the worker exit on its own (killed if it doesn't)"""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+        self.conn.close()
+
+
+def execution_hint(node: Dict) -> str:
+    """'cpu' or 'io': the node's `executionHint` config, else its type's default"""
+    hint = (node.get("config", {}) or {}).get("executionHint")
+    if hint in ("cpu", "io"):
+        return hint
+    return NODE_EXECUTION_HINTS.get(node.get("type"), "io")
+
+
+class CpuPool:
+    """Lazily started pool of worker processes for CPU-bound handlers"""
+
+    def __init__(self, max_workers: int = 1, min_rows: int = 5000):
+        self.max_workers = max_workers
+        self.min_rows = min_rows
+        # Spawned: the parent runs an event loop and threads
+        self._context = multiprocessing.get_context("spawn")
+        # Flows and the API may call from different loops: the pool's state is
+        # guarded by a thread lock and waiters are woken on their own loop
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._busy: Set[_Worker] = set()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._running = False
+        self.dispatched = 0
+        self.inline = 0
+        self.recycled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def start(self) -> bool:
+        """Create the worker processes; False if the pool is disabled"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self._running:
+                return True
+            self._running = True
+            self._idle = [_Worker(self._context) for _ in range(self.max_workers)]
+        print(f"[CpuPool] Started ({self.max_workers} workers, min rows {self.min_rows})")
+        return True
+
+    async def warm_up(self):
+        """Start the pool and wait until every worker has imported the handlers"""
+        if not self.start():
+            return
+        with self._lock:
+            workers = list(self._idle)
+        await asyncio.gather(*[asyncio.to_thread(worker.wait_ready) for worker in workers])
+
+    async def shutdown(self):
+        """Stop the worker processes, failing calls that haven't finished"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            idle, self._idle = self._idle, []
+            busy, self._busy = self._busy, set()
+            waiters, self._waiters = self._waiters, deque()
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(_fail_waiter, waiter)
+        for worker in busy:
+            worker.kill()
+        await asyncio.gather(*[asyncio.to_thread(worker.close) for worker in idle])
+        print(f"[CpuPool] Stopped ({self.dispatched} pooled calls, {self.inline} inline, {self.recycled} workers recycled)")
+
+    def should_dispatch(self, node: Dict, input_data: Any) -> bool:
+        """
+        True if the node runs in the pool: its hint is 'cpu' and its input has
+        a known number of records, at least min_rows (nodes whose config asks
+        for the 'cpu' lane explicitly always go)
+        """
+        if not self.enabled or execution_hint(node) != "cpu":
+            return False
+        if (node.get("config", {}) or {}).get("executionHint") == "cpu":
+            return True
+        rows = count_rows(input_data)
+        return rows is not None and rows >= self.min_rows
+
+    async def _checkout(self) -> _Worker:
+        """An idle worker, waiting (cancellably) for one when all are busy"""
+        loop = asyncio.get_running_loop()
+        while True:
+            self.start()
+            with self._lock:
+                if self._idle:
+                    worker = self._idle.pop()
+                    self._busy.add(worker)
+                    return worker
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    woken = waiter not in self._waiters
+                    if not woken:
+                        self._waiters.remove(waiter)
+                if woken:
+                    # Pass the freed worker on to the next waiter
+                    self._wake_next()
+                raise
+
+    def _wake_next(self):
+        with self._lock:
+            waiter = self._waiters.popleft() if self._waiters else None
+        if waiter is not None:
+            waiter.get_loop().call_soon_threadsafe(_wake_waiter, waiter)
+
+    def _checkin(self, worker: _Worker, recycle: bool = False):
+        """Return a worker to the pool; a recycled one is killed and replaced by a fresh process"""
+        with self._lock:
+            current = worker in self._busy
+            self._busy.discard(worker)
+        if recycle:
+            worker.kill()
+        if not current:
+            # The pool was shut down meanwhile
+            if not recycle:
+                worker.close()
+            return
+        if recycle:
+            self.recycled += 1
+            worker = _Worker(self._context)
+        with self._lock:
+            if self._running:
+                self._idle.append(worker)
+                worker = None
+        if worker is not None:
+            worker.close()
+            return
+        self._wake_next()
+
+    async def run_handler(self, node: Dict, handler: Callable, input_data: Any, execution_context: Optional[Dict]) -> Dict:
+        """Run a node handler in the pool or, when it doesn't qualify, inline"""
+        if not self.should_dispatch(node, input_data):
+            self.inline += 1
+            return await handler(node=node, input_data=input_data, execution_context=execution_context)
+
+        self.dispatched += 1
+        packed_input = await _pack(input_data)
+        worker = await self._checkout()
+        try:
+            status, value = await asyncio.to_thread(worker.call, node, packed_input, execution_context)
+        except BaseException:
+            # Cancelled (or the worker died): don't let the call hold the slot
+            self._checkin(worker, recycle=True)
+            raise
+        self._checkin(worker)
+        if status == "error":
+            raise value
+        # Streamed outputs come back packed, chunk by chunk
+        return _unpack_streams(value)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.max_workers if self.enabled else 0,
+            "running": self._running,
+            "busy": len(self._busy),
+            "waiting": len(self._waiters),
+            "dispatched": self.dispatched,
+            "inline": self.inline,
+            "recycled": self.recycled
+        }
+
+
+def _wake_waiter(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _fail_waiter(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_exception(CpuWorkerError("CPU pool was shut down"))
+
+
+# Process-wide CPU lane
+cpu_pool = CpuPool(max_workers=config.CPU_POOL_WORKERS, min_rows=config.CPU_POOL_MIN_ROWS)
@@ -6,6 +6,8 @@ import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import config
+from execution_log_sink import execution_log_sink
+from payload_store import payload_store
 
 class Database:
     """Async database wrapper for SQLite"""
@@ -25,6 +27,15 @@ class Database:
         if self._conn:
             await self._conn.close()
     
+    async def _write(self, query: str, params):
+        """Write through the shared log sink (direct write for other databases)"""
+        if self.db_path != execution_log_sink.db_path:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute(query, params)
+                await db.commit()
+            return
+        await execution_log_sink.execute(query, params)
+    
     async def get_workflow(self, workflow_id: str) -> Optional[Dict]:
         """Get workflow by ID"""
         async with aiosqlite.connect(self.db_path) as db:
@@ -91,21 +102,21 @@ class Database:
             updates.append("error = ?")
             params.append(error)
         
+        # Large results are stored once out-of-line; both columns may share a reference
         if final_output:
             updates.append("finalOutput = ?")
-            params.append(json.dumps(final_output))
+            params.append(await payload_store.encode(final_output))
         
         if node_results:
             updates.append("nodeResults = ?")
-            params.append(json.dumps(node_results))
+            params.append(await payload_store.encode(node_results))
         
         params.append(execution_id)
         
         query = f"UPDATE workflow_executions SET {', '.join(updates)} WHERE id = ?"
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(query, params)
-            await db.commit()
+        # Queued behind this execution's logs and written in a group commit
+        await self._write(query, params)
     
     async def log_node_execution(
         self,
@@ -124,21 +135,22 @@ class Database:
         log_id = secrets.token_hex(8)
         now = datetime.utcnow().isoformat()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO execution_logs
-                (id, executionId, nodeId, nodeType, nodeLabel, status, inputData, outputData, error, duration, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                log_id, execution_id, node_id, node_type, node_label, status,
-                json.dumps(input_data) if input_data else None,
-                json.dumps(output_data) if output_data else None,
-                error, duration, now
-            ))
-            await db.commit()
+        await self._write("""
+            INSERT INTO execution_logs
+            (id, executionId, nodeId, nodeType, nodeLabel, status, inputData, outputData, error, duration, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            log_id, execution_id, node_id, node_type, node_label, status,
+            await payload_store.encode(input_data),
+            await payload_store.encode(output_data),
+            error, duration, now
+        ))
     
     async def get_execution(self, execution_id: str) -> Optional[Dict]:
         """Get execution by ID"""
+        # Make queued status/log writes visible before reading
+        await execution_log_sink.flush()
+        
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
             async with db.execute(
@@ -150,8 +162,14 @@ class Database:
                     return dict(row)
                 return None
     
-    async def get_execution_logs(self, execution_id: str) -> List[Dict]:
-        """Get all logs for an execution"""
+    async def get_execution_logs(self, execution_id: str, resolve_payloads: bool = False) -> List[Dict]:
+        """
+        Get all logs for an execution
+        With resolve_payloads, out-of-line inputData/outputData references are
+        replaced by the original JSON
+        """
+        await execution_log_sink.flush()
+        
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
             async with db.execute(
@@ -159,5 +177,33 @@ class Database:
                 (execution_id,)
             ) as cursor:
                 rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+                logs = [dict(row) for row in rows]
+        
+        if resolve_payloads:
+            for log in logs:
+                log["inputData"] = await payload_store.resolve_text(log.get("inputData"))
+                log["outputData"] = await payload_store.resolve_text(log.get("outputData"))
+        
+        return logs
+    
+    async def get_completed_node_logs(self, execution_id: str) -> Dict[str, Dict]:
+        """
+        Get the latest completed (or reused) log row of each node of an execution
+        Returns: {nodeId: log row}; outputData is left encoded
+        """
+        await execution_log_sink.flush()
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                """
+                SELECT id, nodeId, nodeType, outputData FROM execution_logs
+                WHERE executionId = ? AND status IN ('completed', 'reused')
+                ORDER BY timestamp
+                """,
+                (execution_id,)
+            ) as cursor:
+                rows = await cursor.fetchall()
+        
+        return {row["nodeId"]: dict(row) for row in rows}
 
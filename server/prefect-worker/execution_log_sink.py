@@ -0,0 +1,171 @@
+"""
+Buffered execution log sink
+
+Execution log inserts and execution status updates are queued in memory and
+written by a single writer connection in group commits (one transaction per
+batch, `executemany` for runs of the same statement). Batches are flushed when
+they reach a size threshold or when the flush interval elapses, and the queue
+is drained on shutdown.
+"""
+import asyncio
+from typing import Any, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+import config
+
+
+class ExecutionLogSink:
+    """Single-writer, group-commit sink for execution_logs / workflow_executions writes"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.25
+    ):
+        self.db_path = db_path or config.DATABASE_PATH
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._pending = 0
+        self.batches_written = 0
+        self.statements_written = 0
+
+    @property
+    def running(self) -> bool:
+        """True when the writer is active on the current event loop"""
+        if self._writer is None or self._writer.done():
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def start(self):
+        """Open the writer connection and start the background writer"""
+        if self._writer is not None and not self._writer.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._conn = await aiosqlite.connect(self.db_path)
+        await self._conn.execute("PRAGMA busy_timeout = 5000")
+        self._writer = asyncio.create_task(self._run())
+        print(f"[LogSink] Started (batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """Flush everything still queued and close the writer connection"""
+        if self._writer is None:
+            return
+        if not self._writer.done():
+            await self._queue.put(None)
+            await self._writer
+        self._writer = None
+        if self._conn:
+            await self._conn.close()
+            self._conn = None
+        print(f"[LogSink] Stopped ({self.statements_written} statements in {self.batches_written} batches)")
+
+    async def execute(self, sql: str, params: Sequence[Any]):
+        """Queue a write; falls back to a direct write when the sink is not running"""
+        if not self.running:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute(sql, params)
+                await db.commit()
+            return
+
+        self._pending += 1
+        # Blocks when the queue is full, which applies back-pressure to producers
+        await self._queue.put((sql, tuple(params)))
+
+    async def flush(self):
+        """Wait until every write queued so far has been committed"""
+        if not self.running or self._pending == 0:
+            return
+        done = self._loop.create_future()
+        await self._queue.put(done)
+        await done
+
+    async def _run(self):
+        """Writer loop: collect a batch, write it in one transaction, repeat"""
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            batch = [item]
+            deadline = self._loop.time() + self.flush_interval
+
+            while item is not None and not isinstance(item, asyncio.Future) and len(batch) < self.batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+
+            if item is None:
+                # Stop requested: drain whatever is still queued
+                stopping = True
+                while not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+            await self._write(batch)
+
+    async def _write(self, batch: List[Any]):
+        """Write a batch in a single transaction, grouping runs of the same statement"""
+        statements = [item for item in batch if isinstance(item, tuple)]
+        waiters = [item for item in batch if isinstance(item, asyncio.Future)]
+
+        if statements:
+            groups: List[Tuple[str, List[Tuple]]] = []
+            for sql, params in statements:
+                if groups and groups[-1][0] == sql:
+                    groups[-1][1].append(params)
+                else:
+                    groups.append((sql, [params]))
+
+            try:
+                for sql, params_list in groups:
+                    if len(params_list) == 1:
+                        await self._conn.execute(sql, params_list[0])
+                    else:
+                        await self._conn.executemany(sql, params_list)
+                await self._conn.commit()
+                self.batches_written += 1
+                self.statements_written += len(statements)
+            except Exception as e:
+                print(f"[LogSink] Failed to write batch of {len(statements)} statements: {e}")
+                await self._conn.rollback()
+                await self._write_individually(statements)
+            finally:
+                self._pending -= len(statements)
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _write_individually(self, statements: List[Tuple[str, Tuple]]):
+        """Retry a failed batch one statement at a time so one bad row doesn't drop the rest"""
+        for sql, params in statements:
+            try:
+                await self._conn.execute(sql, params)
+                await self._conn.commit()
+                self.statements_written += 1
+            except Exception as e:
+                print(f"[LogSink] Dropped statement after error: {e}")
+                await self._conn.rollback()
+
+
+# Process-wide sink, started and stopped with the API service
+execution_log_sink = ExecutionLogSink(
+    max_queue_size=config.LOG_SINK_QUEUE_SIZE,
+    batch_size=config.LOG_SINK_BATCH_SIZE,
+    flush_interval=config.LOG_SINK_FLUSH_INTERVAL
+)
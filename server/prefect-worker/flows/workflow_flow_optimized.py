@@ -5,64 +5,21 @@ Uses Prefect's dependency management for parallel execution
 
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 from prefect import flow, task
-from prefect.futures import PrefectFuture
+from prefect.cache_policies import NONE as NO_CACHE
 import aiosqlite
 
-from tasks.node_handlers import NODE_HANDLERS
+from tasks.node_handlers import NODE_HANDLERS, STREAMING_NODE_TYPES
+from tasks.record_stream import cache_streams, describe_streams, has_stream_placeholder, materialize, records_for_json, to_stream
 from database import Database
-from config import DATABASE_PATH
-
-
-def analyze_workflow_dependencies(nodes: List[Dict], connections: List[Dict]) -> Dict[str, List[str]]:
-    """
-    Analyze workflow to determine node dependencies
-    Returns: {nodeId: [list of parent node IDs]}
-    """
-    dependencies = {}
-    
-    for node in nodes:
-        node_id = node['id']
-        # Find all nodes that this node depends on
-        parent_nodes = [
-            conn['fromNodeId'] 
-            for conn in connections 
-            if conn['toNodeId'] == node_id
-        ]
-        dependencies[node_id] = parent_nodes
-    
-    return dependencies
-
-
-def get_execution_layers(nodes: List[Dict], dependencies: Dict[str, List[str]]) -> List[List[str]]:
-    """
-    Group nodes into layers for sequential execution
-    Nodes in the same layer can execute in parallel
-    
-    Returns: [[layer0_nodes], [layer1_nodes], [layer2_nodes], ...]
-    """
-    layers = []
-    processed = set()
-    remaining = {node['id'] for node in nodes}
-    
-    while remaining:
-        # Find nodes with no unprocessed dependencies
-        current_layer = []
-        for node_id in remaining:
-            node_deps = dependencies.get(node_id, [])
-            if all(dep in processed for dep in node_deps):
-                current_layer.append(node_id)
-        
-        if not current_layer:
-            # Circular dependency or error
-            raise ValueError(f"Circular dependency detected or error in workflow structure")
-        
-        layers.append(current_layer)
-        processed.update(current_layer)
-        remaining -= set(current_layer)
-    
-    return layers
+from config import DATABASE_PATH, CANCELLATION_POLL_INTERVAL
+from cancellation import cancellation_registry, CancellationToken
+from cpu_pool import cpu_pool
+from execution_log_sink import execution_log_sink
+from node_result_cache import node_result_cache
+from payload_store import payload_store
+from flows.workflow_plan import WorkflowPlan, get_output_port, get_workflow_plan
 
 
 async def log_node_execution(
@@ -74,33 +31,62 @@ async def log_node_execution(
     input_data: Optional[Any] = None,
     output_data: Optional[Any] = None,
     error: Optional[str] = None,
-    duration: Optional[float] = None
+    duration: Optional[float] = None,
+    input_text: Optional[str] = None
 ):
-    """Log node execution to database"""
-    import json
-    
+    """
+    Log node execution to database (`input_text` is input_data already
+    encoded by the payload store, to log the same input again without
+    serializing it again)
+    """
+    # Buffered: written by the log sink in a group commit
+    await execution_log_sink.execute("""
+        INSERT INTO execution_logs 
+        (id, executionId, nodeId, nodeType, nodeLabel, status, inputData, outputData, error, duration, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        f"{execution_id}_{node_id}_{datetime.now().timestamp()}",
+        execution_id,
+        node_id,
+        node_type,
+        node_label,
+        status,
+        # Streams and batches are logged as their row count and a sample
+        input_text if input_text is not None else await payload_store.encode(describe_streams(input_data)),
+        await payload_store.encode(describe_streams(output_data)),
+        error,
+        duration,
+        datetime.now().isoformat()
+    ))
+
+
+async def is_execution_cancelled(execution_id: str) -> bool:
+    """Check whether the execution was cancelled by the user"""
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
-            INSERT INTO execution_logs 
-            (id, executionId, nodeId, nodeType, nodeLabel, status, inputData, outputData, error, duration, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            f"{execution_id}_{node_id}_{datetime.now().timestamp()}",
-            execution_id,
-            node_id,
-            node_type,
-            node_label,
-            status,
-            json.dumps(input_data) if input_data else None,
-            json.dumps(output_data) if output_data else None,
-            error,
-            duration,
-            datetime.now().isoformat()
-        ))
-        await db.commit()
+        cursor = await db.execute(
+            "SELECT status FROM workflow_executions WHERE id = ?",
+            (execution_id,)
+        )
+        row = await cursor.fetchone()
+        return bool(row and row[0] == 'cancelled')
+
+
+async def watch_for_cancellation(execution_id: str, token: CancellationToken):
+    """
+    Cross-process fallback: poll the execution status and cancel the token
+    when another process marked the execution as cancelled
+    """
+    while not token.cancelled:
+        try:
+            if await is_execution_cancelled(execution_id):
+                token.cancel()
+                return
+        except Exception as e:
+            print(f"[Optimized Flow] Cancellation check failed for {execution_id}: {e}")
+        await asyncio.sleep(CANCELLATION_POLL_INTERVAL)
 
 
-@task(name="execute_node", retries=1, retry_delay_seconds=5)
+@task(name="execute_node", retries=1, retry_delay_seconds=5, cache_policy=NO_CACHE)
 async def execute_node_task(
     node: Dict,
     input_data: Dict,
@@ -116,16 +102,29 @@ async def execute_node_task(
     node_label = node.get('label', node_type)
     
     start_time = datetime.now()
+    input_text = None
     
     try:
-        # Log start
+        # Log start (parents' streamed outputs are logged as their row count and a sample)
+        input_text = await payload_store.encode(describe_streams(input_data))
+        
+        # Memoized nodes are keyed by their records, before streams are wrapped
+        cache_key = await node_result_cache.cache_key(node, input_data)
+        
+        # Row-wise nodes consume large inputs chunk by chunk; all other
+        # handlers get fully materialized records
+        if node_type in STREAMING_NODE_TYPES:
+            input_data = to_stream(input_data)
+        else:
+            input_data = await materialize(input_data)
+        
         await log_node_execution(
             execution_id=execution_id,
             node_id=node_id,
             node_type=node_type,
             node_label=node_label,
             status='running',
-            input_data=input_data
+            input_text=input_text
         )
         
         # Get handler for this node type
@@ -134,12 +133,18 @@ async def execute_node_task(
         if not handler:
             raise ValueError(f"No handler found for node type: {node_type}")
         
-        # Execute handler
-        result = await handler(
-            node=node,
-            input_data=input_data,
-            execution_context=execution_context
-        )
+        async def compute():
+            result = await cpu_pool.run_handler(node, handler, input_data, execution_context)
+            # Streamed outputs run here, once: children read the kept chunks
+            return await cache_streams(result)
+        
+        # Execute handler (memoized across executions for nodes marked cacheable;
+        # CPU-bound handlers run in the process pool)
+        cache_status = None
+        if cache_key:
+            result, cache_status = await node_result_cache.get_or_compute(cache_key, compute)
+        else:
+            result = await compute()
         
         # Calculate duration
         duration = (datetime.now() - start_time).total_seconds()
@@ -152,16 +157,20 @@ async def execute_node_task(
             node_label=node_label,
             status='completed',
             input_data=input_data,
-            output_data=result,
+            input_text=input_text,
+            output_data={**result, 'resultCache': cache_status} if cache_status else result,
             duration=duration
         )
         
-        return {
+        node_result = {
             'success': True,
             'nodeId': node_id,
             'output': result,
             'duration': duration
         }
+        if cache_status:
+            node_result['cache'] = cache_status
+        return node_result
         
     except Exception as e:
         duration = (datetime.now() - start_time).total_seconds()
@@ -175,6 +184,7 @@ async def execute_node_task(
             node_label=node_label,
             status='failed',
             input_data=input_data,
+            input_text=input_text,
             error=error_msg,
             duration=duration
         )
@@ -187,44 +197,189 @@ async def execute_node_task(
         }
 
 
-def merge_inputs(parent_results: List[Dict], connections: List[Dict], node_id: str) -> Dict:
+async def record_cancelled_node(execution_id: str, node: Dict, start_time: datetime, reason: str) -> Dict:
+    """Log a node whose task was cancelled mid-run and build its result entry"""
+    duration = (datetime.now() - start_time).total_seconds()
+    
+    await log_node_execution(
+        execution_id=execution_id,
+        node_id=node['id'],
+        node_type=node['type'],
+        node_label=node.get('label', node['type']),
+        status='cancelled',
+        error=reason,
+        duration=duration
+    )
+    
+    return {
+        'success': False,
+        'nodeId': node['id'],
+        'cancelled': True,
+        'error': reason,
+        'duration': duration
+    }
+
+
+async def cancel_node_tasks(running: Dict[asyncio.Task, str]):
+    """Cancel the node tasks still running when the flow stops early and wait for them to unwind"""
+    for node_task in running:
+        node_task.cancel()
+    if running:
+        await asyncio.wait(running)
+
+
+async def record_skipped_nodes(execution_id: str, plan: WorkflowPlan, node_ids: List[str]):
+    """Log nodes pruned because they are only reachable through untaken condition branches"""
+    for node_id in node_ids:
+        node = plan.nodes_by_id[node_id]
+        await log_node_execution(
+            execution_id=execution_id,
+            node_id=node_id,
+            node_type=node['type'],
+            node_label=node.get('label', node['type']),
+            status='skipped',
+            duration=0
+        )
+
+
+async def seed_from_previous_execution(
+    plan: WorkflowPlan,
+    previous_logs: Dict[str, Dict],
+    from_node_id: str
+) -> Tuple[Set[str], Dict[str, Dict], Dict[str, str]]:
+    """
+    Plan a partial rerun starting at `from_node_id`
+    
+    Returns the node IDs to execute (the node, its downstream closure and
+    any upstream node whose stored output can't be reused), the results of
+    the other parents, rebuilt from the previous execution's logs:
+    {nodeId: {'success', 'nodeId', 'output', 'duration', 'reused'}}, and why
+    each upstream node in the first set runs again: {nodeId: reason} with
+    reason 'notCompleted' (no completed run to reuse), 'noOutput' or
+    'streamedOutput' (a stream or batch, logged as its row count and a sample)
+    """
+    rerun = plan.downstream_closure(from_node_id)
+    seeded = {}
+    upstream_reruns = {}
+    
+    # Every parent of a rerun node is either seeded or rerun itself
+    frontier = list(rerun)
+    while frontier:
+        for parent_id in plan.parents[frontier.pop()]:
+            if parent_id in rerun or parent_id in seeded:
+                continue
+            
+            log = previous_logs.get(parent_id)
+            output = await payload_store.resolve(log['outputData']) if log else None
+            
+            if log is None:
+                upstream_reruns[parent_id] = 'notCompleted'
+            elif not isinstance(output, dict) or output.get('success') is False:
+                upstream_reruns[parent_id] = 'noOutput'
+            elif has_stream_placeholder(output):
+                upstream_reruns[parent_id] = 'streamedOutput'
+            else:
+                output.pop('resultCache', None)
+                seeded[parent_id] = {
+                    'success': True,
+                    'nodeId': parent_id,
+                    'output': output,
+                    'duration': 0,
+                    'reused': True
+                }
+                continue
+            
+            rerun.add(parent_id)
+            frontier.append(parent_id)
+    
+    return rerun, seeded, upstream_reruns
+
+
+async def log_reused_nodes(execution_id: str, previous_logs: Dict[str, Dict], node_ids: List[str]):
+    """
+    Copy the previous log rows of nodes that don't run again into this
+    execution, so it can serve as the base of a later rerun (payloads are
+    shared, not re-encoded)
+    """
+    for node_id in node_ids:
+        await execution_log_sink.execute("""
+            INSERT INTO execution_logs 
+            (id, executionId, nodeId, nodeType, nodeLabel, status, inputData, outputData, error, duration, timestamp)
+            SELECT ?, ?, nodeId, nodeType, nodeLabel, 'reused', inputData, outputData, NULL, 0, ?
+            FROM execution_logs WHERE id = ?
+        """, (
+            f"{execution_id}_{node_id}_{datetime.now().timestamp()}",
+            execution_id,
+            datetime.now().isoformat(),
+            previous_logs[node_id]['id']
+        ))
+
+
+def is_connection_live(parent_result: Dict, conn: Dict) -> bool:
+    """
+    Whether data flows along a connection once its parent has finished
+    
+    Same rule as the legacy get_next_nodes: a condition only feeds its
+    'true' port when conditionResult is true and its 'false' port when it is
+    false. Per-row conditions feed each port that received records. Other
+    ports, and connections out of non-condition or failed parents, are
+    always live; skipped parents feed nothing.
+    """
+    if parent_result.get('skipped'):
+        return False
+    
+    output = parent_result.get('output')
+    port = get_output_port(conn)
+    if not isinstance(output, dict) or 'conditionResult' not in output or port not in ('true', 'false'):
+        return True
+    
+    if 'falseRecords' in output:
+        count = output.get(f'{port}Count')
+        if count is None:
+            count = len(output[f'{port}Records'])
+        return count > 0
+    
+    return bool(output['conditionResult']) == (port == 'true')
+
+
+def connection_output(output: Any, conn: Dict) -> Any:
+    """Data a parent's output sends along a connection (per-row conditions split it by port)"""
+    if not isinstance(output, dict):
+        return output
+    if get_output_port(conn) == 'false' and 'falseRecords' in output:
+        return output['falseRecords']
+    if 'outputData' in output:
+        return output['outputData']
+    return output
+
+
+def merge_inputs(node_results: Dict[str, Dict], incoming_connections: List[Dict]) -> Dict:
     """
     Merge inputs from multiple parent nodes
     Handles regular nodes and special cases like 'join'
     """
     merged_input = {}
     
-    # Find connections to this node
-    incoming_connections = [c for c in connections if c['toNodeId'] == node_id]
-    
     if len(incoming_connections) == 0:
         return {}
     elif len(incoming_connections) == 1:
         # Single input
         conn = incoming_connections[0]
-        parent_result = next((r for r in parent_results if r['nodeId'] == conn['fromNodeId']), None)
+        parent_result = node_results.get(conn['fromNodeId'])
         
         if parent_result and parent_result.get('success'):
-            output = parent_result.get('output', {})
-            # Handle different output formats
-            if isinstance(output, dict) and 'outputData' in output:
-                return output['outputData']
-            return output
+            return connection_output(parent_result.get('output', {}), conn)
         return {}
     else:
         # Multiple inputs (for join nodes)
         for conn in incoming_connections:
-            parent_result = next((r for r in parent_results if r['nodeId'] == conn['fromNodeId']), None)
+            parent_result = node_results.get(conn['fromNodeId'])
             
-            if parent_result and parent_result.get('success'):
-                output = parent_result.get('output', {})
-                # For join nodes, collect outputs from different branches
-                output_type = conn.get('outputType', 'default')
-                
-                if isinstance(output, dict) and 'outputData' in output:
-                    output_data = output['outputData']
-                else:
-                    output_data = output
+            if parent_result and parent_result.get('success') and is_connection_live(parent_result, conn):
+                # For join nodes, collect outputs from different branches (the
+                # editor marks the target port as inputPort)
+                output_type = conn.get('inputPort') or conn.get('outputType', 'default')
+                output_data = connection_output(parent_result.get('output', {}), conn)
                 
                 if output_type == 'A':
                     merged_input['inputA'] = output_data
@@ -242,7 +397,9 @@ def merge_inputs(parent_results: List[Dict], connections: List[Dict], node_id: s
 async def workflow_flow_optimized(
     workflow_id: str,
     execution_id: str,
-    inputs: Dict[str, Any]
+    inputs: Dict[str, Any],
+    from_node_id: Optional[str] = None,
+    previous_execution_id: Optional[str] = None
 ) -> Dict:
     """
     Optimized workflow execution using Prefect's native DAG
@@ -253,11 +410,16 @@ async def workflow_flow_optimized(
     - Caching support
     - Native Prefect monitoring
     
+    Condition nodes prune their untaken branches: nodes only reachable
+    through them are logged as 'skipped' and never run.
+    
+    With from_node_id and previous_execution_id, only that node and its
+    downstream closure run; the outputs of unchanged upstream nodes are
+    reused from the previous execution.
+    
     Note: workflow_data is loaded from DB inside the flow (not as parameter)
     to avoid exceeding Prefect Cloud payload limits with large inline data.
     """
-    import json
-    
     print(f"[Optimized Flow] Starting workflow execution: {execution_id}")
     
     # Load workflow data from DB instead of receiving as parameter
@@ -268,100 +430,208 @@ async def workflow_flow_optimized(
         if not row:
             raise ValueError(f"Workflow {workflow_id} not found in database")
         workflow_data = row[0]
-        if isinstance(workflow_data, str):
-            workflow_data = json.loads(workflow_data)
     
-    nodes = workflow_data.get('nodes', [])
-    connections = workflow_data.get('connections', [])
+    # Update execution status to running (unless it was cancelled while pending)
+    await execution_log_sink.execute("""
+        UPDATE workflow_executions 
+        SET status = 'running', startedAt = ?
+        WHERE id = ? AND status != 'cancelled'
+    """, (datetime.now().isoformat(), execution_id))
     
-    # Update execution status to running
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
-            UPDATE workflow_executions 
-            SET status = 'running', startedAt = ?
-            WHERE id = ?
-        """, (datetime.now().isoformat(), execution_id))
-        await db.commit()
+    # Cancels through this process's API cancel the token directly; the
+    # watcher picks up cancels that only reached the database
+    token = cancellation_registry.register(execution_id)
+    watcher = asyncio.create_task(watch_for_cancellation(execution_id, token))
+    running = {}  # asyncio.Task -> nodeId
     
     try:
-        # 1. Analyze dependencies
-        dependencies = analyze_workflow_dependencies(nodes, connections)
-        print(f"[Optimized Flow] Dependencies analyzed: {dependencies}")
-        
-        # 2. Group nodes into execution layers
-        layers = get_execution_layers(nodes, dependencies)
-        print(f"[Optimized Flow] Execution layers: {layers}")
-        
-        # 3. Execute layer by layer
-        node_results = {}  # nodeId -> result
-        
-        for layer_idx, layer_node_ids in enumerate(layers):
-            # Check if execution was cancelled before starting this layer
-            async with aiosqlite.connect(DATABASE_PATH) as db:
-                cursor = await db.execute(
-                    "SELECT status FROM workflow_executions WHERE id = ?",
-                    (execution_id,)
-                )
-                row = await cursor.fetchone()
-                if row and row[0] == 'cancelled':
-                    print(f"[Optimized Flow] Execution {execution_id} was cancelled - stopping at layer {layer_idx}")
-                    return {
-                        "success": False,
-                        "executionId": execution_id,
-                        "status": "cancelled",
-                        "message": "Execution was cancelled by user",
-                        "stoppedAtLayer": layer_idx,
-                        "nodeResults": node_results
-                    }
+        # 1. Compile the workflow plan (cached per workflow version)
+        plan = get_workflow_plan(workflow_data)
+        nodes = plan.nodes
+        print(f"[Optimized Flow] Workflow plan ready: {len(nodes)} nodes, {len(plan.layers)} layers")
+        
+        seeded = {}
+        upstream_reruns = {}
+        if from_node_id:
+            if from_node_id not in plan.nodes_by_id:
+                raise ValueError(f"Node {from_node_id} not found in workflow {workflow_id}")
+            previous_logs = await Database().get_completed_node_logs(previous_execution_id)
+            rerun, seeded, upstream_reruns = await seed_from_previous_execution(plan, previous_logs, from_node_id)
+            if upstream_reruns:
+                print(f"[Optimized Flow] Upstream nodes without a reusable output run again: {upstream_reruns}")
+            await log_reused_nodes(
+                execution_id,
+                previous_logs,
+                [node_id for node_id in plan.topological_order if node_id not in rerun and node_id in previous_logs]
+            )
+            print(f"[Optimized Flow] Rerunning {len(rerun)} nodes from {from_node_id}, reusing {len(seeded)} outputs from {previous_execution_id}")
+        else:
+            rerun = plan.nodes_by_id.keys()
+        
+        # 2. Dataflow scheduling: every node starts as soon as all of its
+        #    parents have finished, so a slow branch never stalls the others
+        pending_parents = {
+            node_id: sum(1 for parent_id in parent_ids if parent_id in rerun)
+            for node_id, parent_ids in plan.parents.items()
+            if node_id in rerun
+        }
+        
+        # Children that still have to read a node's output; once they all
+        # finished (or were skipped), its streamed output is dropped and only
+        # its summary kept. Nodes without children keep theirs for the result
+        pending_consumers = {
+            node_id: sum(1 for child_id in plan.children[node_id] if child_id in pending_parents)
+            for node_id in pending_parents
+        }
+        
+        node_results = dict(seeded)  # nodeId -> result
+        ready = []
+        started_at = {}  # nodeId -> start time
+        cache_counts = {}  # result cache status -> count
+        
+        # Branch pruning: a node only runs if at least one of its incoming
+        # connections is live (see is_connection_live); nodes left without
+        # live inputs are skipped, and so is everything only they feed
+        live_inputs = set()
+        skipped = []
+        
+        def release_parents(node_id: str):
+            """Drop the cached chunks of parents no other child still reads"""
+            for parent_id in plan.parents[node_id]:
+                if parent_id not in pending_consumers:
+                    continue
+                pending_consumers[parent_id] -= 1
+                if pending_consumers[parent_id] == 0:
+                    node_results[parent_id] = describe_streams(node_results[parent_id])
+        
+        def skip_node(node_id: str):
+            node_results[node_id] = {
+                'success': False,
+                'nodeId': node_id,
+                'skipped': True,
+                'duration': 0
+            }
+            skipped.append(node_id)
+            release_parents(node_id)
+        
+        def finish_node(node_id: str):
+            """Release the children of a finished (or skipped) node"""
+            stack = [node_id]
+            while stack:
+                parent_id = stack.pop()
+                parent_result = node_results[parent_id]
+                for conn in plan.outgoing[parent_id]:
+                    if conn['toNodeId'] in pending_parents and is_connection_live(parent_result, conn):
+                        live_inputs.add(conn['toNodeId'])
+                
+                for child_id in plan.children[parent_id]:
+                    if child_id not in pending_parents:
+                        continue
+                    pending_parents[child_id] -= 1
+                    if pending_parents[child_id] == 0:
+                        if child_id in live_inputs:
+                            ready.append(child_id)
+                        else:
+                            skip_node(child_id)
+                            stack.append(child_id)
+        
+        # Reused parents resolved their branches in the previous execution
+        for node_id in pending_parents:
+            for conn in plan.incoming[node_id]:
+                parent_result = seeded.get(conn['fromNodeId'])
+                if parent_result and is_connection_live(parent_result, conn):
+                    live_inputs.add(node_id)
+        
+        for node_id, count in list(pending_parents.items()):
+            if count != 0:
+                continue
+            if not plan.parents[node_id] or node_id in live_inputs:
+                ready.append(node_id)
+            else:
+                skip_node(node_id)
+                finish_node(node_id)
+        skipped_logged = 0
+        
+        def start_node(node_id: str):
+            node = plan.nodes_by_id[node_id]
+            layer_idx = plan.node_layers[node_id]
             
-            print(f"[Optimized Flow] Executing layer {layer_idx} with {len(layer_node_ids)} node(s): {layer_node_ids}")
+            # Get input data from parent nodes
+            input_data = merge_inputs(node_results, plan.incoming[node_id])
             
-            # Prepare tasks for this layer
-            layer_tasks = []
+            # Root nodes without inputs from parents use the workflow inputs
+            if layer_idx == 0 and not input_data:
+                input_data = inputs
             
-            for node_id in layer_node_ids:
-                node = next((n for n in nodes if n['id'] == node_id), None)
-                
-                if not node:
-                    print(f"[Optimized Flow] Warning: Node {node_id} not found")
-                    continue
-                
-                # Get input data from parent nodes
-                parent_node_ids = dependencies.get(node_id, [])
-                parent_results = [node_results[pid] for pid in parent_node_ids if pid in node_results]
-                
-                if parent_node_ids and not parent_results:
-                    # This shouldn't happen if layers are correct
-                    input_data = inputs if layer_idx == 0 else {}
-                else:
-                    input_data = merge_inputs(parent_results, connections, node_id)
-                
-                # If this is the first layer and no inputs from parents, use workflow inputs
-                if layer_idx == 0 and not input_data:
-                    input_data = inputs
-                
-                print(f"[Optimized Flow] Node {node_id} ({node['type']}) input data keys: {list(input_data.keys()) if isinstance(input_data, dict) else 'non-dict'}")
+            print(f"[Optimized Flow] Starting node {node_id} ({node['type']}) input data keys: {list(input_data.keys()) if isinstance(input_data, dict) else 'non-dict'}")
+            
+            # Run the task on the flow's event loop; independent nodes overlap
+            node_task = asyncio.create_task(execute_node_task(
+                node=node,
+                input_data=input_data,
+                execution_id=execution_id,
+                execution_context={
+                    'workflow_id': workflow_id,
+                    'execution_id': execution_id,
+                    'layer': layer_idx,
+                    'mode': 'full_workflow_optimized'
+                }
+            ))
+            running[node_task] = node_id
+            started_at[node_id] = datetime.now()
+            token.add_task(node_task)
+        
+        while ready or running:
+            if skipped_logged < len(skipped):
+                await record_skipped_nodes(execution_id, plan, skipped[skipped_logged:])
+                skipped_logged = len(skipped)
+            
+            if token.cancelled:
+                stopped_at_layer = min(plan.node_layers[node_id] for node_id in [*ready, *running.values()])
+                print(f"[Optimized Flow] Execution {execution_id} was cancelled - stopping at layer {stopped_at_layer}")
                 
-                # Submit task (Prefect will execute in parallel within this layer)
-                task_future = execute_node_task.submit(
-                    node=node,
-                    input_data=input_data,
-                    execution_id=execution_id,
-                    execution_context={
-                        'workflow_id': workflow_id,
-                        'execution_id': execution_id,
-                        'layer': layer_idx,
-                        'mode': 'full_workflow_optimized'
-                    }
-                )
+                # Running nodes were cancelled by the token; wait for them to unwind
+                if running:
+                    await asyncio.wait(running)
+                    for node_task, node_id in running.items():
+                        if node_task.cancelled():
+                            node_results[node_id] = await record_cancelled_node(
+                                execution_id, plan.nodes_by_id[node_id], started_at[node_id], token.reason
+                            )
+                        else:
+                            node_results[node_id] = node_task.result()
                 
-                layer_tasks.append((node_id, task_future))
+                return {
+                    "success": False,
+                    "executionId": execution_id,
+                    "status": "cancelled",
+                    "message": token.reason,
+                    "stoppedAtLayer": stopped_at_layer,
+                    "nodeResults": {node_id: records_for_json(result) for node_id, result in node_results.items()}
+                }
+            
+            for node_id in ready:
+                start_node(node_id)
+            ready = []
             
-            # Wait for all tasks in this layer to complete
-            # This is where Prefect executes tasks in PARALLEL
-            for node_id, task_future in layer_tasks:
-                result = task_future.result()
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            
+            for node_task in done:
+                if token.cancelled and node_task.cancelled():
+                    # Handled together with the other running nodes above
+                    continue
+                node_id = running.pop(node_task)
+                if node_task.cancelled():
+                    # Cancelled from outside the execution's token (e.g. the event loop shutting down)
+                    result = await record_cancelled_node(
+                        execution_id, plan.nodes_by_id[node_id], started_at[node_id], "Node task was cancelled"
+                    )
+                else:
+                    result = node_task.result()
                 node_results[node_id] = result
+                release_parents(node_id)
+                if result.get('cache'):
+                    cache_counts[result['cache']] = cache_counts.get(result['cache'], 0) + 1
                 
                 print(f"[Optimized Flow] Node {node_id} completed: success={result.get('success')}, duration={result.get('duration')}s")
                 
@@ -369,9 +639,16 @@ async def workflow_flow_optimized(
                 if not result.get('success'):
                     print(f"[Optimized Flow] Node {node_id} failed: {result.get('error')}")
                     # For now, continue execution (some branches might still succeed)
+                
+                finish_node(node_id)
         
-        # 4. Check overall success
-        failed_nodes = [nid for nid, res in node_results.items() if not res.get('success')]
+        if skipped_logged < len(skipped):
+            await record_skipped_nodes(execution_id, plan, skipped[skipped_logged:])
+        if skipped:
+            print(f"[Optimized Flow] Skipped {len(skipped)} nodes on untaken branches: {', '.join(skipped)}")
+        
+        # 3. Check overall success
+        failed_nodes = [nid for nid, res in node_results.items() if not res.get('success') and not res.get('skipped')]
         
         if failed_nodes:
             final_status = 'failed'
@@ -380,42 +657,62 @@ async def workflow_flow_optimized(
             final_status = 'completed'
             error_message = None
         
-        # 5. Update execution status
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("""
-                UPDATE workflow_executions 
-                SET status = ?, completedAt = ?, error = ?
-                WHERE id = ?
-            """, (final_status, datetime.now().isoformat(), error_message, execution_id))
-            await db.commit()
+        # 4. Update execution status
+        await execution_log_sink.execute("""
+            UPDATE workflow_executions 
+            SET status = ?, completedAt = ?, error = ?
+            WHERE id = ?
+        """, (final_status, datetime.now().isoformat(), error_message, execution_id))
         
         print(f"[Optimized Flow] Workflow execution completed: {final_status}")
+        if cache_counts:
+            print(f"[Optimized Flow] Result cache: {cache_counts.get('hit', 0)} hits, "
+                  f"{cache_counts.get('miss', 0)} misses, {cache_counts.get('coalesced', 0)} coalesced")
         
         return {
             'executionId': execution_id,
             'status': final_status,
-            'nodeResults': node_results,
+            'nodeResults': {node_id: records_for_json(result) for node_id, result in node_results.items()},
             'failedNodes': failed_nodes,
             'totalNodes': len(nodes),
-            'completedNodes': len([r for r in node_results.values() if r.get('success')])
+            'completedNodes': len([r for r in node_results.values() if r.get('success')]),
+            'skippedNodes': skipped,
+            'resultCache': cache_counts,
+            'reusedNodes': list(seeded),
+            'upstreamReruns': upstream_reruns
         }
         
+    except asyncio.CancelledError:
+        # The flow itself was cancelled: stop its nodes and record the execution as cancelled
+        await cancel_node_tasks(running)
+        await execution_log_sink.execute("""
+            UPDATE workflow_executions 
+            SET status = 'cancelled', completedAt = ?, error = ?
+            WHERE id = ?
+        """, (datetime.now().isoformat(), "Flow was cancelled", execution_id))
+        raise
+    
     except Exception as e:
         error_msg = str(e)
         print(f"[Optimized Flow] Workflow execution failed with error: {error_msg}")
         
+        # Nodes still running would otherwise keep going without anyone awaiting them
+        await cancel_node_tasks(running)
+        
         # Update execution status to failed
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            await db.execute("""
-                UPDATE workflow_executions 
-                SET status = 'failed', completedAt = ?, error = ?
-                WHERE id = ?
-            """, (datetime.now().isoformat(), error_msg, execution_id))
-            await db.commit()
+        await execution_log_sink.execute("""
+            UPDATE workflow_executions 
+            SET status = 'failed', completedAt = ?, error = ?
+            WHERE id = ?
+        """, (datetime.now().isoformat(), error_msg, execution_id))
         
         return {
             'executionId': execution_id,
             'status': 'failed',
             'error': error_msg
         }
+    
+    finally:
+        watcher.cancel()
+        cancellation_registry.unregister(execution_id)
 
@@ -0,0 +1,203 @@
+"""
+Compiled workflow plans
+
+Graph analysis (dependencies, adjacency, ports, topological order) is done
+once per workflow version and cached, so repeated runs of the same workflow
+skip it entirely.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Union
+
+import config
+
+
+def analyze_workflow_dependencies(nodes: List[Dict], connections: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Analyze workflow to determine node dependencies
+    Returns: {nodeId: [list of parent node IDs]}
+    """
+    dependencies = {node['id']: [] for node in nodes}
+
+    for conn in connections:
+        to_node_id = conn['toNodeId']
+        if to_node_id in dependencies:
+            dependencies[to_node_id].append(conn['fromNodeId'])
+
+    return dependencies
+
+
+def get_execution_layers(nodes: List[Dict], dependencies: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Group nodes into layers for sequential execution
+    Nodes in the same layer can execute in parallel
+
+    Returns: [[layer0_nodes], [layer1_nodes], [layer2_nodes], ...]
+    """
+    pending_parents = {}
+    children = {node['id']: [] for node in nodes}
+
+    for node in nodes:
+        node_id = node['id']
+        unique_parents = set(dependencies.get(node_id, []))
+        pending_parents[node_id] = len(unique_parents)
+        for parent_id in unique_parents:
+            # Parents that are not nodes never finish, which is reported below
+            if parent_id in children:
+                children[parent_id].append(node_id)
+
+    layers = []
+    current_layer = [node_id for node_id, count in pending_parents.items() if count == 0]
+    processed = 0
+
+    while current_layer:
+        layers.append(current_layer)
+        processed += len(current_layer)
+
+        next_layer = []
+        for node_id in current_layer:
+            for child_id in children[node_id]:
+                pending_parents[child_id] -= 1
+                if pending_parents[child_id] == 0:
+                    next_layer.append(child_id)
+        current_layer = next_layer
+
+    if processed < len(pending_parents):
+        # Circular dependency or error
+        raise ValueError("Circular dependency detected or error in workflow structure")
+
+    return layers
+
+
+def get_output_port(conn: Dict) -> Optional[str]:
+    """Output port a connection leaves from ('true'/'false' for conditions, 'A'/'B' for splits)"""
+    return conn.get('fromPort') or conn.get('outputType')
+
+
+class WorkflowPlan:
+    """
+    Execution plan compiled from a workflow definition
+
+    Plans are cached and shared between executions, so the node and
+    connection dicts they hold must be treated as read-only.
+    """
+
+    def __init__(self, nodes: List[Dict], connections: List[Dict]):
+        self.nodes = nodes
+        self.connections = connections
+        self.nodes_by_id = {node['id']: node for node in nodes}
+
+        # Adjacency indexes: connections into / out of each node
+        self.incoming = {node_id: [] for node_id in self.nodes_by_id}
+        self.outgoing = {node_id: [] for node_id in self.nodes_by_id}
+        for conn in connections:
+            if conn['toNodeId'] in self.incoming:
+                self.incoming[conn['toNodeId']].append(conn)
+            if conn['fromNodeId'] in self.outgoing:
+                self.outgoing[conn['fromNodeId']].append(conn)
+
+        self.dependencies = analyze_workflow_dependencies(nodes, connections)
+        self.layers = get_execution_layers(nodes, self.dependencies)
+        self.node_layers = {
+            node_id: layer_idx
+            for layer_idx, layer_node_ids in enumerate(self.layers)
+            for node_id in layer_node_ids
+        }
+        self.topological_order = [node_id for layer in self.layers for node_id in layer]
+
+        # Unique parent / child node IDs, in connection order
+        self.parents = {
+            node_id: list(dict.fromkeys(parent_ids))
+            for node_id, parent_ids in self.dependencies.items()
+        }
+        self.children = {
+            node_id: list(dict.fromkeys(conn['toNodeId'] for conn in conns if conn['toNodeId'] in self.nodes_by_id))
+            for node_id, conns in self.outgoing.items()
+        }
+
+        # Port maps: nodeId -> {port: [connected node IDs]}
+        self.output_ports = {}
+        for node_id, conns in self.outgoing.items():
+            ports = {}
+            for conn in conns:
+                ports.setdefault(get_output_port(conn) or 'default', []).append(conn['toNodeId'])
+            self.output_ports[node_id] = ports
+        self.input_ports = {}
+        for node_id, conns in self.incoming.items():
+            ports = {}
+            for conn in conns:
+                ports.setdefault(conn.get('inputPort') or 'default', []).append(conn['fromNodeId'])
+            self.input_ports[node_id] = ports
+
+    @property
+    def root_node_ids(self) -> List[str]:
+        """Nodes without parents (the first execution layer)"""
+        return self.layers[0] if self.layers else []
+
+    def downstream_closure(self, node_id: str) -> Set[str]:
+        """A node and every node reachable from it"""
+        closure = {node_id}
+        stack = [node_id]
+        while stack:
+            for child_id in self.children[stack.pop()]:
+                if child_id not in closure:
+                    closure.add(child_id)
+                    stack.append(child_id)
+        return closure
+
+
+class WorkflowPlanCache:
+    """LRU cache of compiled plans keyed by a hash of the workflow definition"""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._plans: "OrderedDict[str, WorkflowPlan]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_workflow_data(workflow_data: Union[str, bytes, Dict]) -> str:
+        """Hash the raw `workflows.data` value (parsed dicts are hashed canonically)"""
+        if isinstance(workflow_data, dict):
+            workflow_data = json.dumps(workflow_data, sort_keys=True, default=str)
+        if isinstance(workflow_data, str):
+            workflow_data = workflow_data.encode('utf-8')
+        return hashlib.sha256(workflow_data).hexdigest()
+
+    def get(self, workflow_data: Union[str, bytes, Dict]) -> WorkflowPlan:
+        """Return the compiled plan for a workflow definition, compiling it on a miss"""
+        key = self.hash_workflow_data(workflow_data)
+
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+        self.misses += 1
+        if not isinstance(workflow_data, dict):
+            workflow_data = json.loads(workflow_data)
+        plan = WorkflowPlan(
+            workflow_data.get('nodes', []),
+            workflow_data.get('connections', [])
+        )
+
+        self._plans[key] = plan
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+
+        return plan
+
+    def clear(self):
+        """Drop all cached plans"""
+        self._plans.clear()
+
+
+# Process-wide plan cache
+workflow_plan_cache = WorkflowPlanCache(max_size=config.WORKFLOW_PLAN_CACHE_SIZE)
+
+
+def get_workflow_plan(workflow_data: Union[str, bytes, Dict]) -> WorkflowPlan:
+    """Get the (cached) compiled plan for a workflow definition"""
+    return workflow_plan_cache.get(workflow_data)
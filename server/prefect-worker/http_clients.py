@@ -0,0 +1,195 @@
+"""
+Shared HTTP clients for node handlers
+
+Instead of opening a new httpx.AsyncClient with new TCP/TLS connections for
+every call, handlers open a session on this registry's connection pool:
+
+    async with http_clients.session(timeout=30.0) as client:
+        response = await client.get(url)
+
+Each session is its own client, so cookies never carry over from one call
+(workflow, organization) to the next, and its timeout defaults to httpx's
+(5s) as with a plain AsyncClient. Only the transport is shared: all sessions
+of an event loop use one keep-alive connection pool (HTTP_POOL_* limits,
+HTTP/2 when HTTP_CLIENT_HTTP2 is on and the `h2` package is installed) that
+outlives them, so repeated and concurrent calls to the same API reuse
+connections. Requests to one host are additionally capped at
+HTTP_POOL_MAX_PER_HOST in flight; a request holds its host slot until its
+response is closed.
+
+httpx connections belong to the event loop that opened them, so the registry
+keeps one pool per loop. The API service closes the pool of its loop on
+shutdown; pools of other loops are dropped with their loop.
+"""
+import asyncio
+import importlib.util
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+import config
+
+_HostKey = Tuple[str, str, Optional[int]]
+
+# httpx's default timeout, for sessions that don't set one
+DEFAULT_TIMEOUT = 5.0
+
+
+class _HostStats:
+    def __init__(self, limit: int):
+        self.slots = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.requests = 0
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees its host slot when the response is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for part in self._stream:
+            yield part
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release:
+                release()
+
+
+class _HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Pooled transport that bounds in-flight requests per host"""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, per_host: int):
+        self._transport = transport
+        self.per_host = max(per_host, 1)
+        self.hosts: Dict[_HostKey, _HostStats] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = (request.url.scheme, request.url.host, request.url.port)
+        host = self.hosts.get(key)
+        if host is None:
+            host = self.hosts[key] = _HostStats(self.per_host)
+
+        host.waiting += 1
+        try:
+            await host.slots.acquire()
+        finally:
+            host.waiting -= 1
+        host.active += 1
+        host.requests += 1
+
+        def release():
+            host.active -= 1
+            host.slots.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self):
+        # Closed by the registry, not by the sessions sharing it
+        pass
+
+    async def close_pool(self):
+        await self._transport.aclose()
+
+    def connection_stats(self) -> Dict:
+        # httpcore's pool isn't public API; report what it exposes
+        connections = getattr(getattr(self._transport, "_pool", None), "connections", [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open": len(connections), "idle": idle}
+
+
+class HttpClientRegistry:
+    """Process-wide registry of pooled httpx clients"""
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 30, max_per_host: int = 10, http2: bool = False):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_per_host = max_per_host
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            print("[HttpClients] HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _HostLimitedTransport]" = weakref.WeakKeyDictionary()
+        self.clients_created = 0
+
+    def _pool(self) -> _HostLimitedTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            pool = self._pools[loop] = _HostLimitedTransport(transport, self.max_per_host)
+        return pool
+
+    @asynccontextmanager
+    async def session(self, timeout: float = DEFAULT_TIMEOUT) -> AsyncIterator[httpx.AsyncClient]:
+        """A client on the running loop's shared pool, a drop-in for `async with httpx.AsyncClient(...)`"""
+        self.clients_created += 1
+        async with httpx.AsyncClient(transport=self._pool(), timeout=timeout) as client:
+            yield client
+
+    async def aclose(self):
+        """Close the pool of the running loop"""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is None:
+            return
+        stats = self._pool_stats(pool)
+        await pool.close_pool()
+        print(f"[HttpClients] Closed ({stats['requests']} requests over {len(stats['hosts'])} hosts)")
+
+    def _pool_stats(self, pool: _HostLimitedTransport) -> Dict:
+        hosts = {
+            f"{scheme}://{host}" + (f":{port}" if port else ""): {
+                "active": stats.active,
+                "waiting": stats.waiting,
+                "requests": stats.requests
+            }
+            for (scheme, host, port), stats in pool.hosts.items()
+        }
+        return {
+            "connections": pool.connection_stats(),
+            "requests": sum(host["requests"] for host in hosts.values()),
+            "hosts": hosts
+        }
+
+    def stats(self) -> Dict:
+        """Pool metrics of the running loop (totals only when called outside a loop)"""
+        try:
+            pool = self._pools.get(asyncio.get_running_loop())
+        except RuntimeError:
+            pool = None
+        return {
+            "http2": self.http2,
+            "maxConnections": self.limits.max_connections,
+            "maxKeepalive": self.limits.max_keepalive_connections,
+            "maxPerHost": self.max_per_host,
+            "loops": len(self._pools),
+            "clientsCreated": self.clients_created,
+            **(self._pool_stats(pool) if pool else {"connections": {"open": 0, "idle": 0}, "requests": 0, "hosts": {}})
+        }
+
+
+# Process-wide HTTP client registry
+http_clients = HttpClientRegistry(
+    max_connections=config.HTTP_POOL_MAX_CONNECTIONS,
+    max_keepalive=config.HTTP_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=config.HTTP_POOL_KEEPALIVE_EXPIRY,
+    max_per_host=config.HTTP_POOL_MAX_PER_HOST,
+    http2=config.HTTP_CLIENT_HTTP2
+)
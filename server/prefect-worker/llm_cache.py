@@ -0,0 +1,150 @@
+"""
+Persistent cache of LLM responses
+
+LLM nodes look up the raw response text of a chat completion by a hash of
+the model, the messages (prompt, context and output instruction) and the
+output type before calling the API, and store what they get back, so
+re-runs over unchanged data don't pay for the same answers again.
+Post-processing (number/date/enum) runs after the lookup, on cached and
+fresh responses alike.
+
+Entries live in the `llm_response_cache` table of the worker database and
+expire after LLM_CACHE_TTL seconds. The table is bounded by entry count and
+by the size of the stored responses (LLM_CACHE_MAX_ENTRIES / _MAX_BYTES);
+the least recently used entries are evicted first. A node opts out with
+`llmCache: false`.
+
+Lookups and writes take lists of keys so per-row nodes issue one query per
+batch instead of one per row.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiosqlite
+
+import config
+
+# Keys per lookup query
+_LOOKUP_CHUNK = 500
+
+
+class LlmResponseCache:
+    """SQLite-backed TTL/LRU cache of LLM response texts"""
+
+    def __init__(self, db_path: Optional[str] = None, ttl: float = 604800, max_entries: int = 100000, max_bytes: int = 256 * 1024 * 1024, enabled: bool = True):
+        self.db_path = db_path or config.DATABASE_PATH
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, Any]], output_type: str = "text", enum_options: Optional[List[str]] = None) -> str:
+        """Cache key of a chat completion request"""
+        payload = {"model": model, "messages": messages, "outputType": output_type, "enumOptions": enum_options or []}
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+        ).hexdigest()
+
+    async def ensure_schema(self, db):
+        if self._schema_ready:
+            return
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                createdAt REAL,
+                lastUsedAt REAL,
+                hits INTEGER DEFAULT 0
+            )
+        """)
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_llm_response_cache_used ON llm_response_cache(lastUsedAt)")
+        await db.commit()
+        self._schema_ready = True
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Cached responses for the keys that have a live entry"""
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled or not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, str] = {}
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("PRAGMA busy_timeout = 5000")
+            await self.ensure_schema(db)
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                cursor = await db.execute(
+                    f"SELECT key, response FROM llm_response_cache WHERE createdAt > ? AND key IN ({', '.join('?' for _ in chunk)})",
+                    [now - self.ttl, *chunk]
+                )
+                found.update(await cursor.fetchall())
+            if found:
+                await db.executemany(
+                    "UPDATE llm_response_cache SET lastUsedAt = ?, hits = hits + 1 WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                await db.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def put_many(self, entries: Dict[str, Tuple[str, str]]):
+        """Store {key: (model, response)} and evict expired and least recently used entries"""
+        if not self.enabled or not entries:
+            return
+        now = time.time()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("PRAGMA busy_timeout = 5000")
+            await self.ensure_schema(db)
+            await db.executemany("""
+                INSERT OR REPLACE INTO llm_response_cache (key, model, response, size, createdAt, lastUsedAt, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+            """, [(key, model, response, len(response.encode('utf-8')), now, now) for key, (model, response) in entries.items()])
+            await self._evict(db, now)
+            await db.commit()
+
+    async def _evict(self, db, now: float):
+        cursor = await db.execute("DELETE FROM llm_response_cache WHERE createdAt <= ?", [now - self.ttl])
+        evicted = cursor.rowcount
+        cursor = await db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_response_cache")
+        count, total = await cursor.fetchone()
+        if count > self.max_entries or total > self.max_bytes:
+            # Walk from the least recently used entry until both bounds hold
+            cursor = await db.execute("SELECT key, size FROM llm_response_cache ORDER BY lastUsedAt")
+            doomed = []
+            async for key, size in cursor:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                count -= 1
+                total -= size or 0
+            await cursor.close()
+            await db.executemany("DELETE FROM llm_response_cache WHERE key = ?", doomed)
+            evicted += len(doomed)
+        self.evicted += evicted
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted
+        }
+
+
+# Process-wide LLM response cache
+llm_cache = LlmResponseCache(
+    ttl=config.LLM_CACHE_TTL,
+    max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    max_bytes=config.LLM_CACHE_MAX_BYTES,
+    enabled=config.LLM_CACHE_ENABLED
+)
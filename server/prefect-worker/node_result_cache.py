@@ -0,0 +1,224 @@
+"""
+Node result memoization across executions
+
+Deterministic nodes that opt in (`cacheable: true` on the node or in its
+config) reuse the result of a previous run with the same node type, config
+and input. Entries expire after a TTL and the cache is bounded by entry
+count and by the JSON size of the cached results. Identical computations
+that run at the same time share a single in-flight call.
+
+Every caller gets its own copy of a cached result, so a downstream node
+mutating its input can't change what later executions get. Streamed inputs
+and outputs are cacheable once their node has run them (see
+tasks/record_stream.py `cache_streams`): keys hash their records and copies
+share their immutable RecordBatch chunks. Keys and copies are computed off
+the event loop.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+import config
+from tasks.columnar import RecordBatch
+from tasks.node_handlers import CACHEABLE_NODE_TYPES
+from tasks.record_stream import RecordStream, has_stream_placeholder, records_for_json
+
+
+def _canonical_json(value: Any) -> Optional[str]:
+    """Sorted-key JSON of a value's records, None if it holds a stream that was never run"""
+    data = records_for_json(value)
+    if has_stream_placeholder(data):
+        return None
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def _canonical_hash(value: Any) -> Optional[str]:
+    text = _canonical_json(value)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest() if text is not None else None
+
+
+def _copy_batch(batch: RecordBatch) -> RecordBatch:
+    """Batches are immutable, but values of object columns (e.g. nested dicts) are not"""
+    if all(column.dtype != object for column in batch.columns.values()):
+        return batch
+    columns = {
+        name: copy.deepcopy(column) if column.dtype == object else column
+        for name, column in batch.columns.items()
+    }
+    return RecordBatch(columns, batch.length, batch.present)
+
+
+def _copy_result(value: Any) -> Any:
+    """Deep copy of a result; cached streams become new streams over copies of their chunks"""
+    if isinstance(value, RecordStream):
+        return RecordStream.from_chunks([
+            _copy_batch(chunk) if isinstance(chunk, RecordBatch) else copy.deepcopy(chunk)
+            for chunk in value.cached
+        ])
+    if isinstance(value, RecordBatch):
+        return _copy_batch(value)
+    if isinstance(value, dict):
+        return {k: _copy_result(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_result(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    return copy.deepcopy(value)
+
+
+def _prepare_entry(result: Any) -> Optional[Tuple[int, Dict]]:
+    """
+    (JSON size, private copy) of a result about to be cached, None for
+    results that are never cached: failed runs and streams that were never run
+    """
+    if not isinstance(result, dict) or result.get("success") is False:
+        return None
+    text = _canonical_json(result)
+    if text is None:
+        return None
+    return len(text), _copy_result(result)
+
+
+class _InFlight:
+    """A running computation and the number of callers waiting for it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class NodeResultCache:
+    """In-memory TTL/LRU cache of node handler results"""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 256, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, result)
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict]]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def cache_key(self, node: Dict, input_data: Any) -> Optional[str]:
+        """
+        Cache key for a node run, or None if the node/input can't be cached
+        (inputs with streams that were never run can't be hashed)
+        """
+        node_config = node.get("config", {}) or {}
+        if not (node.get("cacheable") or node_config.get("cacheable")):
+            return None
+        if node.get("type") not in CACHEABLE_NODE_TYPES:
+            return None
+        input_hash = await asyncio.to_thread(_canonical_hash, input_data)
+        if input_hash is None:
+            return None
+        # The opt-in flag itself doesn't change the result
+        config_without_flag = {k: v for k, v in node_config.items() if k != "cacheable"}
+        return f"{node['type']}:{_canonical_hash(config_without_flag)}:{input_hash}"
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, str]:
+        """
+        Return (result, status) where status is 'hit', 'coalesced' (joined an
+        identical in-flight call) or 'miss' (computed now)
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return await asyncio.to_thread(_copy_result, entry[2]), "hit"
+            self._evict(key)
+
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            status = "coalesced"
+        else:
+            self.misses += 1
+            status = "miss"
+            # The computation runs in its own task so one caller's cancellation
+            # doesn't abort it for the others
+            flight = _InFlight(asyncio.ensure_future(self._compute_and_store(key, compute)))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            # Nobody is waiting anymore (all callers cancelled): stop the computation
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+        if status == "coalesced":
+            # The caller that started the computation gets the original
+            result = await asyncio.to_thread(_copy_result, result)
+        return result, status
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        result = await compute()
+        prepared = await asyncio.to_thread(_prepare_entry, result)
+        if prepared is not None:
+            size, entry = prepared
+            self.put(key, entry, size)
+        return result
+
+    def _finish(self, key: str, flight: _InFlight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def put(self, key: str, result: Dict, size: Optional[int] = None):
+        """
+        Store a result (the cache keeps this object: pass a copy), evicting
+        expired and least recently used entries as needed
+        """
+        if size is None:
+            size = len(json.dumps(records_for_json(result), default=str))
+        if size > self.max_bytes:
+            return
+
+        self._evict(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, result)
+        self._bytes += size
+
+        now = time.monotonic()
+        for stale_key in [k for k, (expires_at, _, _) in self._entries.items() if expires_at <= now]:
+            self._evict(stale_key)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
+
+
+# Process-wide node result cache
+node_result_cache = NodeResultCache(
+    ttl=config.NODE_RESULT_CACHE_TTL,
+    max_entries=config.NODE_RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=config.NODE_RESULT_CACHE_MAX_BYTES
+)
@@ -0,0 +1,244 @@
+"""
+Content-addressed storage for node input/output payloads
+
+Small payloads are still written inline as JSON. Larger ones are hashed
+(SHA-256 of their JSON), compressed and stored once in `execution_payloads`;
+log and execution rows then hold a small reference instead:
+
+    {"$payloadRef": "sha256:<hex>", "size": <json bytes>, "storedSize": <compressed bytes>}
+
+The same content logged several times (e.g. a node's input on 'running' and
+again on 'completed', or a parent's output reused as its child's input) is
+compressed and written only once: references already written are memoized
+by content hash, in a memo bounded by bytes. Payloads are serialized on
+every call, so a payload mutated between two calls is stored as it is now;
+callers that log the same object twice reuse the encoded text instead.
+Large payloads are serialized, hashed and compressed off the event loop.
+
+`collect_garbage` deletes stored payloads no log or execution row refers to
+any more (e.g. after their workflow was deleted).
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import re
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional, Set, Tuple
+
+import aiosqlite
+
+import config
+from execution_log_sink import execution_log_sink
+
+PAYLOAD_REF_KEY = "$payloadRef"
+
+# Payloads with containers or strings this large are serialized and
+# compressed in a worker thread
+_THREADED_ITEMS = 1000
+_THREADED_CHARS = 64 * 1024
+
+# Columns that may hold payload references
+_REFERENCING_COLUMNS = [
+    ("execution_logs", "inputData"),
+    ("execution_logs", "outputData"),
+    ("workflow_executions", "nodeResults"),
+    ("workflow_executions", "finalOutput"),
+]
+_REF_PATTERN = re.compile(r'"\$payloadRef": "(sha256:[0-9a-f]{64})"')
+
+
+def _is_large(value: Any, depth: int = 2) -> bool:
+    """Cheap guess, without serializing, whether a payload is worth encoding off the event loop"""
+    if isinstance(value, str):
+        return len(value) >= _THREADED_CHARS
+    if isinstance(value, (list, dict)):
+        if len(value) >= _THREADED_ITEMS:
+            return True
+        if depth > 0:
+            items = value.values() if isinstance(value, dict) else value
+            return any(_is_large(item, depth - 1) for item in itertools.islice(items, 64))
+    return False
+
+
+def _serialize(value: Any, inline_max_bytes: int) -> Tuple[bytes, Optional[str]]:
+    """JSON bytes of a payload and, if it is too large to inline, their content hash"""
+    data = json.dumps(value).encode('utf-8')
+    if len(data) <= inline_max_bytes:
+        return data, None
+    return data, f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+class PayloadStore:
+    """Deduplicated, compressed out-of-line storage for large JSON payloads"""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        inline_max_bytes: int = 4096,
+        memo_max_bytes: int = 1024 * 1024
+    ):
+        self.db_path = db_path or config.DATABASE_PATH
+        self.inline_max_bytes = inline_max_bytes
+        self.memo_max_bytes = memo_max_bytes
+        # Hashes already written by this process -> reference text, least recently used first
+        self._refs: "OrderedDict[str, str]" = OrderedDict()
+        self._refs_bytes = 0
+        self._schema_ready = False
+
+    async def ensure_schema(self):
+        """Create the payload table if it doesn't exist yet"""
+        if self._schema_ready:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS execution_payloads (
+                    hash TEXT PRIMARY KEY,
+                    encoding TEXT,
+                    size INTEGER,
+                    storedSize INTEGER,
+                    data BLOB,
+                    createdAt TEXT
+                )
+            """)
+            await db.commit()
+        self._schema_ready = True
+
+    async def encode(self, value: Any) -> Optional[str]:
+        """
+        Encode a payload for a TEXT column: inline JSON for small payloads,
+        a reference for large ones. Falsy payloads are stored as NULL.
+        """
+        if not value:
+            return None
+
+        threaded = _is_large(value)
+        if threaded:
+            data, digest = await asyncio.to_thread(_serialize, value, self.inline_max_bytes)
+        else:
+            data, digest = _serialize(value, self.inline_max_bytes)
+        if digest is None:
+            return data.decode('utf-8')
+
+        text = self._refs.get(digest)
+        if text is not None:
+            self._refs.move_to_end(digest)
+            return text
+
+        stored_size = await self._store(digest, data, threaded)
+        text = json.dumps({PAYLOAD_REF_KEY: digest, "size": len(data), "storedSize": stored_size})
+        self._refs[digest] = text
+        self._refs_bytes += len(text)
+        while self._refs_bytes > self.memo_max_bytes and self._refs:
+            _, evicted = self._refs.popitem(last=False)
+            self._refs_bytes -= len(evicted)
+        return text
+
+    async def _store(self, digest: str, data: bytes, threaded: bool) -> int:
+        """
+        Compress and write a payload; returns its compressed size. A hash that
+        is already stored only has its createdAt refreshed, so the garbage
+        collector's grace period starts again.
+        """
+        await self.ensure_schema()
+
+        if threaded:
+            compressed = await asyncio.to_thread(zlib.compress, data, 6)
+        else:
+            compressed = zlib.compress(data, 6)
+
+        # Queued in the same group commit as the log row that references it
+        await execution_log_sink.execute("""
+            INSERT INTO execution_payloads (hash, encoding, size, storedSize, data, createdAt)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET createdAt = excluded.createdAt
+        """, (digest, "zlib", len(data), len(compressed), compressed, datetime.utcnow().isoformat()))
+
+        return len(compressed)
+
+    async def collect_garbage(self, min_age_seconds: float) -> int:
+        """
+        Delete payloads older than `min_age_seconds` that no log or execution
+        row references; returns how many were deleted. Hashes memoized by this
+        process are kept, since they may be referenced again without being
+        stored again.
+        """
+        await self.ensure_schema()
+        await execution_log_sink.flush()
+        cutoff = (datetime.utcnow() - timedelta(seconds=min_age_seconds)).isoformat()
+
+        async with aiosqlite.connect(self.db_path) as db:
+            tables = {row[0] for row in await db.execute_fetchall("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            referenced: Set[str] = set(self._refs)
+            for table, column in _REFERENCING_COLUMNS:
+                if table not in tables:
+                    continue
+                cursor = await db.execute(f"SELECT {column} FROM {table} WHERE {column} LIKE '%$payloadRef%'")
+                async for (text,) in cursor:
+                    referenced.update(_REF_PATTERN.findall(text))
+
+            cursor = await db.execute("SELECT hash FROM execution_payloads WHERE createdAt < ?", (cutoff,))
+            doomed = [(digest,) async for (digest,) in cursor if digest not in referenced]
+            if doomed:
+                # Re-check the age: the hash may have been stored again since
+                await db.executemany("DELETE FROM execution_payloads WHERE hash = ? AND createdAt < ?", [
+                    (digest, cutoff) for (digest,) in doomed
+                ])
+                await db.commit()
+        return len(doomed)
+
+    async def run_collector(self, interval: float, min_age_seconds: float):
+        """Collect garbage every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                deleted = await self.collect_garbage(min_age_seconds)
+                if deleted:
+                    print(f"[PayloadStore] Deleted {deleted} unreferenced payloads")
+            except Exception as e:
+                print(f"[PayloadStore] Garbage collection failed: {e}")
+
+    @staticmethod
+    def parse_ref(text: Optional[str]) -> Optional[dict]:
+        """Return the reference dict if `text` is a payload reference"""
+        if not text or not text.startswith('{"' + PAYLOAD_REF_KEY):
+            return None
+        try:
+            value = json.loads(text)
+        except (TypeError, ValueError):
+            return None
+        if isinstance(value, dict) and isinstance(value.get(PAYLOAD_REF_KEY), str):
+            return value
+        return None
+
+    async def resolve_text(self, text: Optional[str]) -> Optional[str]:
+        """Return the original JSON text for an encoded column value"""
+        ref = self.parse_ref(text)
+        if ref is None:
+            return text
+
+        await execution_log_sink.flush()
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                "SELECT encoding, data FROM execution_payloads WHERE hash = ?",
+                (ref[PAYLOAD_REF_KEY],)
+            )
+            row = await cursor.fetchone()
+
+        if not row:
+            return None
+        encoding, data = row
+        if encoding == "zlib":
+            data = zlib.decompress(data)
+        return data.decode('utf-8')
+
+    async def resolve(self, text: Optional[str]) -> Any:
+        """Decode an encoded column value back into Python data"""
+        resolved = await self.resolve_text(text)
+        return json.loads(resolved) if resolved else None
+
+
+# Process-wide payload store
+payload_store = PayloadStore(inline_max_bytes=config.PAYLOAD_INLINE_MAX_BYTES)
@@ -0,0 +1,279 @@
+"""
+Warm interpreter pool for the python node
+
+Instead of writing a wrapper script and starting a fresh `python3` for every
+call, python nodes run in long-lived sandbox workers (sandbox_worker.py) that
+already imported the modules exposed to user code. Calls are exchanged as
+length-prefixed frames over the worker's stdin/stdout.
+
+Each call runs in a process the worker forks from its warmed state, so calls
+can't see what earlier calls did to modules or classes. Each worker serves at
+most PYTHON_SANDBOX_MAX_CALLS calls and is then replaced in the background by
+a freshly started one, so calls don't wait for the interpreter to start. A
+worker that doesn't answer in time, dies or belongs to a cancelled call is
+killed instead of being reused.
+
+Workers are asyncio subprocesses bound to the event loop that started them;
+the pool restarts its workers when it is used from another loop.
+"""
+import asyncio
+import json
+import os
+import signal
+import struct
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import config
+from sandbox_worker import decode_columns, encode_columns
+from tasks.columnar import RecordBatch, is_table
+
+WORKER_SCRIPT = str(Path(__file__).parent / "sandbox_worker.py")
+# Workers fork every call: keep native thread pools out of the warmed interpreter
+WORKER_ENV = {"OPENBLAS_NUM_THREADS": "1", "OMP_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+_FRAME_HEADER = struct.Struct(">I")
+
+
+class SandboxWorkerError(RuntimeError):
+    """The worker process died or broke the protocol"""
+
+
+class SandboxWorker:
+    """A running sandbox_worker.py process"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.calls = 0
+        self.reusable = True
+        self._stderr_tail = deque(maxlen=20)
+        self._stderr_reader = asyncio.create_task(self._read_stderr())
+
+    @classmethod
+    async def start(cls, memory_mb: int) -> "SandboxWorker":
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER_SCRIPT, str(memory_mb),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, **WORKER_ENV}
+        )
+        worker = cls(process)
+        try:
+            ready = json.loads(await worker._read_frame())
+            if not ready.get("ready"):
+                raise SandboxWorkerError(f"Unexpected handshake from sandbox worker: {ready}")
+        except BaseException:
+            await worker.kill()
+            raise
+        return worker
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def _read_stderr(self):
+        async for line in self.process.stderr:
+            self._stderr_tail.append(line.decode("utf-8", errors="replace").rstrip())
+
+    async def _read_frame(self) -> bytes:
+        try:
+            header = await self.process.stdout.readexactly(_FRAME_HEADER.size)
+            return await self.process.stdout.readexactly(_FRAME_HEADER.unpack(header)[0])
+        except asyncio.IncompleteReadError:
+            self.reusable = False
+            await self.process.wait()
+            stderr = "\n".join(self._stderr_tail)
+            raise SandboxWorkerError(
+                f"Sandbox worker exited unexpectedly (code {self.process.returncode})" + (f": {stderr}" if stderr else "")
+            )
+
+    async def call(self, request: Dict, payload: bytes) -> Tuple[Dict, bytes]:
+        """Send one request and wait for its (header, result) response"""
+        self.calls += 1
+        header = json.dumps(request).encode("utf-8")
+        self.process.stdin.write(_FRAME_HEADER.pack(len(header)) + header + _FRAME_HEADER.pack(len(payload)))
+        self.process.stdin.write(payload)
+        await self.process.stdin.drain()
+
+        response = json.loads(await self._read_frame())
+        result = await self._read_frame()
+        if response.get("recycle"):
+            self.reusable = False
+        return response, result
+
+    async def kill(self):
+        self.reusable = False
+        if self.alive:
+            self.process.kill()
+        await self.process.wait()
+        self._stderr_reader.cancel()
+
+    async def close(self):
+        """Let the worker exit on end of input (killed if it doesn't)"""
+        self.reusable = False
+        if self.alive:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+        await self.kill()
+
+
+class SandboxPool:
+    """Bounded pool of warm sandbox workers"""
+
+    def __init__(self, size: int = 2, max_calls: int = 100, timeout: float = 30, memory_mb: int = 1024):
+        self.size = max(size, 1)
+        self.max_calls = max(max_calls, 1)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: List[SandboxWorker] = []
+        self._background: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.started = 0
+        self.recycled = 0
+
+    def _bind(self):
+        """Attach the pool to the running loop, dropping workers started on another one"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        for worker in self._idle:
+            try:
+                os.kill(worker.process.pid, signal.SIGTERM)
+            except OSError:
+                pass
+        self._idle = []
+        self._background = set()
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self.size)
+
+    def _in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _start_worker(self) -> SandboxWorker:
+        worker = await SandboxWorker.start(self.memory_mb)
+        self.started += 1
+        return worker
+
+    async def _replenish(self):
+        """Start a spare worker so the next call doesn't wait for an interpreter"""
+        if len(self._idle) >= self.size:
+            return
+        try:
+            worker = await self._start_worker()
+        except Exception as e:
+            print(f"[SandboxPool] Failed to start a sandbox worker: {e}")
+            return
+        if len(self._idle) < self.size:
+            self._idle.append(worker)
+        else:
+            await worker.close()
+
+    async def warm_up(self):
+        """Start the idle workers up front"""
+        self._bind()
+        await asyncio.gather(*[self._replenish() for _ in range(self.size - len(self._idle))])
+        print(f"[SandboxPool] Started ({len(self._idle)} workers, {self.max_calls} calls each)")
+
+    async def _checkout(self) -> SandboxWorker:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+        return await self._start_worker()
+
+    def _checkin(self, worker: SandboxWorker):
+        if worker.reusable and worker.alive and worker.calls < self.max_calls:
+            self._idle.append(worker)
+            return
+        self.recycled += 1
+        self._in_background(worker.close())
+        self._in_background(self._replenish())
+
+    async def run(
+        self,
+        code: str,
+        input_data: Any,
+        timeout: Optional[float] = None,
+        data_mode: str = "records"
+    ) -> Dict:
+        """
+        Run user code's process(input_data) in a sandbox worker
+
+        With data_mode 'dataframe' or 'arrays', record lists are sent
+        column by column and reach the user code as a DataFrame or a dict
+        of NumPy arrays. Tabular results come back as a RecordBatch.
+
+        Returns {'result', 'stdout'} or {'error', 'traceback', 'stdout'} for
+        errors in the user code. Raises asyncio.TimeoutError when the worker
+        doesn't answer in time and SandboxWorkerError when it dies.
+        """
+        self._bind()
+        timeout = timeout or self.timeout
+        request = {"code": code, "timeout": timeout, "dataMode": data_mode, "inputFormat": "json"}
+        if data_mode != "records" and isinstance(input_data, list) and input_data and is_table(input_data):
+            batch = RecordBatch.from_records(input_data)
+            payload = encode_columns(
+                batch.columns,
+                len(batch),
+                {name: ~mask for name, mask in batch.present.items()}
+            )
+            request["inputFormat"] = "columnar"
+        else:
+            payload = json.dumps(input_data).encode("utf-8")
+
+        async with self._slots:
+            worker = await self._checkout()
+            self.calls += 1
+            try:
+                # The worker enforces the timeout itself; the margin covers code
+                # stuck where its alarm can't interrupt
+                response, result = await asyncio.wait_for(
+                    worker.call(request, payload),
+                    timeout=timeout + 5
+                )
+            except BaseException:
+                # Timed out, cancelled or broken: the worker's state is unknown
+                await asyncio.shield(worker.kill())
+                self._checkin(worker)
+                raise
+            self._checkin(worker)
+
+        if "error" in response:
+            return response
+        if response.get("resultFormat") == "columnar":
+            return {"result": RecordBatch(*decode_columns(result)), "stdout": response.get("stdout", "")}
+        return {"result": json.loads(result), "stdout": response.get("stdout", "")}
+
+    async def shutdown(self):
+        """Stop all idle workers"""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*[worker.close() for worker in idle], return_exceptions=True)
+        print(f"[SandboxPool] Stopped ({self.calls} calls, {self.started} workers started, {self.recycled} recycled)")
+
+    def stats(self) -> Dict:
+        return {
+            "idle": len(self._idle),
+            "calls": self.calls,
+            "started": self.started,
+            "recycled": self.recycled
+        }
+
+
+# Process-wide python node sandbox pool
+sandbox_pool = SandboxPool(
+    size=config.PYTHON_SANDBOX_WORKERS,
+    max_calls=config.PYTHON_SANDBOX_MAX_CALLS,
+    timeout=config.PYTHON_SANDBOX_TIMEOUT,
+    memory_mb=config.PYTHON_SANDBOX_MEMORY_MB
+)
@@ -0,0 +1,631 @@
+"""
+Python node sandbox worker
+
+Long-lived interpreter started by sandbox_pool.py. It imports the modules
+exposed to user code once, then serves calls over stdin/stdout using
+length-prefixed frames (4-byte big-endian length + payload):
+
+    request:  header frame (JSON: code, timeout, dataMode, inputFormat) + input frame
+    response: header frame (JSON: error, traceback, stdout, recycle, resultFormat) + result frame
+
+Input and result frames are JSON, or a columnar encoding (see encode_columns)
+for tables: with `dataMode` 'dataframe' or 'arrays', record lists reach
+process() as a pandas DataFrame or a dict of NumPy arrays, and DataFrame /
+Series / dict-of-array results travel back column by column instead of as
+JSON records.
+
+Every call runs in a child forked from the warmed worker, which never runs
+user code itself: whatever a call does to modules or classes (e.g. patching
+`pd.DataFrame.sum`) dies with its child, and the next call starts from the
+same pristine state. The child's response is read by the worker, which checks
+it and passes it on; a child that crashes or overruns its timeout is killed
+and reported as an error. Where fork() isn't available (Windows) the worker
+runs one call itself and then exits, so the pool starts a fresh one.
+
+User code runs with the same restricted builtins as the original one-shot
+sandbox, in a fresh namespace per call. The exposed modules are wrapped in
+read-only proxies that only expose an allowlist of numpy/pandas names, and
+pandas writers can only return strings. As user code can still reach other
+objects through the object graph, the process running a call also gets an
+audit hook that refuses writing files, starting processes, sockets and native
+code (see isolate_call). `print` output is captured and returned in the
+response header; nothing else may write to the protocol stream.
+
+Usage: python sandbox_worker.py <memory limit in MB, 0 = unlimited>
+"""
+import collections
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import math
+import os
+import re
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+import types
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+_FRAME_HEADER = struct.Struct(">I")
+_CODE_CACHE_SIZE = 64
+# How long past its own timeout a forked call may take before it's killed
+_CALL_MARGIN = 2
+
+SAFE_BUILTINS = {
+    'abs': abs, 'all': all, 'any': any, 'bool': bool, 'dict': dict,
+    'enumerate': enumerate, 'filter': filter, 'float': float, 'int': int,
+    'isinstance': isinstance, 'len': len, 'list': list, 'map': map,
+    'max': max, 'min': min, 'range': range, 'reversed': reversed,
+    'round': round, 'set': set, 'sorted': sorted, 'str': str, 'sum': sum,
+    'tuple': tuple, 'type': type, 'zip': zip,
+}
+
+
+class ReadOnlyModule:
+    """
+    Attribute-level read-only view of a module (submodules are wrapped too).
+    Private names are never exposed; with `allowed`, only those names are.
+    """
+
+    __slots__ = ("_module", "_allowed")
+
+    def __init__(self, module: types.ModuleType, allowed: frozenset = None):
+        object.__setattr__(self, "_module", module)
+        object.__setattr__(self, "_allowed", allowed)
+
+    def __getattr__(self, name):
+        module = object.__getattribute__(self, "_module")
+        allowed = object.__getattribute__(self, "_allowed")
+        if name.startswith("_") or (allowed is not None and name not in allowed):
+            raise AttributeError(f"'{module.__name__}.{name}' is not available in the sandbox")
+        value = getattr(module, name)
+        return ReadOnlyModule(value) if isinstance(value, types.ModuleType) else value
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"module '{object.__getattribute__(self, '_module').__name__}' is read-only")
+
+    def __delattr__(self, name):
+        self.__setattr__(name, None)
+
+    def __dir__(self):
+        allowed = object.__getattribute__(self, "_allowed")
+        return [
+            name for name in dir(object.__getattribute__(self, "_module"))
+            if not name.startswith("_") and (allowed is None or name in allowed)
+        ]
+
+    def __repr__(self):
+        return f"<read-only module '{object.__getattribute__(self, '_module').__name__}'>"
+
+
+SANDBOX_MODULES = {
+    name: ReadOnlyModule(module)
+    for name, module in {
+        'json': json,
+        'math': math,
+        're': re,
+        'datetime': datetime,
+        'collections': collections,
+        'itertools': itertools,
+    }.items()
+}
+
+# What user code may use of numpy/pandas: array and table operations, no file,
+# pickle or native-library entry points (nor internals such as `pd.core`)
+NUMPY_ALLOWED = frozenset({
+    # Creation and shape
+    'array', 'asarray', 'arange', 'linspace', 'logspace', 'zeros', 'ones', 'empty', 'full',
+    'zeros_like', 'ones_like', 'empty_like', 'full_like', 'eye', 'identity', 'meshgrid', 'indices',
+    'concatenate', 'stack', 'vstack', 'hstack', 'column_stack', 'split', 'array_split', 'reshape',
+    'ravel', 'transpose', 'swapaxes', 'moveaxis', 'squeeze', 'expand_dims', 'flip', 'roll', 'tile',
+    'repeat', 'append', 'insert', 'delete', 'atleast_1d', 'atleast_2d', 'broadcast_to',
+    'broadcast_arrays', 'ndenumerate', 'ndindex',
+    # Selection and sorting
+    'where', 'select', 'choose', 'clip', 'unique', 'sort', 'argsort', 'lexsort', 'searchsorted',
+    'argmax', 'argmin', 'argwhere', 'nonzero', 'count_nonzero', 'isin', 'intersect1d', 'union1d',
+    'setdiff1d', 'piecewise', 'vectorize', 'apply_along_axis',
+    # Statistics
+    'sum', 'prod', 'cumsum', 'cumprod', 'diff', 'gradient', 'mean', 'median', 'average', 'std',
+    'var', 'min', 'max', 'amin', 'amax', 'ptp', 'percentile', 'quantile', 'nansum', 'nanprod',
+    'nancumsum', 'nanmean', 'nanmedian', 'nanstd', 'nanvar', 'nanmin', 'nanmax', 'nanargmin',
+    'nanargmax', 'nanpercentile', 'nanquantile', 'histogram', 'histogram2d', 'bincount', 'digitize',
+    'corrcoef', 'cov', 'convolve', 'correlate', 'interp', 'polyfit', 'polyval', 'trapezoid', 'trapz',
+    # Element-wise math and logic
+    'abs', 'absolute', 'sign', 'sqrt', 'cbrt', 'square', 'power', 'exp', 'expm1', 'log', 'log10',
+    'log2', 'log1p', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'arctan2', 'sinh', 'cosh',
+    'tanh', 'hypot', 'degrees', 'radians', 'deg2rad', 'rad2deg', 'floor', 'ceil', 'round', 'around',
+    'rint', 'trunc', 'mod', 'remainder', 'fmod', 'divmod', 'floor_divide', 'add', 'subtract',
+    'multiply', 'divide', 'true_divide', 'maximum', 'minimum', 'fmax', 'fmin', 'dot', 'matmul',
+    'inner', 'outer', 'cross', 'einsum', 'tensordot', 'isnan', 'isinf', 'isfinite', 'isclose',
+    'allclose', 'array_equal', 'nan_to_num', 'logical_and', 'logical_or', 'logical_not',
+    'logical_xor', 'all', 'any',
+    # Types and constants
+    'dtype', 'ndarray', 'generic', 'number', 'integer', 'floating', 'bool_', 'int8', 'int16',
+    'int32', 'int64', 'uint8', 'uint16', 'uint32', 'uint64', 'float16', 'float32', 'float64',
+    'complex128', 'str_', 'object_', 'datetime64', 'timedelta64', 'datetime_as_string',
+    'busday_count', 'is_busday', 'finfo', 'iinfo', 'result_type', 'promote_types', 'can_cast',
+    'issubdtype', 'errstate', 'nan', 'inf', 'pi', 'e', 'newaxis',
+    # Submodules
+    'linalg', 'random', 'fft', 'polynomial',
+})
+PANDAS_ALLOWED = frozenset({
+    'DataFrame', 'Series', 'Index', 'MultiIndex', 'RangeIndex', 'DatetimeIndex', 'TimedeltaIndex',
+    'PeriodIndex', 'CategoricalIndex', 'IntervalIndex', 'Categorical', 'Interval', 'Period',
+    'Timestamp', 'Timedelta', 'DateOffset', 'NaT', 'NA', 'NamedAgg', 'Grouper', 'IndexSlice',
+    'CategoricalDtype', 'DatetimeTZDtype', 'StringDtype', 'BooleanDtype', 'Int8Dtype', 'Int16Dtype',
+    'Int32Dtype', 'Int64Dtype', 'UInt8Dtype', 'UInt16Dtype', 'UInt32Dtype', 'UInt64Dtype',
+    'Float32Dtype', 'Float64Dtype',
+    'concat', 'merge', 'merge_asof', 'merge_ordered', 'pivot', 'pivot_table', 'crosstab', 'melt',
+    'wide_to_long', 'get_dummies', 'from_dummies', 'cut', 'qcut', 'factorize', 'unique', 'isna',
+    'isnull', 'notna', 'notnull', 'to_datetime', 'to_numeric', 'to_timedelta', 'date_range',
+    'bdate_range', 'period_range', 'timedelta_range', 'interval_range', 'infer_freq', 'array',
+    'json_normalize', 'offsets', 'get_option', 'option_context',
+})
+if np is not None:
+    SANDBOX_MODULES['np'] = SANDBOX_MODULES['numpy'] = ReadOnlyModule(np, NUMPY_ALLOWED)
+if pd is not None:
+    SANDBOX_MODULES['pd'] = SANDBOX_MODULES['pandas'] = ReadOnlyModule(pd, PANDAS_ALLOWED)
+
+
+def _disable_file_output():
+    """
+    pandas writers may only return strings, never write files. They are
+    patched where they're defined (NDFrame and its subclasses, Styler), so
+    reaching them through the class hierarchy doesn't get around it.
+    """
+    from pandas.core.generic import NDFrame
+
+    def blocked(name):
+        def method(self, *args, **kwargs):
+            raise PermissionError(f"{name}() is not available in the sandbox")
+        return method
+
+    def string_only(name, original):
+        def method(self, *args, **kwargs):
+            target = args[0] if args else next(
+                (kwargs[key] for key in ("path_or_buf", "path_or_buffer", "buf") if key in kwargs), None
+            )
+            if target is not None:
+                raise PermissionError(f"{name}() can only return a string in the sandbox")
+            return original(self, *args, **kwargs)
+        return method
+
+    classes = [NDFrame, pd.DataFrame, pd.Series]
+    try:
+        from pandas.io.formats.style import Styler
+        classes.append(Styler)
+    except ImportError:  # jinja2 isn't installed
+        pass
+
+    for cls in classes:
+        for name in ("to_pickle", "to_parquet", "to_excel", "to_hdf", "to_feather", "to_sql",
+                     "to_stata", "to_orc", "to_clipboard"):
+            if name in cls.__dict__:
+                setattr(cls, name, blocked(name))
+        for name in ("to_csv", "to_json", "to_html", "to_latex", "to_markdown", "to_string", "to_xml"):
+            if name in cls.__dict__:
+                setattr(cls, name, string_only(name, cls.__dict__[name]))
+
+
+# What a forked call may not do, whatever it reaches through the object graph.
+# Reading files stays allowed: numpy/pandas import modules and load time zones lazily.
+_DENIED_EVENTS = frozenset({
+    'os.system', 'os.exec', 'os.spawn', 'os.posix_spawn', 'os.fork', 'os.forkpty', 'os.kill',
+    'os.killpg', 'signal.pthread_kill', 'os.remove', 'os.rename', 'os.rmdir', 'os.mkdir',
+    'os.truncate', 'os.chmod', 'os.chown', 'os.chflags', 'os.lchflags', 'os.link', 'os.symlink',
+    'os.utime', 'os.setxattr', 'os.removexattr', 'os.putenv', 'os.unsetenv', 'os.chdir',
+    'os.startfile', 'pty.spawn', 'resource.setrlimit', 'resource.prlimit',
+})
+_DENIED_EVENT_PREFIXES = ('socket.', 'subprocess.', 'shutil.', 'ctypes.', 'sqlite3.', 'winreg.', '_winapi.')
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+
+
+def _deny_side_effects(event: str, args: tuple):
+    """Audit hook of a call: no writing files, processes, sockets or native code"""
+    if event == "open":
+        path, mode, flags = args
+        if (mode and any(char in mode for char in "wax+")) or (flags or 0) & _WRITE_FLAGS:
+            raise PermissionError(f"Writing files is not available in the sandbox ({path})")
+    elif event in _DENIED_EVENTS or event.startswith(_DENIED_EVENT_PREFIXES):
+        raise PermissionError(f"'{event}' is not available in the sandbox")
+
+
+def isolate_call():
+    """
+    Lock down the process that runs a call, for good: audit hooks can't be
+    removed. Where the OS allows, files can't grow either and (for non-root
+    users) no process can be started.
+    """
+    if resource is not None:
+        if hasattr(signal, "SIGXFSZ"):
+            # Writing a file fails instead of killing the call
+            signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+        resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    sys.addaudithook(_deny_side_effects)
+
+
+# ==================== Columnar encoding ====================
+#
+# header length (4 bytes) + JSON header {length, columns: [{name, dtype, size, nulls}]}
+# followed by each column's data and packed null mask. Bool/int/float columns
+# are raw little-endian buffers (`dtype` is the NumPy type string); other
+# columns are a JSON list (`dtype` "json"). Nulls (missing keys, None, NaN, NaT)
+# are a bit mask for buffer columns and JSON nulls otherwise.
+
+
+def _json_default(value):
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    if np is not None and isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _is_null(value) -> bool:
+    if isinstance(value, float):
+        return value != value
+    return pd is not None and (value is pd.NA or value is pd.NaT)
+
+
+def _json_values(array, null_mask) -> list:
+    if array.dtype.kind == "M":
+        values = np.datetime_as_string(array, unit="auto").tolist()
+        null_mask = np.isnat(array) if null_mask is None else null_mask | np.isnat(array)
+    else:
+        values = [None if _is_null(value) else value for value in array.tolist()]
+    if null_mask is not None:
+        values = [None if null else value for value, null in zip(values, null_mask.tolist())]
+    return values
+
+
+def encode_columns(columns: dict, length: int, nulls: dict = None) -> bytes:
+    """Encode a dict of equal-length 1-D arrays (`nulls`: name -> bool mask of null rows)"""
+    specs = []
+    buffers = []
+    for name, array in columns.items():
+        array = np.asarray(array)
+        null_mask = (nulls or {}).get(name)
+        kind = array.dtype.kind
+        if kind == "f" and np.isnan(array).any():
+            null_mask = np.isnan(array) if null_mask is None else null_mask | np.isnan(array)
+
+        if kind in "biuf":
+            data = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<")).tobytes()
+            dtype = array.dtype.newbyteorder("<").str
+            null_bytes = np.packbits(null_mask).tobytes() if null_mask is not None and null_mask.any() else b""
+        else:
+            data = json.dumps(_json_values(array, null_mask), default=_json_default).encode("utf-8")
+            dtype = "json"
+            null_bytes = b""
+
+        specs.append({"name": str(name), "dtype": dtype, "size": len(data), "nulls": len(null_bytes)})
+        buffers += [data, null_bytes]
+
+    header = json.dumps({"length": length, "columns": specs}).encode("utf-8")
+    return b"".join([_FRAME_HEADER.pack(len(header)), header, *buffers])
+
+
+def decode_columns(data: bytes, nan_nulls: bool = False):
+    """
+    Decode encode_columns() output into (dict of arrays, length). Null rows
+    become None in an object array, or NaN in a float array for numeric
+    columns with `nan_nulls` (what pandas expects).
+    """
+    (header_size,) = _FRAME_HEADER.unpack_from(data)
+    offset = _FRAME_HEADER.size + header_size
+    header = json.loads(data[_FRAME_HEADER.size:offset])
+    length = header["length"]
+
+    columns = {}
+    for spec in header["columns"]:
+        raw = data[offset:offset + spec["size"]]
+        offset += spec["size"]
+        if spec["dtype"] == "json":
+            array = np.empty(length, dtype=object)
+            array[:] = json.loads(raw)
+        else:
+            array = np.frombuffer(raw, dtype=np.dtype(spec["dtype"])).copy()
+
+        if spec["nulls"]:
+            null_mask = np.unpackbits(
+                np.frombuffer(data[offset:offset + spec["nulls"]], dtype=np.uint8), count=length
+            ).astype(bool)
+            offset += spec["nulls"]
+            if nan_nulls and array.dtype.kind in "iuf":
+                array = array.astype(np.float64)
+                array[null_mask] = np.nan
+            else:
+                array = array.astype(object)
+                array[null_mask] = None
+
+        columns[spec["name"]] = array
+    return columns, length
+
+
+def _decode_input(request: dict, payload: bytes):
+    """process() argument for the request's dataMode"""
+    data_mode = request.get("dataMode") or "records"
+    if data_mode == "dataframe" and pd is None:
+        raise RuntimeError("dataMode 'dataframe' requires pandas, which is not installed")
+
+    if request.get("inputFormat") == "columnar":
+        columns, length = decode_columns(payload, nan_nulls=data_mode == "dataframe")
+        if data_mode == "dataframe":
+            return pd.DataFrame(columns, index=pd.RangeIndex(length), copy=False)
+        return columns
+
+    input_data = json.loads(payload)
+    if data_mode == "dataframe" and isinstance(input_data, list):
+        return pd.DataFrame(input_data)
+    if data_mode == "arrays" and input_data == []:
+        return {}
+    return input_data
+
+
+def _result_columns(result):
+    """(columns, length) of a tabular result (DataFrame, Series, dict of arrays), else None"""
+    if pd is not None and isinstance(result, pd.Series):
+        result = result.to_frame(result.name if result.name is not None else "value")
+    if pd is not None and isinstance(result, pd.DataFrame):
+        # Named index levels (e.g. groupby keys) become columns; positional indexes are dropped
+        result = result.reset_index(drop=all(name is None for name in result.index.names))
+        return {str(name): result[name].to_numpy() for name in result.columns}, len(result)
+
+    if np is not None and isinstance(result, dict) and result and all(
+        isinstance(value, np.ndarray) and value.ndim == 1 for value in result.values()
+    ):
+        lengths = {len(value) for value in result.values()}
+        if len(lengths) == 1:
+            return {str(name): value for name, value in result.items()}, lengths.pop()
+    return None
+
+
+def _encode_result(result):
+    """(resultFormat, result frame)"""
+    tabular = _result_columns(result) if np is not None else None
+    if tabular is not None:
+        return "columnar", encode_columns(*tabular)
+    return "json", json.dumps(result, default=_json_default if np is not None else None).encode("utf-8")
+
+
+def read_frame(stream) -> bytes:
+    """Read one frame; None at end of input"""
+    header = stream.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    (length,) = _FRAME_HEADER.unpack(header)
+    data = stream.read(length)
+    if len(data) < length:
+        return None
+    return data
+
+
+def write_frames(stream, *frames: bytes):
+    for frame in frames:
+        stream.write(_FRAME_HEADER.pack(len(frame)))
+        stream.write(frame)
+    stream.flush()
+
+
+def limit_memory(memory_mb: int):
+    """Cap the address space at what the preloaded interpreter uses plus memory_mb"""
+    if resource is None or memory_mb <= 0:
+        return
+    try:
+        with open("/proc/self/statm") as statm:
+            current = int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        current = 0
+    limit = current + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class CallTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise CallTimeout()
+
+
+_code_cache = collections.OrderedDict()
+
+
+def compile_user_code(code: str):
+    """Compiled code object, cached by the hash of the source"""
+    key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+    compiled = _code_cache.get(key)
+    if compiled is None:
+        compiled = compile(code, "<python node>", "exec")
+        _code_cache[key] = compiled
+        if len(_code_cache) > _CODE_CACHE_SIZE:
+            _code_cache.popitem(last=False)
+    else:
+        _code_cache.move_to_end(key)
+    return compiled
+
+
+def run_call(request: dict, payload: bytes):
+    """Run one call; returns (response header, result frame)"""
+    timeout = request.get("timeout") or 0
+    output = io.StringIO()
+
+    def captured_print(*args, sep=" ", end="\n", **kwargs):
+        output.write(sep.join(str(arg) for arg in args) + end)
+
+    namespace = {
+        '__builtins__': {**SAFE_BUILTINS, 'print': captured_print},
+        '__name__': '__sandbox__',
+        **SANDBOX_MODULES,
+    }
+
+    if hasattr(signal, 'alarm') and timeout:
+        signal.alarm(max(int(math.ceil(timeout)), 1))
+    try:
+        exec(compile_user_code(request["code"]), namespace)
+
+        input_data = _decode_input(request, payload)
+
+        # Execute user function (must be named 'process')
+        if 'process' not in namespace:
+            return {"error": "Function 'process(data)' not found. Please define: def process(data): ..."}, b""
+
+        result_format, result = _encode_result(namespace['process'](input_data))
+        return {"stdout": output.getvalue(), "resultFormat": result_format}, result
+
+    except CallTimeout:
+        return {"error": f"Execution timed out ({timeout:g}s limit)", "recycle": True}, b""
+    except MemoryError:
+        return {"error": "Memory limit exceeded", "recycle": True}, b""
+    except Exception as e:
+        return {"error": f"Runtime Error: {str(e)}", "traceback": traceback.format_exc(), "stdout": output.getvalue()}, b""
+    finally:
+        if hasattr(signal, 'alarm'):
+            signal.alarm(0)
+
+
+def _run_child(request: dict, payload: bytes, write_fd: int, memory_mb: int):
+    """Forked call: run it and write the response frames to write_fd"""
+    # The pool's protocol pipes are the worker's, not the call's
+    os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+    os.dup2(2, 1)
+    with os.fdopen(write_fd, "wb") as responses:
+        limit_memory(memory_mb)
+        isolate_call()
+        response, result = run_call(request, payload)
+        write_frames(responses, json.dumps(response).encode("utf-8"), result)
+
+
+def _parse_response(data: bytes):
+    """(response header, result frame) written by a forked call, None if it's incomplete"""
+    frames = []
+    offset = 0
+    while offset + _FRAME_HEADER.size <= len(data) and len(frames) < 2:
+        (length,) = _FRAME_HEADER.unpack_from(data, offset)
+        offset += _FRAME_HEADER.size
+        frames.append(data[offset:offset + length])
+        offset += length
+    if len(frames) < 2 or offset != len(data):
+        return None
+    try:
+        response = json.loads(frames[0])
+    except ValueError:
+        return None
+    return (response, frames[1]) if isinstance(response, dict) else None
+
+
+def fork_call(request: dict, payload: bytes, memory_mb: int = 0):
+    """Run one call in a forked child; returns (response header, result frame)"""
+    timeout = request.get("timeout") or 0
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            _run_child(request, payload, write_fd, memory_mb)
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    deadline = time.monotonic() + timeout + _CALL_MARGIN if timeout else None
+    chunks = []
+    timed_out = False
+    with os.fdopen(read_fd, "rb", buffering=0) as output:
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+                break
+            if not select.select([output], [], [], remaining)[0]:
+                continue
+            chunk = output.read(1 << 20)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    _, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {"error": f"Execution timed out ({timeout:g}s limit)"}, b""
+    parsed = _parse_response(b"".join(chunks))
+    if parsed is None:
+        return {"error": f"Sandbox call exited unexpectedly (code {os.waitstatus_to_exitcode(status)})"}, b""
+    response, result = parsed
+    # Whatever the call did died with its child: this worker is still pristine
+    response.pop("recycle", None)
+    return response, result
+
+
+def main():
+    memory_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    forked = hasattr(os, "fork")
+
+    # Frames go to the real stdout; stray writes (from C extensions, etc.) go to stderr
+    requests = sys.stdin.buffer
+    responses = sys.stdout.buffer
+    sys.stdout = sys.stderr
+
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _on_alarm)
+    if pd is not None:
+        _disable_file_output()
+    if not forked:
+        limit_memory(memory_mb)
+
+    write_frames(responses, json.dumps({"ready": True, "pid": os.getpid()}).encode("utf-8"))
+
+    while True:
+        header = read_frame(requests)
+        payload = read_frame(requests) if header is not None else None
+        if payload is None:
+            return
+
+        request = json.loads(header)
+        if forked:
+            try:
+                # Compiled here so the code cache outlives the call; errors are reported by the call
+                compile_user_code(request["code"])
+            except (SyntaxError, ValueError):
+                pass
+            response, result = fork_call(request, payload, memory_mb)
+        else:
+            isolate_call()
+            response, result = run_call(request, payload)
+            # The call ran in this interpreter, which is no longer pristine
+            response["recycle"] = True
+        try:
+            write_frames(responses, json.dumps(response).encode("utf-8"), result)
+        except BrokenPipeError:
+            return
+        if response.get("recycle"):
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Columnar record batches
+
+A RecordBatch stores a table as one NumPy array per column instead of a list
+of dicts: keys are kept once per column and numeric/boolean values unboxed.
+Streamed records (tasks/record_stream.py) travel between row-wise nodes as
+RecordBatch chunks, which condition, addField, splitColumns, join and
+timeSeriesAggregator process column-wise. Batches are converted back to
+list-of-dicts only when a handler without a columnar path or the API needs
+them (`to_records()`).
+
+Records don't need identical keys: a column has a presence mask marking the
+rows that had the key, so converting back reproduces the original records.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Marks a key that is absent from a record
+MISSING = object()
+
+
+def _to_array(values: List[Any]) -> np.ndarray:
+    """
+    Build a column array. Only homogeneous bool/int/float columns get a
+    native dtype, so values convert back to exactly the same Python types.
+    """
+    kinds = set(map(type, values))
+    try:
+        if kinds == {bool}:
+            return np.array(values, dtype=bool)
+        if kinds == {int}:
+            return np.array(values, dtype=np.int64)
+        if kinds == {float}:
+            return np.array(values, dtype=np.float64)
+    except OverflowError:
+        pass
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _full(value: Any, length: int) -> np.ndarray:
+    """Column repeating one value"""
+    if type(value) in (bool, int, float):
+        try:
+            return np.full(length, value)
+        except OverflowError:
+            pass
+    array = np.empty(length, dtype=object)
+    array.fill(value)
+    return array
+
+
+def _column(values: List[Any]) -> tuple:
+    """(array, presence mask or None) for values that may contain MISSING"""
+    if not any(value is MISSING for value in values):
+        return _to_array(values), None
+
+    mask = np.fromiter((value is not MISSING for value in values), dtype=bool, count=len(values))
+    present = [value for value in values if value is not MISSING]
+    array = _to_array(present)
+    if array.dtype == object:
+        full = np.empty(len(values), dtype=object)
+    else:
+        full = np.zeros(len(values), dtype=array.dtype)
+    full[mask] = array
+    return full, mask
+
+
+class RecordBatch:
+    """Immutable table of NumPy columns; operations return new batches sharing unchanged columns"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], length: int, present: Optional[Dict[str, np.ndarray]] = None):
+        self.columns = columns
+        self.length = length
+        # column -> bool mask of rows that have the key (columns without a mask are complete)
+        self.present = present or {}
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> "RecordBatch":
+        """Build a batch from a list of dicts"""
+        names = {}
+        for record in records:
+            for name in record:
+                names[name] = None
+
+        return cls.from_values({
+            name: [record.get(name, MISSING) for record in records]
+            for name in names
+        }, len(records))
+
+    @classmethod
+    def from_values(cls, values_by_name: Dict[str, List[Any]], length: int) -> "RecordBatch":
+        """Build a batch from per-column value lists (MISSING marks absent keys)"""
+        columns = {}
+        present = {}
+        for name, values in values_by_name.items():
+            columns[name], mask = _column(values)
+            if mask is not None:
+                present[name] = mask
+        return cls(columns, length, present)
+
+    @classmethod
+    def concat(cls, batches: Sequence["RecordBatch"]) -> "RecordBatch":
+        """Stack batches vertically"""
+        if len(batches) == 1:
+            return batches[0]
+
+        names = {}
+        for batch in batches:
+            for name in batch.columns:
+                names[name] = None
+
+        columns = {}
+        present = {}
+        for name in names:
+            parts = [batch.columns.get(name) for batch in batches]
+            dtypes = {part.dtype for part in parts if part is not None}
+            complete = all(part is not None for part in parts)
+
+            if complete and len(dtypes) == 1:
+                columns[name] = np.concatenate(parts)
+            else:
+                # Mixed types or missing in some batches: fall back to Python objects
+                columns[name] = np.concatenate([
+                    part.astype(object) if part is not None else np.full(len(batch), None, dtype=object)
+                    for part, batch in zip(parts, batches)
+                ])
+
+            if not complete or any(name in batch.present for batch in batches):
+                present[name] = np.concatenate([
+                    np.zeros(len(batch), dtype=bool) if part is None
+                    else batch.present.get(name, np.ones(len(batch), dtype=bool))
+                    for part, batch in zip(parts, batches)
+                ])
+
+        return cls(columns, sum(len(batch) for batch in batches), present)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def values(self, name: str, missing: Any = None) -> List[Any]:
+        """Python values of a column (`missing` for rows without the key)"""
+        column = self.columns.get(name)
+        if column is None:
+            return [missing] * self.length
+        values = column.tolist()
+        mask = self.present.get(name)
+        if mask is not None:
+            values = [value if has else missing for value, has in zip(values, mask.tolist())]
+        return values
+
+    def numeric(self, name: str) -> np.ndarray:
+        """float64 values of the rows that have the key (raises ValueError for non-numeric values)"""
+        column = self.columns.get(name)
+        if column is None:
+            return np.empty(0, dtype=np.float64)
+        mask = self.present.get(name)
+        if mask is not None:
+            column = column[mask]
+        if column.dtype == object:
+            return np.array([float(value) for value in column], dtype=np.float64)
+        return column.astype(np.float64)
+
+    def row(self, index: int) -> Dict:
+        """A single record"""
+        return {
+            name: column[index].item() if column.dtype != object else column[index]
+            for name, column in self.columns.items()
+            if name not in self.present or self.present[name][index]
+        }
+
+    def to_records(self) -> List[Dict]:
+        """Convert back to a list of dicts"""
+        names = list(self.columns)
+        if not names:
+            return [{} for _ in range(self.length)]
+
+        columns = [self.columns[name].tolist() for name in names]
+        if not self.present:
+            return [dict(zip(names, row)) for row in zip(*columns)]
+
+        masks = [self.present[name].tolist() if name in self.present else None for name in names]
+        records = []
+        for index, row in enumerate(zip(*columns)):
+            records.append({
+                name: value
+                for name, value, mask in zip(names, row, masks)
+                if mask is None or mask[index]
+            })
+        return records
+
+    def take(self, selector: np.ndarray) -> "RecordBatch":
+        """Rows selected by a boolean mask or an index array"""
+        columns = {name: column[selector] for name, column in self.columns.items()}
+        present = {name: mask[selector] for name, mask in self.present.items()}
+        length = int(np.count_nonzero(selector)) if selector.dtype == bool else len(selector)
+        return RecordBatch(columns, length, present)
+
+    def slice(self, start: int, stop: int) -> "RecordBatch":
+        """Rows start..stop (views, nothing is copied)"""
+        stop = min(stop, self.length)
+        columns = {name: column[start:stop] for name, column in self.columns.items()}
+        present = {name: mask[start:stop] for name, mask in self.present.items()}
+        return RecordBatch(columns, max(stop - start, 0), present)
+
+    def select(self, names: Iterable[str]) -> "RecordBatch":
+        """Subset of the columns, in the given order (columns are shared, not copied)"""
+        names = [name for name in names if name in self.columns]
+        return RecordBatch(
+            {name: self.columns[name] for name in names},
+            self.length,
+            {name: self.present[name] for name in names if name in self.present}
+        )
+
+    def with_column(self, name: str, value: Any) -> "RecordBatch":
+        """Set a column to the same value on every row"""
+        columns = dict(self.columns)
+        columns[name] = _full(value, self.length)
+        present = {key: mask for key, mask in self.present.items() if key != name}
+        return RecordBatch(columns, self.length, present)
+
+    def with_values(self, name: str, values: List[Any]) -> "RecordBatch":
+        """Set a column from per-row values (MISSING leaves the row without the key)"""
+        columns = dict(self.columns)
+        present = {key: mask for key, mask in self.present.items() if key != name}
+        columns[name], mask = _column(values)
+        if mask is not None:
+            present[name] = mask
+        return RecordBatch(columns, self.length, present)
+
+    def describe(self, sample_rows: int = 0) -> Dict:
+        """JSON-safe summary used in logs: row count, columns and the first `sample_rows` records"""
+        summary = {"$recordBatch": True, "rowCount": self.length, "columns": self.column_names}
+        if sample_rows > 0:
+            summary["sample"] = self.slice(0, sample_rows).to_records()
+        return summary
+
+
+def is_table(records: Sequence[Any]) -> bool:
+    """True if every item is a dict (the records can become a RecordBatch)"""
+    return all(isinstance(record, dict) for record in records)
+
+
+def rows(chunk: Any) -> List[Dict]:
+    """Records of a chunk (list chunks are returned as is)"""
+    return chunk.to_records() if isinstance(chunk, RecordBatch) else chunk
+
+
+def take_rows(chunk: Any, mask: Sequence[bool]) -> Any:
+    """Rows of a list or batch chunk where `mask` is true"""
+    if isinstance(chunk, RecordBatch):
+        return chunk.take(np.asarray(mask, dtype=bool))
+    return [record for record, keep in zip(chunk, mask) if keep]
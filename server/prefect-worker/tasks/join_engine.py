@@ -0,0 +1,268 @@
+"""
+Join engine for the join node (mergeByKey strategy)
+
+Records of A (left) and B (right) are matched on one or more key fields:
+
+- inner: matching pairs only
+- left / right: matching pairs plus the unmatched rows of A / B
+- full (UI: "outer"): matching pairs plus the unmatched rows of both sides
+- anti: rows of A without a match in B
+
+Every matching pair is emitted (SQL semantics) unless duplicates is 'first',
+which keeps only the first B row of each key. Rows whose key has a null
+(missing, None or NaN) value never match. In merged rows the key fields come
+from A, and B fields that A already has are prefixed (the UI's `B_` by
+default; an empty prefix lets B's values win).
+
+B is the build side of an in-memory hash join while its estimated size fits
+JOIN_MEMORY_BUDGET_MB. Larger joins use a sort-merge join over sorted runs
+spilled to temporary files; their output is ordered by key instead of
+following A.
+"""
+import heapq
+import json
+import math
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+JOIN_TYPES = {"inner", "left", "right", "full", "anti"}
+_JOIN_TYPE_ALIASES = {"outer": "full", "leftAnti": "anti"}
+
+# Rows pickled per record in spill files
+_SPILL_BATCH_ROWS = 1000
+
+
+def parse_join_keys(value: Any) -> List[str]:
+    """Join keys from config: a list or a comma-separated string"""
+    if isinstance(value, (list, tuple)):
+        keys = [str(key).strip() for key in value]
+    elif isinstance(value, str):
+        keys = [key.strip() for key in value.split(",")]
+    else:
+        keys = []
+    return [key for key in keys if key]
+
+
+@dataclass
+class JoinSpec:
+    keys: List[str]
+    how: str = "inner"
+    duplicates: str = "all"  # 'all' or 'first'
+    prefix: str = "B_"
+
+    def __post_init__(self):
+        self.how = _JOIN_TYPE_ALIASES.get(self.how, self.how)
+        if self.how not in JOIN_TYPES:
+            raise ValueError(f"Unknown join type: {self.how}")
+        if self.duplicates not in ("all", "first"):
+            raise ValueError(f"Unknown duplicate key handling: {self.duplicates}")
+        if not self.keys:
+            raise ValueError("Join requires at least one key")
+
+    @property
+    def keeps_left(self) -> bool:
+        return self.how in ("left", "full")
+
+    @property
+    def keeps_right(self) -> bool:
+        return self.how in ("right", "full")
+
+    def key_of(self, row: Dict) -> Optional[Tuple]:
+        """Hashable key of a row, or None if any key value is null"""
+        values = []
+        for key in self.keys:
+            value = row.get(key)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                return None
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, sort_keys=True, default=str)
+            values.append(value)
+        return tuple(values)
+
+    def merge(self, left: Dict, right: Dict) -> Dict:
+        row = dict(left)
+        for field, value in right.items():
+            if field in self.keys:
+                continue
+            row[self.prefix + field if field in left else field] = value
+        return row
+
+    def right_only(self, right: Dict, left_fields: Set[str]) -> Dict:
+        """An unmatched B row, with fields that A also has prefixed"""
+        return {
+            self.prefix + field if field in left_fields and field not in self.keys else field: value
+            for field, value in right.items()
+        }
+
+
+def estimate_bytes(rows: List[Dict], sample_size: int = 100) -> int:
+    """Rough in-memory size of a record list (JSON size of a sample, times Python object overhead)"""
+    if not rows:
+        return 0
+    step = max(len(rows) // sample_size, 1)
+    sample = rows[::step][:sample_size]
+    json_bytes = sum(len(json.dumps(row, default=str)) for row in sample) / len(sample)
+    return int(json_bytes * 4 * len(rows))
+
+
+class HashJoin:
+    """Hash join with B as the build side; A is probed in chunks"""
+
+    def __init__(self, spec: JoinSpec, right_rows: Iterable[Dict]):
+        self.spec = spec
+        self.table: Dict[Tuple, List[Dict]] = {}
+        self.null_right: List[Dict] = []
+        for row in right_rows:
+            key = spec.key_of(row)
+            if key is None:
+                self.null_right.append(row)
+                continue
+            matches = self.table.get(key)
+            if matches is None:
+                self.table[key] = [row]
+            elif spec.duplicates == "all":
+                matches.append(row)
+
+    def new_state(self) -> Dict:
+        """Per-pass state: matched B keys and the A fields seen (for unmatched B rows)"""
+        return {"matched": set(), "left_fields": set()}
+
+    def probe(self, left_rows: Iterable[Dict], state: Dict) -> List[Dict]:
+        spec = self.spec
+        table = self.table
+        matched = state["matched"]
+        left_fields = state["left_fields"]
+        out = []
+        for row in left_rows:
+            if spec.keeps_right:
+                left_fields.update(row)
+            key = spec.key_of(row)
+            matches = table.get(key) if key is not None else None
+            if matches:
+                if spec.how == "anti":
+                    continue
+                if spec.keeps_right:
+                    matched.add(key)
+                out.extend(spec.merge(row, match) for match in matches)
+            elif spec.keeps_left or spec.how == "anti":
+                out.append(row)
+        return out
+
+    def unmatched_right(self, state: Dict) -> List[Dict]:
+        """B rows without a match (right/full joins), after all of A was probed"""
+        if not self.spec.keeps_right:
+            return []
+        matched = state["matched"]
+        left_fields = state["left_fields"]
+        out = [
+            self.spec.right_only(row, left_fields)
+            for key, rows in self.table.items() if key not in matched
+            for row in rows
+        ]
+        out.extend(self.spec.right_only(row, left_fields) for row in self.null_right)
+        return out
+
+
+def _sort_key(key: Tuple) -> Tuple:
+    """Total order over keys of mixed types (numbers < strings < anything else)"""
+    return tuple(
+        (0, value, "") if isinstance(value, (int, float)) else
+        (1, 0, value) if isinstance(value, str) else
+        (2, 0, repr(value))
+        for value in key
+    )
+
+
+class SpilledRuns:
+    """External sort: rows are sorted by join key in memory-sized runs written to temporary files"""
+
+    def __init__(self, spec: JoinSpec, directory: str, run_rows: int):
+        self.spec = spec
+        self.directory = directory
+        self.run_rows = max(run_rows, 1)
+        self.paths: List[str] = []
+        self.null_rows: List[Dict] = []
+        self._buffer: List[Tuple[Tuple, Dict]] = []
+
+    def add(self, rows: Iterable[Dict]):
+        for row in rows:
+            key = self.spec.key_of(row)
+            if key is None:
+                self.null_rows.append(row)
+                continue
+            self._buffer.append((_sort_key(key), row))
+            if len(self._buffer) >= self.run_rows:
+                self._spill()
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda item: item[0])
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            for start in range(0, len(self._buffer), _SPILL_BATCH_ROWS):
+                pickle.dump(self._buffer[start:start + _SPILL_BATCH_ROWS], f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.paths.append(path)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple[Tuple, Dict]]:
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return
+                yield from batch
+
+    def sorted_rows(self) -> Iterator[Tuple[Tuple, Dict]]:
+        """(sort key, row) pairs of all non-null rows, ordered by key"""
+        self._spill()
+        return heapq.merge(*[self._read_run(path) for path in self.paths], key=lambda item: item[0])
+
+
+def _groups(items: Iterator[Tuple[Tuple, Dict]]) -> Iterator[Tuple[Tuple, List[Dict]]]:
+    """Consecutive rows with the same sort key"""
+    current_key = None
+    group: List[Dict] = []
+    for key, row in items:
+        if group and key != current_key:
+            yield current_key, group
+            group = []
+        current_key = key
+        group.append(row)
+    if group:
+        yield current_key, group
+
+
+def sort_merge_join(spec: JoinSpec, left: SpilledRuns, right: SpilledRuns, left_fields: Set[str]) -> Iterator[Dict]:
+    """Merge two spilled, key-sorted sides; only one key group per side is held in memory"""
+    left_groups = _groups(left.sorted_rows())
+    right_groups = _groups(right.sorted_rows())
+    left_group = next(left_groups, None)
+    right_group = next(right_groups, None)
+
+    while left_group is not None or right_group is not None:
+        if right_group is None or (left_group is not None and left_group[0] < right_group[0]):
+            if spec.keeps_left or spec.how == "anti":
+                yield from left_group[1]
+            left_group = next(left_groups, None)
+        elif left_group is None or right_group[0] < left_group[0]:
+            if spec.keeps_right:
+                yield from (spec.right_only(row, left_fields) for row in right_group[1])
+            right_group = next(right_groups, None)
+        else:
+            if spec.how != "anti":
+                matches = right_group[1][:1] if spec.duplicates == "first" else right_group[1]
+                for row in left_group[1]:
+                    yield from (spec.merge(row, match) for match in matches)
+            left_group = next(left_groups, None)
+            right_group = next(right_groups, None)
+
+    if spec.keeps_left or spec.how == "anti":
+        yield from left.null_rows
+    if spec.keeps_right:
+        yield from (spec.right_only(row, left_fields) for row in right.null_rows)
@@ -0,0 +1,160 @@
+"""
+Chat completions for the LLM node
+
+Requests go to an OpenAI-compatible API (OPENAI_BASE_URL, so a local
+compatible server can stand in) through the shared HTTP pool. Every call
+first takes one request from a requests/minute bucket and its estimated
+tokens from a tokens/minute bucket (tasks/rate_limit.py, shared by all nodes
+using the same API and model); the token estimate is settled with the real
+usage once the response arrives. 429 and 5xx responses are retried with
+Retry-After or exponential backoff, and a 429 pauses both buckets.
+
+The output type instructions and post-processing (number/date/enum) are the
+ones the LLM node always applied, factored out so they run per row too.
+"""
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from tasks.rate_limit import TokenBucket, retry_delay, shared_bucket
+
+# Completion tokens reserved for a call that doesn't set max_tokens
+_DEFAULT_COMPLETION_TOKENS = 256
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LlmError(RuntimeError):
+    """The API rejected the request or kept failing after retries"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text and JSON)"""
+    return (len(text) + 3) // 4
+
+
+def output_instruction(output_type: str, enum_options: Optional[List[str]] = None) -> str:
+    """Instruction appended to the prompt for typed outputs"""
+    if output_type == "number":
+        return "\n\nIMPORTANT: Your response MUST be a single numeric value (integer or decimal). Do not include any text, units, or explanation — only the number."
+    if output_type == "date":
+        return "\n\nIMPORTANT: Your response MUST be a single date in ISO 8601 format (YYYY-MM-DD). Do not include any text or explanation — only the date."
+    if output_type == "enum" and enum_options:
+        options_str = ", ".join(f'"{o}"' for o in enum_options)
+        return f"\n\nIMPORTANT: Your response MUST be exactly ONE of these options: {options_str}. Do not include any text or explanation — only one of the listed options exactly as written."
+    return ""
+
+
+def post_process(llm_response: str, output_type: str, enum_options: Optional[List[str]] = None) -> str:
+    """Normalize a typed response (kept as is when it can't be parsed)"""
+    if output_type == "number":
+        cleaned = re.sub(r'[^0-9.\-]', '', llm_response)
+        try:
+            return str(float(cleaned))
+        except ValueError:
+            return llm_response
+    if output_type == "date":
+        date_match = re.search(r'\d{4}-\d{2}-\d{2}', llm_response)
+        return date_match.group(0) if date_match else llm_response
+    if output_type == "enum" and enum_options:
+        trimmed = llm_response.strip().strip('"').strip("'")
+        for opt in enum_options:
+            if opt.lower() == trimmed.lower():
+                return opt
+    return llm_response
+
+
+class LlmRateLimiter:
+    """Requests/minute and tokens/minute budgets for one API and model"""
+
+    def __init__(self, model: str, requests_per_minute: float, tokens_per_minute: float):
+        key = f"llm:{config.OPENAI_BASE_URL}:{model}"
+        # Buckets hold at most one minute of budget
+        self.requests: Optional[TokenBucket] = (
+            shared_bucket(key + ":rpm", requests_per_minute / 60, requests_per_minute) if requests_per_minute > 0 else None
+        )
+        self.tokens: Optional[TokenBucket] = (
+            shared_bucket(key + ":tpm", tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute > 0 else None
+        )
+        # Seconds this limiter's callers spent waiting for budget (summed over concurrent calls)
+        self.waited = 0.0
+
+    async def acquire(self, estimated_tokens: int):
+        if self.requests:
+            self.waited += await self.requests.acquire()
+        if self.tokens:
+            self.waited += await self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, used_tokens: Optional[int]):
+        if self.tokens and used_tokens is not None:
+            self.tokens.adjust(used_tokens - estimated_tokens)
+
+    def pause(self, seconds: float):
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.pause(seconds)
+
+
+def api_headers() -> Dict[str, str]:
+    headers = {"Content-Type": "application/json"}
+    if config.OPENAI_API_KEY:
+        headers["Authorization"] = f"Bearer {config.OPENAI_API_KEY}"
+    return headers
+
+
+def check_api_configured():
+    # A custom base URL (e.g. a local compatible server) may not need a key
+    if not config.OPENAI_API_KEY and config.OPENAI_BASE_URL == config.DEFAULT_OPENAI_BASE_URL:
+        raise ValueError("OpenAI API key not configured")
+
+
+async def chat_completion(
+    client,
+    messages: List[Dict[str, Any]],
+    model: str,
+    limiter: Optional[LlmRateLimiter] = None,
+    max_tokens: Optional[int] = None,
+    retries: int = 3,
+    stats: Optional[Dict[str, int]] = None
+) -> Tuple[str, Dict[str, int]]:
+    """Response text and token usage of one chat completion"""
+    body: Dict[str, Any] = {"model": model, "messages": messages}
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+    prompt_text = "".join(str(message.get("content", "")) for message in messages)
+    estimated = estimate_tokens(prompt_text) + (max_tokens or _DEFAULT_COMPLETION_TOKENS)
+
+    for attempt in range(retries + 1):
+        if limiter:
+            await limiter.acquire(estimated)
+        response = await client.post(f"{config.OPENAI_BASE_URL}/chat/completions", headers=api_headers(), json=body)
+        if stats is not None:
+            stats["requests"] = stats.get("requests", 0) + 1
+
+        if response.status_code in _RETRY_STATUSES and attempt < retries:
+            delay = retry_delay(response, attempt)
+            if limiter:
+                # Nothing was used; give the tokens back, then hold everyone back on a 429
+                limiter.settle(estimated, 0)
+                if response.status_code == 429:
+                    limiter.pause(delay)
+            if stats is not None:
+                stats["retries"] = stats.get("retries", 0) + 1
+            await asyncio.sleep(delay)
+            continue
+
+        if response.is_error:
+            if limiter:
+                limiter.settle(estimated, 0)
+            raise LlmError(f"LLM API error {response.status_code}: {response.text[:300]}")
+
+        result = response.json()
+        usage = result.get("usage") or {}
+        if limiter:
+            limiter.settle(estimated, usage.get("total_tokens"))
+        if stats is not None:
+            stats["promptTokens"] = stats.get("promptTokens", 0) + int(usage.get("prompt_tokens") or 0)
+            stats["completionTokens"] = stats.get("completionTokens", 0) + int(usage.get("completion_tokens") or 0)
+        return result["choices"][0]["message"]["content"], usage
+
+    raise LlmError("LLM API request failed after retries")
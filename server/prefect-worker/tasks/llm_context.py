@@ -0,0 +1,157 @@
+"""
+Compact context encoding for LLM prompts
+
+The LLM node used to append its input as pretty-printed JSON, which repeats
+every key on every row. Tabular input (a list of records) is now encoded as
+CSV (one header, one line per row) with:
+
+- only the columns in `llmContextColumns` when set; columns that are empty
+  in every row are always dropped
+- columns with the same value in every row moved to a one-line note
+- a row budget: when the table doesn't fit `llmContextTokens`, the prompt
+  gets a per-column summary (numeric min/mean/max, most frequent values) and
+  an evenly spaced sample of rows that fits the remaining budget
+
+Other input is encoded as compact JSON, truncated to the budget.
+`llmContextFormat: "json"` keeps the old pretty-printed JSON. Token counts
+are estimates (tasks/llm.py).
+"""
+import csv
+import io
+import json
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from tasks.llm import estimate_tokens
+
+# Distinct values listed per text column in summaries
+_TOP_VALUES = 5
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'), default=str)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _csv_line(values: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not (isinstance(value, float) and math.isnan(value))
+
+
+def _summary(records: List[Dict], columns: List[str]) -> str:
+    lines = []
+    for column in columns:
+        values = [record.get(column) for record in records]
+        present = [value for value in values if value is not None and value != ""]
+        numbers = [value for value in present if _is_number(value)]
+        if present and len(numbers) == len(present):
+            lines.append(
+                f"- {column}: min {_cell(min(numbers))}, mean {round(sum(numbers) / len(numbers), 4)}, max {_cell(max(numbers))}"
+            )
+        else:
+            counts = Counter(_cell(value) for value in present)
+            top = ", ".join(f"{value} ({count})" for value, count in counts.most_common(_TOP_VALUES))
+            more = f", {len(counts) - _TOP_VALUES} more" if len(counts) > _TOP_VALUES else ""
+            lines.append(f"- {column}: {len(counts)} distinct: {top}{more}")
+        if len(present) < len(values):
+            lines[-1] += f"; {len(values) - len(present)} empty"
+    return "\n".join(lines)
+
+
+def _sample_indices(total: int, count: int) -> List[int]:
+    """`count` evenly spaced indices of `total` rows, always including the first and last"""
+    if count >= total:
+        return list(range(total))
+    if count <= 1:
+        return [0][:count]
+    step = (total - 1) / (count - 1)
+    return sorted({round(i * step) for i in range(count)})
+
+
+def encode_table(records: List[Dict], token_budget: int, columns: Optional[List[str]] = None) -> Tuple[str, Dict]:
+    """CSV context for a list of records; returns the text and what was kept"""
+    all_columns = list(dict.fromkeys(key for record in records for key in record))
+    selected = [column for column in (columns or all_columns) if column in all_columns] if columns else all_columns
+
+    kept, constant, empty = [], {}, []
+    for column in selected:
+        values = [record.get(column) for record in records]
+        if all(value is None or value == "" for value in values):
+            empty.append(column)
+            continue
+        first = _cell(values[0])
+        if len(records) > 1 and all(_cell(value) == first for value in values):
+            constant[column] = first
+        else:
+            kept.append(column)
+
+    header = []
+    if constant:
+        header.append("Same in every row: " + ", ".join(f"{column}={value}" for column, value in constant.items()))
+    table_lines = [_csv_line(kept)] + [_csv_line([_cell(record.get(column)) for column in kept]) for record in records] if kept else []
+    full = "\n".join(header + [f"{len(records)} rows (CSV):", "".join(table_lines).rstrip("\n")]) if kept else "\n".join(header)
+
+    info = {
+        "format": "table",
+        "rows": len(records),
+        "includedRows": len(records),
+        "columns": kept,
+        "constantColumns": list(constant),
+        "droppedColumns": [column for column in all_columns if column not in selected] + empty,
+    }
+    if estimate_tokens(full) <= token_budget or not kept:
+        info["estimatedTokens"] = estimate_tokens(full)
+        return full, info
+
+    # Over budget: column summary plus an evenly spaced sample of rows
+    summary = f"{len(records)} rows. Column summary:\n{_summary(records, kept)}"
+    intro = "\n".join(header + [summary, ""])
+    remaining = token_budget - estimate_tokens(intro) - estimate_tokens(table_lines[0]) - 20
+    row_tokens = sum(estimate_tokens(line) for line in table_lines[1:]) / len(records)
+    count = max(int(remaining / row_tokens), 0) if row_tokens else len(records)
+    indices = _sample_indices(len(records), count)
+    sample = "".join([table_lines[0]] + [table_lines[1 + index] for index in indices]).rstrip("\n")
+    text = intro + (f"Sample of {len(indices)} rows (CSV):\n{sample}" if indices else "")
+
+    info["includedRows"] = len(indices)
+    info["sampled"] = True
+    info["estimatedTokens"] = estimate_tokens(text)
+    return text, info
+
+
+def encode_context(data: Any, token_budget: int, columns: Optional[List[str]] = None, context_format: str = "auto") -> Tuple[str, Dict]:
+    """Context text for the LLM node's input and a description of the encoding"""
+    if context_format == "json":
+        text = json.dumps(data, indent=2)
+        return text, {"format": "json", "estimatedTokens": estimate_tokens(text)}
+
+    if isinstance(data, dict) and not columns:
+        # A single record is one row; keep its keys next to its values
+        text = json.dumps(data, separators=(',', ':'), default=str)
+        fmt = "json"
+    elif isinstance(data, list) and data and all(isinstance(item, dict) for item in data):
+        return encode_table(data, token_budget, columns)
+    elif isinstance(data, dict):
+        return encode_table([data], token_budget, columns)
+    else:
+        text = json.dumps(data, separators=(',', ':'), default=str)
+        fmt = "json"
+
+    info = {"format": fmt}
+    limit = token_budget * 4
+    if len(text) > limit:
+        info["truncatedFrom"] = estimate_tokens(text)
+        text = text[:limit] + " …(truncated)"
+    info["estimatedTokens"] = estimate_tokens(text)
+    return text, info
@@ -1,11 +1,48 @@
 """
 Node Handler Tasks - Each workflow node type has a corresponding Prefect task
 """
+import asyncio
 import json
+import shutil
+import tempfile
+import time
 import httpx
-from typing import Dict, Any, Optional, List
+import numpy as np
+from typing import Dict, Any, Optional, List, Tuple
 from prefect import task
+from prefect.cache_policies import NONE as NO_CACHE
 import config
+from http_clients import http_clients
+from llm_cache import llm_cache
+from tasks.columnar import RecordBatch, is_table, rows, take_rows
+from tasks.join_engine import HashJoin, JoinSpec, SpilledRuns, estimate_bytes, parse_join_keys, sort_merge_join
+from tasks.llm import LlmRateLimiter, chat_completion, check_api_configured, estimate_tokens, output_instruction, post_process
+from tasks.llm_context import encode_context
+from tasks.predicates import compile_condition
+from tasks.rate_limit import retry_delay, shared_bucket
+from tasks.record_query import ensure_record_indexes, plan_record_query
+from tasks.record_stream import RecordStream
+from tasks.record_writer import RecordWriter, parse_save_mode
+from tasks.templating import placeholders, render_pairs, render_text, render_url, render_value
+from tasks.text_chunks import chunk_pages, chunk_text, split_pages
+from tasks.time_series import (
+    TIMESTAMP_FIELDS, SeriesColumns, aggregate_windows, detect_fields, downsample, iso_times, load_state, lttb,
+    open_window_cutoff, parse_aggregations, parse_fields, parse_interval, save_state, select_windows, state_key, window_rows
+)
+
+# Node types whose handlers accept RecordStream inputs (see tasks/record_stream.py)
+# with list or columnar RecordBatch chunks. Their tasks skip Prefect's
+# input-hash cache key, which would serialize the whole dataset.
+STREAMING_NODE_TYPES = {"condition", "addField", "splitColumns", "join", "timeSeriesAggregator", "saveRecords"}
+
+# Node types whose results depend only on their config and input; nodes of these
+# types can opt into result memoization with `cacheable: true` (see node_result_cache.py)
+CACHEABLE_NODE_TYPES = {"addField", "condition", "join", "splitColumns", "python"}
+
+# Default execution lane per node type: 'cpu' handlers run in the process pool
+# (see cpu_pool.py), everything else ('io') on the event loop. A node can
+# override its type's hint with `executionHint` in its config.
+NODE_EXECUTION_HINTS = {"join": "cpu", "timeSeriesAggregator": "cpu", "dataHistorian": "cpu"}
 
 @task(name="trigger_node", retries=0)
 async def handle_trigger(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
@@ -39,9 +76,92 @@ async def handle_output(node: Dict, input_data: Optional[Dict] = None, execution
         "isFinal": True
     }
 
+# Status codes retried by the HTTP node's per-row mode
+_HTTP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def _http_request_row(client, method: str, config_data: Dict, record: Any, bucket_for, retries: int) -> Dict:
+    """One templated request of the per-row HTTP mode; failures are returned, not raised"""
+    output = dict(record) if isinstance(record, dict) else {"input": record}
+    response_field = config_data.get("httpResponseField") or "response"
+    status = None
+    try:
+        url = render_url(config_data["httpUrl"], record)
+        headers = render_pairs(config_data.get("httpHeaders"), record)
+        params = render_pairs(config_data.get("httpQueryParams"), record)
+        body = None
+        if method in ("POST", "PUT", "PATCH"):
+            template = config_data.get("httpBody")
+            if isinstance(template, str) and template.strip():
+                rendered = render_text(template, record)
+                try:
+                    body = {"json": json.loads(rendered)}
+                except ValueError:
+                    body = {"content": rendered}
+            else:
+                body = {"json": render_value(template, record) if template else record}
+        
+        bucket = bucket_for(url)
+        for attempt in range(retries + 1):
+            if bucket:
+                await bucket.acquire()
+            response = None
+            try:
+                response = await client.request(method, url, headers=headers, params=params or None, **(body or {}))
+            except httpx.TransportError:
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(retry_delay(None, attempt))
+                continue
+            status = response.status_code
+            if status not in _HTTP_RETRY_STATUSES or attempt == retries:
+                break
+            delay = retry_delay(response, attempt)
+            if status == 429 and bucket:
+                # Hold back every row going to this host, not just this one
+                bucket.pause(delay)
+            await asyncio.sleep(delay)
+        
+        if response.is_error:
+            raise ValueError(f"HTTP {status} {response.reason_phrase}: {response.text[:200]}")
+        try:
+            output[response_field] = response.json()
+        except ValueError:
+            output[response_field] = response.text
+        output["httpStatus"] = status
+    except Exception as e:
+        output["httpStatus"] = status
+        output["httpError"] = str(e) or type(e).__name__
+    return output
+
+
+async def _http_per_row(config_data: Dict, method: str, records: List[Any]) -> List[Dict]:
+    """Run the per-row HTTP requests concurrently; results keep the input order"""
+    concurrency = max(int(config_data.get("httpConcurrency") or config.HTTP_FANOUT_CONCURRENCY), 1)
+    rate = float(config_data.get("httpRateLimit") or 0)
+    retries = max(int(config_data.get("httpRetries", 2)), 0)
+    
+    def bucket_for(url: str):
+        # Per-host budget, shared with other nodes calling the same host
+        return shared_bucket(f"http:{httpx.URL(url).host}", rate, max(rate, 1)) if rate > 0 else None
+    
+    results: List[Optional[Dict]] = [None] * len(records)
+    pending = iter(range(len(records)))
+    
+    async with http_clients.session(timeout=30.0) as client:
+        async def worker():
+            # Workers share one index iterator, so each row is requested once
+            for index in pending:
+                results[index] = await _http_request_row(client, method, config_data, records[index], bucket_for, retries)
+        
+        await asyncio.gather(*[worker() for _ in range(min(concurrency, len(records)))])
+    
+    return results
+
+
 @task(name="http_request", retries=2)
 async def handle_http(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle HTTP request node"""
+    """Handle HTTP request node (processingMode 'perRow' sends one templated request per input record)"""
     config_data = node.get("config", {})
     url = config_data.get("httpUrl")
     method = config_data.get("httpMethod", "GET").upper()
@@ -49,7 +169,29 @@ async def handle_http(node: Dict, input_data: Optional[Dict] = None, execution_c
     if not url:
         raise ValueError("No URL configured for HTTP node")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    if config_data.get("processingMode") == "perRow":
+        records = input_data if isinstance(input_data, list) else [input_data] if input_data else []
+        if method not in ("GET", "POST", "PUT", "PATCH", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
+        started = time.perf_counter()
+        results = await _http_per_row(config_data, method, records)
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for row in results if "httpError" in row)
+        
+        if failed and config_data.get("httpFailOnError"):
+            first_error = next(row for row in results if "httpError" in row)
+            raise ValueError(f"{failed} of {len(results)} HTTP requests failed (first error: {first_error['httpError']})")
+        
+        return {
+            "success": True,
+            "message": f"HTTP {method} x{len(results)} - {len(results) - failed} succeeded, {failed} failed in {elapsed:.1f}s",
+            "outputData": results,
+            "requestCount": len(results),
+            "failedCount": failed
+        }
+    
+    async with http_clients.session(timeout=30.0) as client:
         if method == "GET":
             response = await client.get(url)
         elif method == "POST":
@@ -75,9 +217,181 @@ async def handle_http(node: Dict, input_data: Optional[Dict] = None, execution_c
             "statusCode": response.status_code
         }
 
+async def _llm_complete_many(requests: Dict[str, List[Dict]], model: str, limiter: LlmRateLimiter, stats: Dict, concurrency: int, max_tokens: Optional[int] = None, use_cache: bool = True) -> Dict[str, Any]:
+    """Responses for {key: messages}: cached ones from llm_cache, the rest from the API, run concurrently.
+    Failed requests map to their exception."""
+    cached = await llm_cache.get_many(requests) if use_cache else {}
+    answers: Dict[str, Any] = dict(cached)
+    pending = iter([key for key in requests if key not in cached])
+    fresh: Dict[str, Tuple[str, str]] = {}
+    
+    async with http_clients.session(timeout=60.0) as client:
+        async def worker():
+            for key in pending:
+                try:
+                    text, _ = await chat_completion(
+                        client, requests[key], model,
+                        limiter=limiter, max_tokens=max_tokens, retries=config.LLM_MAX_RETRIES, stats=stats
+                    )
+                    answers[key] = text
+                    fresh[key] = (model, text)
+                except Exception as e:
+                    answers[key] = e
+        
+        try:
+            await asyncio.gather(*[worker() for _ in range(min(concurrency, len(requests) - len(cached)))])
+        finally:
+            # Keep what was paid for even if the node fails
+            if use_cache:
+                await llm_cache.put_many(fresh)
+    
+    cache_stats = stats.setdefault("cache", {"enabled": use_cache and llm_cache.enabled, "hits": 0, "misses": 0})
+    cache_stats["hits"] += len(cached)
+    cache_stats["misses"] += len(requests) - len(cached)
+    return answers
+
+
+async def _llm_per_row(config_data: Dict, records: List[Any], model: str, limiter: LlmRateLimiter, stats: Dict) -> List[Dict]:
+    """One templated prompt per record; identical prompts are sent once and results keep the input order"""
+    prompt = config_data.get("llmPrompt") or config_data.get("prompt")
+    output_type = config_data.get("outputType", "text")
+    enum_options = config_data.get("enumOptions", [])
+    instruction = output_instruction(output_type, enum_options)
+    output_field = config_data.get("llmOutputField") or "llmResponse"
+    concurrency = max(int(config_data.get("llmConcurrency") or config.LLM_CONCURRENCY), 1)
+    # Templated prompts carry their fields; plain prompts get the record as context
+    include_record = config_data.get("llmIncludeInput")
+    if include_record is None:
+        include_record = not placeholders(prompt)
+    
+    row_keys = []
+    requests: Dict[str, List[Dict]] = {}
+    for record in records:
+        content = render_text(prompt, record)
+        if include_record:
+            content += f"\n\nContext data:\n{json.dumps(record, default=str)}"
+        messages = [{"role": "user", "content": content + instruction}]
+        key = llm_cache.key(model, messages, output_type, enum_options)
+        requests.setdefault(key, messages)
+        row_keys.append(key)
+    
+    answers = await _llm_complete_many(
+        requests, model, limiter, stats, concurrency,
+        max_tokens=config_data.get("llmMaxTokens"), use_cache=config_data.get("llmCache", True) is not False
+    )
+    
+    results = []
+    for record, key in zip(records, row_keys):
+        output = dict(record) if isinstance(record, dict) else {"input": record}
+        answer = answers[key]
+        if isinstance(answer, Exception):
+            output["llmError"] = str(answer) or type(answer).__name__
+        else:
+            output[output_field] = post_process(answer, output_type, enum_options)
+        results.append(output)
+    return results
+
+
+_REDUCE_INSTRUCTIONS = (
+    "Combine them into one complete answer to the task: merge duplicates, keep every distinct fact, "
+    "resolve overlaps between neighbouring parts and ignore parts that found nothing relevant."
+)
+
+
+def _document_text(input_data: Any) -> str:
+    if isinstance(input_data, str):
+        return input_data
+    if isinstance(input_data, dict) and isinstance(input_data.get("text"), str):
+        return input_data["text"]
+    if isinstance(input_data, dict) and isinstance(input_data.get("pageTexts"), list):
+        return "\f".join(str(page) for page in input_data["pageTexts"])
+    raise ValueError("Map-reduce mode needs text input (e.g. from a PDF node)")
+
+
+async def _llm_map_reduce(config_data: Dict, input_data: Any, prompt: str, model: str, limiter: LlmRateLimiter, stats: Dict) -> Tuple[str, Dict]:
+    """Answer `prompt` over a long text: once per chunk (map), then over the partial answers (reduce).
+    Reduce rounds repeat over groups of partial answers until one prompt fits the context budget."""
+    output_type = config_data.get("outputType", "text")
+    enum_options = config_data.get("enumOptions", [])
+    concurrency = max(int(config_data.get("llmConcurrency") or config.LLM_CONCURRENCY), 1)
+    budget = int(config_data.get("llmContextTokens") or config.LLM_CONTEXT_TOKEN_BUDGET)
+    max_tokens = config_data.get("llmMaxTokens")
+    use_cache = config_data.get("llmCache", True) is not False
+
+    text = _document_text(input_data)
+    pages = split_pages(input_data) if config_data.get("llmChunkBy") == "pages" else None
+    if pages:
+        chunk_by = "pages"
+        chunks = chunk_pages(
+            pages,
+            int(config_data.get("llmPagesPerChunk") or config.LLM_CHUNK_PAGES),
+            int(config_data.get("llmChunkOverlap") or 0)
+        )
+    else:
+        chunk_by = "tokens"
+        overlap = config_data.get("llmChunkOverlap")
+        chunks = chunk_text(
+            text,
+            int(config_data.get("llmChunkTokens") or config.LLM_CHUNK_TOKENS),
+            int(overlap if overlap is not None else config.LLM_CHUNK_OVERLAP_TOKENS)
+        )
+    if not chunks:
+        raise ValueError("The input text is empty")
+
+    async def complete(contents: List[str], final: bool) -> List[str]:
+        # The output type only applies to the final answer; intermediate ones stay free text
+        instruction = output_instruction(output_type, enum_options) if final else ""
+        kind = output_type if final else "text"
+        requests, keys = {}, []
+        for content in contents:
+            messages = [{"role": "user", "content": content + instruction}]
+            key = llm_cache.key(model, messages, kind, enum_options if final else None)
+            requests.setdefault(key, messages)
+            keys.append(key)
+        answers = await _llm_complete_many(requests, model, limiter, stats, concurrency, max_tokens=max_tokens, use_cache=use_cache)
+        errors = [answer for answer in answers.values() if isinstance(answer, Exception)]
+        if errors:
+            raise ValueError(f"{len(errors)} of {len(requests)} LLM calls failed (first error: {errors[0]})")
+        return [answers[key] for key in keys]
+
+    # Map prompts hold only the task and the chunk, so an unchanged chunk hits
+    # the cache even when the document around it changed
+    partials = await complete(
+        [f"{prompt}\n\nThe text below is one part of a longer document. Answer from this part only.\n\nDocument part:\n{chunk}" for chunk in chunks],
+        final=len(chunks) == 1
+    )
+
+    reduce_instructions = config_data.get("llmReducePrompt") or _REDUCE_INSTRUCTIONS
+    header = f"The answers below were each produced from one part of a longer document for this task:\n{prompt}\n\n{reduce_instructions}\n\nPartial answers:"
+    rounds = 0
+    while len(partials) > 1:
+        rounds += 1
+        # Greedy groups of consecutive answers within the budget (at least two, so every round shrinks the list)
+        groups: List[List[str]] = [[]]
+        used = estimate_tokens(header)
+        for partial in partials:
+            cost = estimate_tokens(partial) + 4
+            if len(groups[-1]) >= 2 and used + cost > budget:
+                groups.append([])
+                used = estimate_tokens(header)
+            groups[-1].append(partial)
+            used += cost
+        contents = [
+            header + "".join(f"\n\n--- Part {number} ---\n{partial}" for number, partial in enumerate(group, 1))
+            for group in groups
+        ]
+        partials = await complete(contents, final=len(groups) == 1)
+
+    info = {"chunkBy": chunk_by, "chunks": len(chunks), "reduceRounds": rounds}
+    if chunk_by == "pages":
+        info["pages"] = len(pages)
+    return partials[0], info
+
+
 @task(name="llm_call", retries=2)
 async def handle_llm(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle LLM/OpenAI node"""
+    """Handle LLM/OpenAI node (processingMode 'perRow' prompts once per input record, see tasks/llm.py;
+    'mapReduce' answers over chunks of a long text, see tasks/text_chunks.py)"""
     config_data = node.get("config", {})
     prompt = config_data.get("llmPrompt") or config_data.get("prompt")
     output_type = config_data.get("outputType", "text")
@@ -86,100 +400,126 @@ async def handle_llm(node: Dict, input_data: Optional[Dict] = None, execution_co
     if not prompt:
         raise ValueError("No prompt configured for LLM node")
     
-    if not config.OPENAI_API_KEY:
-        raise ValueError("OpenAI API key not configured")
-    
-    # Build context from input data
-    context = ""
-    if input_data:
-        context = f"\n\nContext data:\n{json.dumps(input_data, indent=2)}"
-    
-    # Build output format instruction based on outputType
-    output_instruction = ""
-    if output_type == "number":
-        output_instruction = "\n\nIMPORTANT: Your response MUST be a single numeric value (integer or decimal). Do not include any text, units, or explanation — only the number."
-    elif output_type == "date":
-        output_instruction = "\n\nIMPORTANT: Your response MUST be a single date in ISO 8601 format (YYYY-MM-DD). Do not include any text or explanation — only the date."
-    elif output_type == "enum" and enum_options:
-        options_str = ", ".join(f'"{o}"' for o in enum_options)
-        output_instruction = f"\n\nIMPORTANT: Your response MUST be exactly ONE of these options: {options_str}. Do not include any text or explanation — only one of the listed options exactly as written."
-    
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {config.OPENAI_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {"role": "user", "content": prompt + context + output_instruction}
-                ]
-            }
-        )
-        response.raise_for_status()
-        result = response.json()
-        
-        llm_response = result["choices"][0]["message"]["content"]
+    check_api_configured()
+    
+    model = config_data.get("llmModel") or config.LLM_MODEL
+    limiter = LlmRateLimiter(
+        model,
+        float(config_data.get("llmRequestsPerMinute") or config.LLM_REQUESTS_PER_MINUTE),
+        float(config_data.get("llmTokensPerMinute") or config.LLM_TOKENS_PER_MINUTE)
+    )
+    stats: Dict[str, Any] = {}
+    
+    if config_data.get("processingMode") == "perRow":
+        records = input_data if isinstance(input_data, list) else [input_data] if input_data else []
+        started = time.perf_counter()
+        results = await _llm_per_row(config_data, records, model, limiter, stats)
+        failed = sum(1 for row in results if "llmError" in row)
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["rateLimitWait"] = round(limiter.waited, 3)
         
-        # Post-process based on output type
-        import re
-        if output_type == "number":
-            cleaned = re.sub(r'[^0-9.\-]', '', llm_response)
-            try:
-                llm_response = str(float(cleaned))
-            except ValueError:
-                pass  # Keep original if can't parse
-        elif output_type == "date":
-            date_match = re.search(r'\d{4}-\d{2}-\d{2}', llm_response)
-            if date_match:
-                llm_response = date_match.group(0)
-        elif output_type == "enum" and enum_options:
-            trimmed = llm_response.strip().strip('"').strip("'")
-            for opt in enum_options:
-                if opt.lower() == trimmed.lower():
-                    llm_response = opt
-                    break
+        if failed == len(results) and results:
+            raise ValueError(f"All {failed} LLM calls failed (first error: {results[0]['llmError']})")
         
         return {
             "success": True,
-            "message": "LLM response generated",
-            "outputData": {"response": llm_response, "outputType": output_type, "inputData": input_data},
-            "llmResponse": llm_response
+            "message": (
+                f"LLM responses generated for {len(results) - failed} of {len(results)} rows "
+                f"({stats['cache']['hits'] + stats['cache']['misses']} distinct prompts, {stats['cache']['hits']} cached)"
+            ),
+            "outputData": results,
+            "failedCount": failed,
+            "llmUsage": stats
+        }
+    
+    if config_data.get("processingMode") == "mapReduce":
+        started = time.perf_counter()
+        answer, info = await _llm_map_reduce(config_data, input_data, prompt, model, limiter, stats)
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["rateLimitWait"] = round(limiter.waited, 3)
+        llm_response = post_process(answer, output_type, enum_options)
+        return {
+            "success": True,
+            "message": (
+                f"LLM response generated from {info['chunks']} chunks in {info['reduceRounds']} reduce rounds "
+                f"({stats['cache']['hits']} of {stats['cache']['hits'] + stats['cache']['misses']} prompts cached)"
+            ),
+            "outputData": {
+                "response": llm_response,
+                "outputType": output_type,
+                "fileName": input_data.get("fileName") if isinstance(input_data, dict) else None
+            },
+            "llmResponse": llm_response,
+            "llmUsage": stats,
+            "mapReduce": info
         }
+    
+    # Build context from input data (compact tables within a token budget, see tasks/llm_context.py)
+    context = ""
+    context_info = None
+    if input_data:
+        encoded, context_info = encode_context(
+            input_data,
+            int(config_data.get("llmContextTokens") or config.LLM_CONTEXT_TOKEN_BUDGET),
+            columns=config_data.get("llmContextColumns") or None,
+            context_format=config_data.get("llmContextFormat", "auto")
+        )
+        context = f"\n\nContext data:\n{encoded}"
+    
+    messages = [{"role": "user", "content": prompt + context + output_instruction(output_type, enum_options)}]
+    key = llm_cache.key(model, messages, output_type, enum_options)
+    answer = (await _llm_complete_many(
+        {key: messages}, model, limiter, stats, 1, use_cache=config_data.get("llmCache", True) is not False
+    ))[key]
+    if isinstance(answer, Exception):
+        raise answer
+    
+    llm_response = post_process(answer, output_type, enum_options)
+    
+    return {
+        "success": True,
+        "message": "LLM response generated" + (" (cached)" if stats["cache"]["hits"] else ""),
+        "outputData": {"response": llm_response, "outputType": output_type, "inputData": input_data},
+        "llmResponse": llm_response,
+        "llmUsage": stats,
+        "llmContext": context_info,
+        "estimatedPromptTokens": estimate_tokens(messages[0]["content"])
+    }
 
-@task(name="condition_check", retries=0)
+@task(name="condition_check", retries=0, cache_policy=NO_CACHE)
 async def handle_condition(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle condition/branching node"""
+    """Handle condition/branching node (rules are compiled by tasks/predicates.py)"""
     config_data = node.get("config", {})
-    field = config_data.get("conditionField")
-    operator = config_data.get("conditionOperator", "equals")
-    value = config_data.get("conditionValue")
     processing_mode = config_data.get("processingMode", "batch")
-    
-    def evaluate_condition(actual, op, expected):
-        if op == "equals":
-            return str(actual) == str(expected)
-        elif op == "notEquals":
-            return str(actual) != str(expected)
-        elif op == "contains":
-            return str(expected) in str(actual)
-        elif op == "greaterThan":
-            return float(actual) > float(expected)
-        elif op == "lessThan":
-            return float(actual) < float(expected)
-        elif op == "isEmpty":
-            return not actual or actual == ""
-        elif op == "isNotEmpty":
-            return actual and actual != ""
-        else:
-            return str(actual) == str(expected)
+    predicate = compile_condition(config_data)
+    
+    if processing_mode == "perRow" and isinstance(input_data, RecordStream):
+        # Partition every chunk in one pass over the input; both outputs keep their chunks
+        true_chunks = []
+        false_chunks = []
+        async for chunk in input_data:
+            mask = predicate.mask(chunk)
+            for chunks, selector in ((true_chunks, mask), (false_chunks, np.logical_not(mask))):
+                selected = take_rows(chunk, selector)
+                if len(selected):
+                    chunks.append(selected)
+        
+        true_records = RecordStream.from_chunks(true_chunks)
+        false_records = RecordStream.from_chunks(false_chunks)
+        
+        return {
+            "success": True,
+            "message": f"Filtered: {true_records.length} true, {false_records.length} false",
+            "outputData": true_records,
+            "conditionResult": true_records.length > 0,
+            "trueRecords": true_records,
+            "falseRecords": false_records,
+            "trueCount": true_records.length,
+            "falseCount": false_records.length
+        }
     
     if processing_mode == "perRow" and isinstance(input_data, list):
-        # Filter records
-        true_records = [r for r in input_data if evaluate_condition(r.get(field), operator, value)]
-        false_records = [r for r in input_data if not evaluate_condition(r.get(field), operator, value)]
+        true_records, false_records = predicate.partition(input_data)
         
         return {
             "success": True,
@@ -191,23 +531,40 @@ async def handle_condition(node: Dict, input_data: Optional[Dict] = None, execut
         }
     
     # Batch mode
-    test_value = input_data[0].get(field) if isinstance(input_data, list) and input_data else input_data.get(field) if isinstance(input_data, dict) else None
-    result = evaluate_condition(test_value, operator, value)
+    if isinstance(input_data, RecordStream):
+        test_record = await input_data.first()
+    elif isinstance(input_data, list):
+        test_record = input_data[0] if input_data else None
+    else:
+        test_record = input_data
+    result = predicate(test_record)
     
     return {
         "success": True,
-        "message": f"Condition: {field} {operator} {value} = {result}",
+        "message": f"Condition: {predicate.describe()} = {result}",
         "outputData": input_data,
         "conditionResult": result
     }
 
-@task(name="add_field", retries=0)
+@task(name="add_field", retries=0, cache_policy=NO_CACHE)
 async def handle_add_field(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
     """Handle add field transformation"""
     config_data = node.get("config", {})
     field_name = config_data.get("fieldName", "newField")
     field_value = config_data.get("fieldValue", "")
     
+    if isinstance(input_data, RecordStream):
+        def add_field(chunk):
+            if isinstance(chunk, RecordBatch):
+                return chunk.with_column(field_name, field_value)
+            return [{**record, field_name: field_value} for record in chunk]
+        
+        return {
+            "success": True,
+            "message": f"Added field '{field_name}' to {await input_data.count()} records",
+            "outputData": input_data.map_chunks(add_field)
+        }
+    
     if isinstance(input_data, list):
         result = []
         for record in input_data:
@@ -227,32 +584,134 @@ async def handle_add_field(node: Dict, input_data: Optional[Dict] = None, execut
         "outputData": {**input_data, field_name: field_value} if input_data else {field_name: field_value}
     }
 
-@task(name="join_data", retries=0)
+@task(name="join_data", retries=0, cache_policy=NO_CACHE)
 async def handle_join(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle data join node"""
+    """Handle data join node (mergeByKey joins run in tasks/join_engine.py)"""
     config_data = node.get("config", {})
     strategy = config_data.get("joinStrategy", "concat")
-    join_key = config_data.get("joinKey")
-    
-    data_a = input_data.get("A", []) if input_data else []
-    data_b = input_data.get("B", []) if input_data else []
+    join_keys = parse_join_keys(config_data.get("joinKeys") or config_data.get("joinKey"))
+    
+    # inputA/inputB from the flow's merge_inputs, A/B from direct node calls
+    input_data = input_data or {}
+    data_a = input_data.get("inputA", input_data.get("A")) or []
+    data_b = input_data.get("inputB", input_data.get("B")) or []
+    
+    if strategy == "mergeByKey" and join_keys:
+        spec = JoinSpec(
+            join_keys,
+            how=config_data.get("joinType", "inner"),
+            duplicates=config_data.get("joinDuplicates", "all"),
+            prefix=config_data.get("joinConflictPrefix", "B_")
+        )
+        return await _join_by_key(spec, data_a, data_b)
     
-    if strategy == "concat":
-        result = data_a + data_b
-    elif strategy == "mergeByKey" and join_key:
-        result = []
-        for a in data_a:
-            match = next((b for b in data_b if b.get(join_key) == a.get(join_key)), None)
-            result.append({**a, **match} if match else a)
-    else:
-        result = data_a + data_b
+    if isinstance(data_a, RecordStream) or isinstance(data_b, RecordStream):
+        stream_a = data_a if isinstance(data_a, RecordStream) else RecordStream.from_records(data_a)
+        stream_b = data_b if isinstance(data_b, RecordStream) else RecordStream.from_records(data_b)
+        count_a = await stream_a.count()
+        count_b = await stream_b.count()
+        return {
+            "success": True,
+            "message": f"Joined {count_a} + {count_b} = {count_a + count_b} records",
+            "outputData": RecordStream.concat(stream_a, stream_b)
+        }
     
+    result = data_a + data_b
     return {
         "success": True,
         "message": f"Joined {len(data_a)} + {len(data_b)} = {len(result)} records",
         "outputData": result
     }
 
+async def _record_chunks(value: Any):
+    """Lists of records from a join input (a list, batch or stream)"""
+    if isinstance(value, RecordStream):
+        async for chunk in value:
+            yield rows(chunk)
+    elif isinstance(value, RecordBatch):
+        yield value.to_records()
+    elif value:
+        yield value
+
+def _join_chunk(records: List[Dict]):
+    return RecordBatch.from_records(records) if config.RECORD_BATCH_COLUMNAR and is_table(records) else records
+
+async def _join_by_key(spec: JoinSpec, data_a: Any, data_b: Any) -> Dict:
+    """
+    Hash join with B as the build side while B fits JOIN_MEMORY_BUDGET_MB,
+    sort-merge join over runs spilled to disk otherwise
+    """
+    budget = config.JOIN_MEMORY_BUDGET_MB * 1024 * 1024
+    on = ", ".join(spec.keys)
+    spill_dir = None
+    try:
+        # Read B, moving it to spilled runs as soon as it outgrows the budget
+        right: List[Dict] = []
+        right_bytes = 0
+        right_runs = None
+        count_b = 0
+        async for records in _record_chunks(data_b):
+            count_b += len(records)
+            if right_runs is not None:
+                right_runs.add(records)
+                continue
+            right.extend(records)
+            right_bytes += estimate_bytes(records)
+            if right_bytes > budget:
+                spill_dir = tempfile.mkdtemp(prefix="join-")
+                row_bytes = max(right_bytes // len(right), 1)
+                right_runs = SpilledRuns(spec, spill_dir, budget // 2 // row_bytes)
+                right_runs.add(right)
+                right = []
+        
+        if right_runs is not None:
+            left_runs = SpilledRuns(spec, spill_dir, right_runs.run_rows)
+            left_fields = set()
+            count_a = 0
+            async for records in _record_chunks(data_a):
+                count_a += len(records)
+                if spec.keeps_right:
+                    for record in records:
+                        left_fields.update(record)
+                left_runs.add(records)
+            result = await asyncio.to_thread(lambda: list(sort_merge_join(spec, left_runs, right_runs, left_fields)))
+            return {
+                "success": True,
+                "message": f"Joined {count_a} + {count_b} = {len(result)} records ({spec.how} join on {on}, spilled to disk)",
+                "outputData": result
+            }
+        
+        join = HashJoin(spec, right)
+        if isinstance(data_a, RecordStream):
+            # A streams through the hash table; unmatched B rows follow the last chunk
+            async def chunks():
+                state = join.new_state()
+                async for chunk in data_a:
+                    out = join.probe(rows(chunk), state)
+                    if out:
+                        yield _join_chunk(out)
+                tail = join.unmatched_right(state)
+                if tail:
+                    yield _join_chunk(tail)
+            
+            return {
+                "success": True,
+                "message": f"Joined {await data_a.count()} + {count_b} records ({spec.how} join on {on})",
+                "outputData": RecordStream(chunks)
+            }
+        
+        left = data_a.to_records() if isinstance(data_a, RecordBatch) else data_a
+        state = join.new_state()
+        result = join.probe(left, state) + join.unmatched_right(state)
+        return {
+            "success": True,
+            "message": f"Joined {len(left)} + {count_b} = {len(result)} records ({spec.how} join on {on})",
+            "outputData": result
+        }
+    finally:
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
 @task(name="webhook_receive", retries=0)
 async def handle_webhook(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
     """Handle webhook node - receives external data"""
@@ -330,10 +789,7 @@ async def handle_python(node: Dict, input_data: Optional[Dict] = None, execution
     Handle Python code execution node
     Executes Python code with input data and returns the result
     """
-    import subprocess
-    import tempfile
-    import base64
-    import platform
+    from sandbox_pool import sandbox_pool
     
     config_data = node.get("config", {})
     code = config_data.get("code", "")
@@ -341,146 +797,43 @@ async def handle_python(node: Dict, input_data: Optional[Dict] = None, execution
     if not code:
         raise ValueError("No Python code provided")
     
-    try:
-        # Encode code to base64 to avoid injection
-        code_base64 = base64.b64encode(code.encode('utf-8')).decode('utf-8')
-        
-        # Create wrapper code with security restrictions
-        wrapper_code = f'''
-import sys
-import json
-import base64
-import signal
-
-# Timeout handler
-def timeout_handler(signum, frame):
-    raise TimeoutError("Execution timed out (30s limit)")
-
-# Set timeout (Unix only)
-if hasattr(signal, 'alarm'):
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(30)
-
-try:
-    # Decode user code
-    user_code = base64.b64decode("{code_base64}").decode('utf-8')
-    
-    # Create restricted globals
-    restricted_globals = {{
-        '__builtins__': {{
-            'abs': abs, 'all': all, 'any': any, 'bool': bool, 'dict': dict,
-            'enumerate': enumerate, 'filter': filter, 'float': float, 'int': int,
-            'isinstance': isinstance, 'len': len, 'list': list, 'map': map,
-            'max': max, 'min': min, 'print': print, 'range': range, 'reversed': reversed,
-            'round': round, 'set': set, 'sorted': sorted, 'str': str, 'sum': sum,
-            'tuple': tuple, 'type': type, 'zip': zip,
-        }},
-        'json': json,
-        'math': __import__('math'),
-        're': __import__('re'),
-        'datetime': __import__('datetime'),
-        'collections': __import__('collections'),
-        'itertools': __import__('itertools'),
-    }}
-    restricted_locals = {{}}
-    
-    # Execute user code in restricted environment
-    exec(user_code, restricted_globals, restricted_locals)
-    
-    # Read input from stdin
-    input_data = json.load(sys.stdin)
-    
-    # Execute user function (must be named 'process')
-    if 'process' in restricted_locals:
-        result = restricted_locals['process'](input_data)
-        print(json.dumps({{"success": True, "result": result}}))
-    else:
-        print(json.dumps({{"error": "Function 'process(data)' not found. Please define: def process(data): ..."}}))
-
-except TimeoutError as e:
-    print(json.dumps({{"error": str(e)}}))
-except MemoryError:
-    print(json.dumps({{"error": "Memory limit exceeded"}}))
-except Exception as e:
-    import traceback
-    print(json.dumps({{"error": f"Runtime Error: {{str(e)}}", "traceback": traceback.format_exc()}}))
-finally:
-    # Cancel alarm
-    if hasattr(signal, 'alarm'):
-        try:
-            signal.alarm(0)
-        except:
-            pass
-'''
-        
-        # Write to temp file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-            f.write(wrapper_code)
-            temp_file = f.name
-        
-        try:
-            # Determine Python command
-            python_cmd = 'py' if platform.system() == 'Windows' else 'python3'
-            
-            # Execute Python script
-            process = subprocess.Popen(
-                [python_cmd, temp_file],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Send input data with timeout
-            input_json = json.dumps(input_data or {})
-            stdout, stderr = process.communicate(input=input_json, timeout=35)
-            
-            # Parse output
-            if stdout:
-                try:
-                    result = json.loads(stdout.strip())
-                    
-                    if "error" in result:
-                        return {
-                            "success": False,
-                            "message": f"Python execution failed: {result['error']}",
-                            "error": result.get("error"),
-                            "traceback": result.get("traceback"),
-                            "outputData": input_data  # Pass through input on error
-                        }
-                    
-                    return {
-                        "success": True,
-                        "message": "Python code executed successfully",
-                        "outputData": result.get("result", {}),
-                        "pythonResult": result.get("result")
-                    }
-                except json.JSONDecodeError:
-                    # Output is not JSON, treat as string
-                    return {
-                        "success": True,
-                        "message": "Python code executed (non-JSON output)",
-                        "outputData": {"output": stdout.strip()},
-                        "rawOutput": stdout.strip()
-                    }
-            
-            if stderr:
-                raise ValueError(f"Python execution error: {stderr}")
-            
-            raise ValueError("No output from Python execution")
-            
-        finally:
-            # Clean up temp file
-            import os
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
+    # "records" (list of dicts), "dataframe" (pandas DataFrame) or "arrays" (dict of NumPy arrays)
+    data_mode = config_data.get("dataMode", "records")
+    if data_mode not in ("records", "dataframe", "arrays"):
+        raise ValueError(f"Unknown Python data mode: {data_mode}")
     
-    except subprocess.TimeoutExpired:
-        raise ValueError("Python execution timed out (30s limit)")
+    try:
+        # Runs in a warm sandbox worker (see sandbox_pool.py); the worker is
+        # killed if this task is cancelled or the call times out
+        result = await sandbox_pool.run(code, input_data or {}, data_mode=data_mode)
+    except asyncio.TimeoutError:
+        raise ValueError(f"Python execution timed out ({sandbox_pool.timeout:g}s limit)")
     except Exception as e:
         raise ValueError(f"Python execution failed: {str(e)}")
+    
+    if "error" in result:
+        return {
+            "success": False,
+            "message": f"Python execution failed: {result['error']}",
+            "error": result.get("error"),
+            "traceback": result.get("traceback"),
+            "outputData": input_data  # Pass through input on error
+        }
+    
+    output = result["result"]
+    if isinstance(output, RecordBatch) and not (0 < config.RECORD_STREAM_MIN_ROWS <= len(output)):
+        # Small tables go on as records; large ones stay columnar, like streamed outputs
+        output = output.to_records()
+    
+    response = {
+        "success": True,
+        "message": "Python code executed successfully",
+        "outputData": output,
+        "pythonResult": output
+    }
+    if result.get("stdout"):
+        response["printOutput"] = result["stdout"]
+    return response
 
 # ==================== OT/INDUSTRIAL NODE HANDLERS ====================
 
@@ -719,6 +1072,10 @@ async def handle_data_historian(node: Dict, input_data: Optional[Dict] = None, e
     start_time = config.get("dataHistorianStartTime")
     end_time = config.get("dataHistorianEndTime")
     aggregation = config.get("dataHistorianAggregation", "raw")
+    # dataPoints + per-tag records (as the Node executor returns) unless per-tag arrays are asked for
+    output_format = "columnar" if config.get("dataHistorianOutputFormat") == "columnar" else "records"
+    max_points = int(config.get("dataHistorianMaxPoints") or 0)
+    downsampling = config.get("dataHistorianDownsampling", "lttb")
     
     if not connection_id or not tags:
         raise ValueError("Data Historian node requires connectionId and tags configuration")
@@ -726,7 +1083,6 @@ async def handle_data_historian(node: Dict, input_data: Optional[Dict] = None, e
     # TODO: Implement actual Data Historian query (PI/Wonderware/InfluxDB)
     # For now, simulate historical time-series data
     from datetime import datetime, timedelta
-    import random
     
     if not start_time:
         start_time = (datetime.now() - timedelta(days=1)).isoformat()
@@ -737,51 +1093,84 @@ async def handle_data_historian(node: Dict, input_data: Optional[Dict] = None, e
     end = datetime.fromisoformat(end_time.replace("Z", "+00:00").replace("+00:00", ""))
     
     interval = timedelta(minutes=1) if aggregation == "raw" else timedelta(hours=1)
-    data_points = []
-    current = start
-    
-    while current <= end:
-        for tag in tags:
-            data_points.append({
-                "tag": tag,
-                "timestamp": current.isoformat(),
-                "value": random.random() * 100
-            })
-        current += interval
+    # One timestamp axis shared by all tags, one value array per tag
+    times = np.arange(
+        np.datetime64(start, "us"),
+        np.datetime64(end, "us") + np.timedelta64(1, "us"),
+        np.timedelta64(interval)
+    )
+    rng = np.random.default_rng()
+    series = {tag: (np.arange(len(times)), rng.random(len(times)) * 100) for tag in tags}
+    raw_count = len(times) * len(tags)
+    
+    if max_points and len(times) > max_points:
+        seconds = times.astype(np.int64) / 1e6
+        if downsampling == "lttb":
+            # The tags share their timestamps: downsample all of them in one pass
+            kept = lttb(seconds, np.stack([values for _, values in series.values()]), max_points)
+            series = {tag: (keep, values[keep]) for (tag, (_, values)), keep in zip(series.items(), kept)}
+        else:
+            series = {
+                tag: (indices[keep], values[keep])
+                for tag, (indices, values) in series.items()
+                for keep in [downsample(seconds[indices], values, max_points, downsampling)]
+            }
+    
+    # Timestamps are formatted once; series only hold indices into them
+    unit = "s" if not np.any(times.astype(np.int64) % 1000000) else "us"
+    timestamps = np.datetime_as_string(times, unit=unit).tolist()
+    point_count = sum(len(values) for _, values in series.values())
     
     output_data = {
         "startTime": start_time,
         "endTime": end_time,
-        "aggregation": aggregation,
-        "dataPoints": data_points,
-        "tags": {
+        "aggregation": aggregation
+    }
+    if output_format == "columnar":
+        output_data["tags"] = {
+            tag: {"timestamps": [timestamps[i] for i in indices.tolist()], "values": values.tolist()}
+            for tag, (indices, values) in series.items()
+        }
+    else:
+        output_data["tags"] = {
             tag: [
-                {"timestamp": dp["timestamp"], "value": dp["value"]}
-                for dp in data_points if dp["tag"] == tag
+                {"timestamp": timestamps[i], "value": value}
+                for i, value in zip(indices.tolist(), values.tolist())
             ]
-            for tag in tags
+            for tag, (indices, values) in series.items()
         }
-    }
+        # Interleaved by timestamp, then in tag order
+        tag_names = list(series)
+        tag_index = np.concatenate([np.full(len(indices), n) for n, (indices, _) in enumerate(series.values())])
+        time_index = np.concatenate([indices for indices, _ in series.values()])
+        positions = np.concatenate([np.arange(len(indices)) for indices, _ in series.values()])
+        order = np.lexsort((tag_index, time_index))
+        output_data["dataPoints"] = [
+            {"tag": tag_names[n], **output_data["tags"][tag_names[n]][position]}
+            for n, position in zip(tag_index[order].tolist(), positions[order].tolist())
+        ]
     
     return {
         "success": True,
-        "message": f"Queried {len(data_points)} historical data points for {len(tags)} tags",
+        "message": f"Queried {point_count} historical data points for {len(tags)} tags",
         "outputData": output_data,
         "metadata": {
             "connectionId": connection_id,
             "tagCount": len(tags),
-            "pointCount": len(data_points),
-            "aggregation": aggregation
+            "pointCount": point_count,
+            "rawPointCount": raw_count,
+            "aggregation": aggregation,
+            "outputFormat": output_format,
+            "downsampling": downsampling if point_count < raw_count else None
         }
     }
 
-@task(name="time_series_aggregator_node", retries=0)
+@task(name="time_series_aggregator_node", retries=0, cache_policy=NO_CACHE)
 async def handle_time_series_aggregator(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle Time-Series Aggregator node - aggregate time-series data"""
+    """Handle Time-Series Aggregator node - aggregate points into time windows (see tasks/time_series.py)"""
     config = node.get("config", {})
     aggregation_type = config.get("timeSeriesAggregationType", "avg")
     interval = config.get("timeSeriesInterval", "5m")
-    fields = config.get("timeSeriesFields", [])
     
     if not input_data:
         return {
@@ -790,49 +1179,9 @@ async def handle_time_series_aggregator(node: Dict, input_data: Optional[Dict] =
             "outputData": {}
         }
     
-    # TODO: Implement proper time-series aggregation
-    # For now, simple aggregation logic
-    import statistics
-    from datetime import datetime
-    
-    if isinstance(input_data, list):
-        # Aggregate array of data points
-        if not input_data:
-            return {
-                "success": True,
-                "message": "No data to aggregate",
-                "outputData": {}
-            }
-        
-        # Simple aggregation by field
-        aggregated = {}
-        for field in fields if fields else input_data[0].keys():
-            if field not in ["timestamp", "createdAt"]:
-                values = [float(item.get(field, 0)) for item in input_data if field in item]
-                if values:
-                    if aggregation_type == "avg":
-                        aggregated[field] = statistics.mean(values)
-                    elif aggregation_type == "min":
-                        aggregated[field] = min(values)
-                    elif aggregation_type == "max":
-                        aggregated[field] = max(values)
-                    elif aggregation_type == "sum":
-                        aggregated[field] = sum(values)
-                    elif aggregation_type == "count":
-                        aggregated[field] = len(values)
-        
-        return {
-            "success": True,
-            "message": f"Aggregated {len(input_data)} data points using {aggregation_type}",
-            "outputData": aggregated,
-            "metadata": {
-                "aggregationType": aggregation_type,
-                "interval": interval,
-                "inputCount": len(input_data)
-            }
-        }
-    else:
+    if isinstance(input_data, dict):
         # Single data point - return as-is
+        from datetime import datetime
         timestamp = input_data.get("timestamp", datetime.now().isoformat())
         output_data = {k: v for k, v in input_data.items() if k != "timestamp"}
         
@@ -849,12 +1198,120 @@ async def handle_time_series_aggregator(node: Dict, input_data: Optional[Dict] =
                 "interval": interval
             }
         }
+    
+    aggregations = parse_aggregations(config.get("timeSeriesAggregations") or aggregation_type)
+    group_by = parse_fields(config.get("timeSeriesGroupBy"))
+    window_type = config.get("timeSeriesWindowType", "tumbling")
+    size = parse_interval(interval)
+    # Sliding windows advance by half their length unless timeSeriesSlide says otherwise
+    slide = parse_interval(config.get("timeSeriesSlide") or size / 2) if window_type == "sliding" else None
+    
+    if isinstance(input_data, RecordStream):
+        sample = []
+        async for chunk in input_data:
+            sample = rows(chunk.slice(0, 100) if isinstance(chunk, RecordBatch) else chunk[:100])
+            break
+    else:
+        sample = input_data[:100]
+    if not sample:
+        return {
+            "success": True,
+            "message": "No data to aggregate",
+            "outputData": {}
+        }
+    
+    timestamp_field = config.get("timeSeriesTimestampField") or next((f for f in TIMESTAMP_FIELDS if f in sample[0]), None)
+    fields = parse_fields(config.get("timeSeriesFields")) or detect_fields(sample, exclude=[timestamp_field, *group_by, *TIMESTAMP_FIELDS])
+    
+    columns = SeriesColumns(timestamp_field, group_by, fields)
+    if isinstance(input_data, RecordStream):
+        async for chunk in input_data:
+            columns.add(chunk)
+    else:
+        columns.add(input_data)
+    timestamps = all_timestamps = columns.timestamps()
+    group_codes, group_keys = columns.group_codes()
+    values = columns.values()
+    if timestamp_field is None:
+        # No timestamps: one window per group over all points
+        size = slide = None
+    
+    workflow_id = (execution_context or {}).get("workflow_id")
+    incremental = None
+    state_id = None
+    cutoff = None
+    if config.get("timeSeriesIncremental") and size is not None and workflow_id:
+        state_id = state_key(workflow_id, node.get("id"), {
+            "interval": size, "slide": slide, "aggregations": aggregations,
+            "fields": fields, "groupBy": group_by, "timestampField": timestamp_field
+        })
+        state = await load_state(state_id)
+        incremental = {"since": None, "processedPoints": columns.count, "reset": state is not None}
+        if state:
+            older = timestamps < state["cutoff"]
+            if int(older.sum()) == state["olderCount"] and np.isclose(float(timestamps[older].sum()), state["olderSum"], rtol=1e-12):
+                # Windows before the cutoff were final and output by an earlier run:
+                # only the ones still open then and the new ones are aggregated
+                cutoff = state["cutoff"]
+                newer = ~older
+                timestamps, group_codes = timestamps[newer], group_codes[newer]
+                values = {field: column[newer] for field, column in values.items()}
+                incremental = {"since": iso_times(np.array([cutoff]))[0], "processedPoints": int(newer.sum()), "reset": False}
+    
+    result = aggregate_windows(timestamps, group_codes, values, aggregations, size, slide)
+    if cutoff is not None:
+        result = select_windows(result, result["start"] >= cutoff)
+    output = window_rows(result, group_by, group_keys, size, aggregations)
+    
+    if state_id is not None and np.any(~np.isnan(all_timestamps)):
+        new_cutoff = open_window_cutoff(float(np.nanmax(all_timestamps)), size, slide)
+        older = all_timestamps < new_cutoff
+        await save_state(state_id, {
+            "cutoff": new_cutoff,
+            "olderCount": int(older.sum()),
+            "olderSum": float(all_timestamps[older].sum())
+        })
+    
+    skipped = int(np.isnan(all_timestamps).sum()) if timestamp_field else 0
+    if size is None and not group_by:
+        # Whole-input aggregate: one value per field, as before windows existed
+        output = {k: v for k, v in output[0].items() if k != "pointCount"} if output else {}
+        message = f"Aggregated {columns.count} data points using {', '.join(aggregations)}"
+    else:
+        message = f"Aggregated {columns.count} data points into {len(output)} windows using {', '.join(aggregations)}"
+    
+    metadata = {
+        "aggregationType": aggregation_type,
+        "aggregations": aggregations,
+        "interval": interval,
+        "windowType": "sliding" if slide else "tumbling",
+        "timestampField": timestamp_field,
+        "groupBy": group_by,
+        "fields": fields,
+        "inputCount": columns.count,
+        "skippedPoints": skipped
+    }
+    if slide:
+        metadata["slideSeconds"] = slide
+    if incremental is not None:
+        metadata["incremental"] = incremental
+    
+    return {
+        "success": True,
+        "message": message,
+        "outputData": output,
+        "metadata": metadata
+    }
 
 # ==================== DATA SOURCE NODE HANDLERS ====================
 
 @task(name="fetch_data", retries=1)
 async def handle_fetch_data(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle fetchData node - fetch records from an entity"""
+    """
+    Handle fetchData node - fetch records from an entity (projection, filters,
+    order and limit run in SQL, see tasks/record_query.py). With fetchPageSize
+    the records stream in pages of that size instead of coming as one list.
+    """
     import aiosqlite
     
     config_data = node.get("config", {})
@@ -863,36 +1320,38 @@ async def handle_fetch_data(node: Dict, input_data: Optional[Dict] = None, execu
     if not entity_id:
         raise ValueError("No entity configured for fetchData node")
     
-    import config as cfg
-    default_db = cfg.DATABASE_PATH
+    default_db = config.DATABASE_PATH
     db_path = execution_context.get("db_path", default_db) if execution_context else default_db
     
+    page_size = int(config_data.get("fetchPageSize") or 0)
+    
     async with aiosqlite.connect(db_path) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT r.id, r.createdAt, rv.propertyId, rv.value
-            FROM records r
-            LEFT JOIN record_values rv ON r.id = rv.recordId
-            WHERE r.entityId = ?
-        """, [entity_id])
-        rows = await cursor.fetchall()
+        await ensure_record_indexes(db, db_path)
+        query = await plan_record_query(db, entity_id, config_data)
         
-        # Group by record
-        record_map = {}
-        for row in rows:
-            record_id = row['id']
-            if record_id not in record_map:
-                record_map[record_id] = {'id': record_id, 'createdAt': row['createdAt']}
-            if row['propertyId']:
-                record_map[record_id][row['propertyId']] = row['value']
-        
-        data = list(record_map.values())
+        if page_size <= 0:
+            data = []
+            async for page in query.pages(db, config.RECORD_STREAM_CHUNK_SIZE):
+                data.extend(page)
+            return {
+                "success": True,
+                "message": f"Fetched {len(data)} records",
+                "outputData": data,
+                "recordCount": len(data)
+            }
+        count = await query.count(db)
+    
+    # Paged on request: the flow runs the stream once (on its own connection) and keeps its pages
+    async def chunks():
+        async with aiosqlite.connect(db_path) as db:
+            async for page in query.pages(db, page_size):
+                yield RecordBatch.from_records(page) if config.RECORD_BATCH_COLUMNAR and is_table(page) else page
     
     return {
         "success": True,
-        "message": f"Fetched {len(data)} records",
-        "outputData": data,
-        "recordCount": len(data)
+        "message": f"Fetched {count} records",
+        "outputData": RecordStream(chunks, length=count),
+        "recordCount": count
     }
 
 @task(name="excel_input", retries=0)
@@ -907,11 +1366,11 @@ async def handle_excel_input(node: Dict, input_data: Optional[Dict] = None, exec
     if config_data.get("gcsPath"):
         from gcs_service import gcs_service
         
-        gcs_available = gcs_service.init()
+        gcs_available = await asyncio.to_thread(gcs_service.init)
         if not gcs_available:
             raise ValueError("Cloud storage not available for loading Excel data")
         
-        result = gcs_service.download_workflow_data(config_data["gcsPath"])
+        result = await asyncio.to_thread(gcs_service.download_workflow_data, config_data["gcsPath"])
         
         if not result["success"]:
             raise ValueError(f"Failed to load Excel data from cloud: {result['error']}")
@@ -948,98 +1407,84 @@ async def handle_pdf_input(node: Dict, input_data: Optional[Dict] = None, execut
     if config_data.get("gcsPath") and config_data.get("useGCS"):
         from gcs_service import gcs_service
         
-        gcs_available = gcs_service.init()
+        gcs_available = await asyncio.to_thread(gcs_service.init)
         if not gcs_available:
             raise ValueError("Cloud storage not available for loading PDF data")
         
-        result = gcs_service.download_workflow_data(config_data["gcsPath"])
+        result = await asyncio.to_thread(gcs_service.download_workflow_data, config_data["gcsPath"])
         
         if not result["success"]:
             raise ValueError(f"Failed to load PDF from cloud: {result['error']}")
         
         pdf_data = result["data"]
+        output_data = {
+            "text": pdf_data.get("text", ""),
+            "fileName": pdf_data.get("fileName", config_data.get("fileName")),
+            "pages": pdf_data.get("pages")
+        }
+        if isinstance(pdf_data.get("pageTexts"), list):
+            output_data["pageTexts"] = pdf_data["pageTexts"]
         return {
             "success": True,
             "message": f"Loaded PDF: {pdf_data.get('fileName', config_data.get('fileName', 'file'))} ({pdf_data.get('pages', '?')} pages) from GCS",
-            "outputData": {
-                "text": pdf_data.get("text", ""),
-                "fileName": pdf_data.get("fileName", config_data.get("fileName")),
-                "pages": pdf_data.get("pages")
-            },
+            "outputData": output_data,
             "source": "gcs"
         }
     
     # Fallback: use inline text (pdfText or parsedText)
     pdf_text = config_data.get("pdfText") or config_data.get("parsedText")
     if pdf_text:
+        output_data = {
+            "text": pdf_text,
+            "fileName": config_data.get("fileName"),
+            "pages": config_data.get("pages")
+        }
+        # Text of each page (PDFs parsed before pages were kept have none)
+        if isinstance(config_data.get("pageTexts"), list):
+            output_data["pageTexts"] = config_data["pageTexts"]
         return {
             "success": True,
             "message": f"Loaded PDF: {config_data.get('fileName', 'file')} ({config_data.get('pages', '?')} pages)",
-            "outputData": {
-                "text": pdf_text,
-                "fileName": config_data.get("fileName"),
-                "pages": config_data.get("pages")
-            },
+            "outputData": output_data,
             "source": "inline"
         }
     
     raise ValueError("No PDF data configured. Please upload a PDF file.")
 
-@task(name="save_records", retries=1)
+@task(name="save_records", retries=1, cache_policy=NO_CACHE)
 async def handle_save_records(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
-    """Handle saveRecords node - save data to database"""
+    """Handle saveRecords node - save data to database (batched writes, see tasks/record_writer.py)"""
     import aiosqlite
-    import uuid
-    from datetime import datetime
     
     config_data = node.get("config", {})
     table_name = config_data.get("tableName") or config_data.get("entityName", "saved_records")
-    mode = config_data.get("saveMode", "insert")
+    mode = parse_save_mode(config_data.get("saveMode"))
+    key_fields = parse_join_keys(config_data.get("saveKey")) or ["id"]
     
-    import config as cfg
-    default_db = cfg.DATABASE_PATH
+    default_db = config.DATABASE_PATH
     db_path = execution_context.get("db_path", default_db) if execution_context else default_db
-    
-    records = input_data if isinstance(input_data, list) else [input_data] if input_data else []
-    saved_ids = []
+    workflow_id = execution_context.get("workflow_id") if execution_context else None
+    execution_id = execution_context.get("execution_id") if execution_context else None
     
     async with aiosqlite.connect(db_path) as db:
-        # Create table if not exists
-        await db.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                id TEXT PRIMARY KEY,
-                data TEXT,
-                workflowId TEXT,
-                executionId TEXT,
-                createdAt TEXT,
-                updatedAt TEXT
-            )
-        """)
-        
-        now = datetime.now().isoformat()
-        workflow_id = execution_context.get("workflow_id") if execution_context else None
-        execution_id = execution_context.get("execution_id") if execution_context else None
-        
-        for record in records:
-            record_id = record.get("id") if isinstance(record, dict) else None
-            if not record_id:
-                record_id = str(uuid.uuid4())[:16]
-            
-            await db.execute(f"""
-                INSERT OR REPLACE INTO {table_name} (id, data, workflowId, executionId, createdAt, updatedAt)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, [record_id, json.dumps(record), workflow_id, execution_id, now, now])
-            
-            saved_ids.append(record_id)
-        
-        await db.commit()
+        writer = RecordWriter(db, table_name, mode, key_fields, workflow_id, execution_id, config.SAVE_RECORDS_BATCH_SIZE)
+        await writer.prepare(config.SAVE_RECORDS_SYNCHRONOUS)
+        if isinstance(input_data, RecordStream):
+            async for chunk in input_data:
+                await writer.write(rows(chunk))
+        else:
+            await writer.write(input_data if isinstance(input_data, list) else [input_data] if input_data else [])
     
+    stats = writer.stats()
+    rate = f", {stats['rowsPerSecond']} rows/s" if stats["rowsPerSecond"] else ""
+    skipped = f", {stats['skipped']} skipped" if stats["skipped"] else ""
     return {
         "success": True,
-        "message": f"Saved {len(saved_ids)} record(s) to '{table_name}'",
+        "message": f"Saved {len(writer.saved_ids)} record(s) to '{table_name}' ({mode}{skipped}{rate})",
         "outputData": input_data,
-        "savedIds": saved_ids,
-        "tableName": table_name
+        "savedIds": writer.saved_ids,
+        "tableName": table_name,
+        "saveStats": stats
     }
 
 # ==================== INTEGRATION NODE HANDLERS ====================
@@ -1055,7 +1500,7 @@ async def handle_mysql(node: Dict, input_data: Optional[Dict] = None, execution_
     if not query:
         raise ValueError("No query configured for MySQL node")
     
-    try:
+    def run_query():
         conn = mysql.connector.connect(
             host=config_data.get("mysqlHost", "localhost"),
             port=int(config_data.get("mysqlPort", 3306)),
@@ -1071,6 +1516,11 @@ async def handle_mysql(node: Dict, input_data: Optional[Dict] = None, execution_
         
         cursor.close()
         conn.close()
+        return rows
+    
+    try:
+        # The MySQL driver is blocking - keep it off the event loop
+        rows = await asyncio.to_thread(run_query)
         
         return {
             "success": True,
@@ -1111,10 +1561,14 @@ async def handle_send_email(node: Dict, input_data: Optional[Dict] = None, execu
         msg.attach(text_part)
         msg.attach(html_part)
         
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_user, email_to, msg.as_string())
+        def send():
+            with smtplib.SMTP(smtp_host, smtp_port) as server:
+                server.starttls()
+                server.login(smtp_user, smtp_pass)
+                server.sendmail(smtp_user, email_to, msg.as_string())
+        
+        # smtplib is blocking - keep it off the event loop
+        await asyncio.to_thread(send)
         
         return {
             "success": True,
@@ -1138,7 +1592,7 @@ async def handle_send_sms(node: Dict, input_data: Optional[Dict] = None, executi
         raise ValueError("SMS configuration incomplete. Please provide Twilio credentials and phone numbers.")
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_clients.session() as client:
             response = await client.post(
                 f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json",
                 auth=(account_sid, auth_token),
@@ -1186,7 +1640,7 @@ async def handle_esios(node: Dict, input_data: Optional[Dict] = None, execution_
         raise ValueError("No ESIOS archive ID configured")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             response = await client.get(
                 f"https://api.esios.ree.es/archives/{archive_id}/download",
                 headers={"Accept": "application/json"}
@@ -1216,7 +1670,7 @@ async def handle_climatiq(node: Dict, input_data: Optional[Dict] = None, executi
         raise ValueError("Climatiq API key not configured")
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             response = await client.get(
                 f"https://beta3.api.climatiq.io/search?query={query}",
                 headers={
@@ -1255,7 +1709,7 @@ async def handle_weather(node: Dict, input_data: Optional[Dict] = None, executio
         # Open-Meteo API - free, no API key required
         url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&daily=temperature_2m_max,temperature_2m_min,precipitation_sum,wind_speed_10m_max,weather_code&timezone=auto&start_date={date}&end_date={end_date}"
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             response = await client.get(url)
             response.raise_for_status()
             data = response.json()
@@ -1287,20 +1741,39 @@ async def handle_weather(node: Dict, input_data: Optional[Dict] = None, executio
     except Exception as e:
         raise ValueError(f"Weather request failed: {str(e)}")
 
-@task(name="split_columns", retries=0)
+@task(name="split_columns", retries=0, cache_policy=NO_CACHE)
 async def handle_split_columns(node: Dict, input_data: Optional[Dict] = None, execution_context: Optional[Dict] = None) -> Dict:
     """Handle split columns node - split data into two outputs"""
     config_data = node.get("config", {})
     columns_a = config_data.get("columnsOutputA", [])
     columns_b = config_data.get("columnsOutputB", [])
     
-    if not isinstance(input_data, list):
+    if not isinstance(input_data, (list, RecordStream)):
         return {
             "success": True,
             "message": "No array data to split",
             "outputData": input_data
         }
     
+    if isinstance(input_data, RecordStream):
+        def select(columns):
+            def select_chunk(chunk):
+                if isinstance(chunk, RecordBatch):
+                    return chunk.select(columns)
+                return [{col: record[col] for col in columns if col in record} for record in chunk]
+            return select_chunk
+        
+        output_a = input_data.map_chunks(select(columns_a))
+        output_b = input_data.map_chunks(select(columns_b))
+        
+        return {
+            "success": True,
+            "message": f"Split into {len(columns_a)} and {len(columns_b)} columns",
+            "outputData": output_a,
+            "outputA": output_a,
+            "outputB": output_b
+        }
+    
     output_a = []
     output_b = []
     
@@ -1394,7 +1867,7 @@ async def handle_send_discord(node: Dict, input_data: Optional[Dict] = None, exe
         payload["embeds"] = [embed]
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             response = await client.post(
                 webhook_url,
                 json=payload,
@@ -1463,7 +1936,7 @@ async def handle_send_teams(node: Dict, input_data: Optional[Dict] = None, execu
             payload["sections"][0]["facts"] = facts[:10]
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             response = await client.post(
                 webhook_url,
                 json=payload,
@@ -1497,7 +1970,7 @@ async def handle_google_sheets(node: Dict, input_data: Optional[Dict] = None, ex
     base_url = "https://sheets.googleapis.com/v4/spreadsheets"
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             if operation == "read":
                 # Read data from sheet
                 url = f"{base_url}/{spreadsheet_id}/values/{sheet_range}"
@@ -1607,7 +2080,7 @@ async def handle_send_telegram(node: Dict, input_data: Optional[Dict] = None, ex
                 message = message.replace(placeholder, str(value))
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
             payload = {
                 "chat_id": chat_id,
@@ -1684,7 +2157,7 @@ async def handle_send_slack(node: Dict, input_data: Optional[Dict] = None, execu
             }]
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session(timeout=30.0) as client:
             response = await client.post(
                 webhook_url,
                 json=payload,
@@ -0,0 +1,386 @@
+"""
+Compiled predicates for the condition node
+
+A condition config is compiled once into a Predicate instead of dispatching
+on the operator string (and re-parsing the expected value) for every record.
+The rule is the node's conditionField/conditionOperator/conditionValue plus
+its additionalConditions, combined with logicalOperator (AND/OR). An entry of
+additionalConditions can itself be a group:
+
+    {"logicalOperator": "OR", "conditions": [{"field": ..., "operator": ..., "value": ...}, ...]}
+
+Comparisons are typed: numbers compare numerically when the expected value
+is numeric (also against numeric strings), booleans against "true"/"false",
+dates (ISO strings, datetimes or epoch seconds/milliseconds) as points in
+time, and everything else as strings. A value that can't be compared (e.g.
+a word against `greaterThan 5`) doesn't match instead of failing the node.
+
+For RecordBatch chunks, leaves over numeric and boolean columns are
+evaluated as whole-column NumPy operations; other columns fall back to the
+compiled per-value test.
+"""
+import math
+import operator
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tasks.columnar import RecordBatch
+
+# Operator names used by the condition modal (snake_case) and other editors
+_OPERATOR_ALIASES = {
+    "not_equals": "notEquals",
+    "not_contains": "notContains",
+    "greater_than": "greaterThan",
+    "less_than": "lessThan",
+    "greater_or_equal": "greaterOrEqual",
+    "less_or_equal": "lessOrEqual",
+    "starts_with": "startsWith",
+    "ends_with": "endsWith",
+    "is_empty": "isEmpty",
+    "is_not_empty": "isNotEmpty",
+    "not_in": "notIn",
+    "regex": "matches",
+    "==": "equals",
+    "!=": "notEquals",
+    ">": "greaterThan",
+    "<": "lessThan",
+    ">=": "greaterOrEqual",
+    "<=": "lessOrEqual",
+}
+
+OPERATORS = {
+    "equals", "notEquals", "contains", "notContains", "startsWith", "endsWith",
+    "greaterThan", "lessThan", "greaterOrEqual", "lessOrEqual",
+    "isEmpty", "isNotEmpty", "in", "notIn", "matches", "before", "after",
+}
+
+_ORDERINGS = {
+    "greaterThan": operator.gt,
+    "lessThan": operator.lt,
+    "greaterOrEqual": operator.ge,
+    "lessOrEqual": operator.le,
+    "after": operator.gt,
+    "before": operator.lt,
+}
+
+# Epoch numbers above this are taken as milliseconds
+_EPOCH_MS_THRESHOLD = 1e11
+
+Test = Callable[[Any], bool]
+
+
+def _number(value: Any) -> Optional[float]:
+    """Float value of a number or numeric string, None otherwise (NaN and booleans included)"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and math.isnan(value) else float(value)
+    if isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return None
+        return None if math.isnan(number) else number
+    return None
+
+
+def _boolean(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    return None
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds of a datetime, date, ISO string or epoch number (naive times are UTC)"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value / 1000 if abs(value) > _EPOCH_MS_THRESHOLD else float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            value = datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith("Z") else text)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp()
+    return None
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, (list, dict)) and not value)
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+class _Leaf:
+    """One compiled `field operator value` comparison"""
+
+    def __init__(self, field: Optional[str], op: str, expected: Any):
+        op = _OPERATOR_ALIASES.get(op, op or "equals")
+        # Unknown operators behave like equals, as they always have
+        self.operator = op if op in OPERATORS else "equals"
+        self.field = field
+        self.expected = expected
+        self.test = self._compile()
+
+    def record_test(self) -> Callable[[Dict], bool]:
+        field = self.field
+        test = self.test
+        return lambda record: test(record.get(field))
+
+    def describe(self) -> str:
+        if self.operator in ("isEmpty", "isNotEmpty"):
+            return f"{self.field} {self.operator}"
+        return f"{self.field} {self.operator} {self.expected}"
+
+    def _compile(self) -> Test:
+        op = self.operator
+        expected = self.expected
+
+        if op in ("equals", "notEquals"):
+            test = self._equality(expected)
+            return test if op == "equals" else (lambda actual: not test(actual))
+
+        if op in ("contains", "notContains", "startsWith", "endsWith"):
+            text = _text(expected)
+            if op == "contains":
+                return lambda actual: text in _text(actual)
+            if op == "notContains":
+                return lambda actual: text not in _text(actual)
+            if op == "startsWith":
+                return lambda actual: _text(actual).startswith(text)
+            return lambda actual: _text(actual).endswith(text)
+
+        if op in ("isEmpty", "isNotEmpty"):
+            return _is_empty if op == "isEmpty" else (lambda actual: not _is_empty(actual))
+
+        if op in ("in", "notIn"):
+            test = self._membership(expected)
+            return test if op == "in" else (lambda actual: not test(actual))
+
+        if op == "matches":
+            try:
+                pattern = re.compile(_text(expected))
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression {expected!r}: {e}")
+            return lambda actual: actual is not None and pattern.search(str(actual)) is not None
+
+        compare = _ORDERINGS[op]
+        if op in ("before", "after"):
+            threshold = _timestamp(expected)
+            if threshold is None:
+                raise ValueError(f"Condition '{op}' needs a date, got {expected!r}")
+
+            def test(actual):
+                moment = _timestamp(actual)
+                return moment is not None and compare(moment, threshold)
+            return test
+
+        threshold = _number(expected)
+        if threshold is not None:
+            def test(actual):
+                if type(actual) is int or type(actual) is float:
+                    return compare(actual, threshold)
+                number = _number(actual)
+                return number is not None and compare(number, threshold)
+            return test
+        moment = _timestamp(expected)
+        if moment is not None:
+            def test(actual):
+                other = _timestamp(actual)
+                return other is not None and compare(other, moment)
+            return test
+        text = _text(expected)
+        return lambda actual: isinstance(actual, str) and compare(actual, text)
+
+    @staticmethod
+    def _equality(expected: Any) -> Test:
+        number = _number(expected)
+        flag = _boolean(expected)
+        text = _text(expected)
+        empty = expected is None or expected == ""
+
+        def test(actual):
+            if type(actual) is str:
+                return actual == text
+            if actual is None:
+                return empty
+            if isinstance(actual, bool):
+                return actual == flag if flag is not None else str(actual) == text
+            if isinstance(actual, (int, float)):
+                return number is not None and actual == number
+            return str(actual) == text
+        return test
+
+    @staticmethod
+    def _membership(expected: Any) -> Test:
+        items = expected if isinstance(expected, (list, tuple, set)) else _text(expected).split(",")
+        texts = {str(item).strip() if isinstance(item, str) else str(item) for item in items}
+        numbers = {number for number in map(_number, items) if number is not None}
+
+        def test(actual):
+            if actual is None:
+                return False
+            if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+                return actual in numbers
+            return str(actual) in texts
+        return test
+
+    def column_mask(self, batch: RecordBatch) -> np.ndarray:
+        column = batch.columns.get(self.field)
+        if column is None:
+            return np.full(len(batch), bool(self.test(None)))
+        present = batch.present.get(self.field)
+        vector = self._vectorized(column) if column.dtype.kind in "biuf" else None
+        if vector is None:
+            values = batch.values(self.field)
+            return np.fromiter(map(self.test, values), dtype=bool, count=len(batch))
+        if present is not None:
+            vector = np.where(present, vector, bool(self.test(None)))
+        return vector
+
+    def _vectorized(self, column: np.ndarray) -> Optional[np.ndarray]:
+        """Whole-column result for a numeric/boolean column, None if the operator needs per-value tests"""
+        op = self.operator
+        expected = self.expected
+        if column.dtype.kind == "b":
+            if op in ("equals", "notEquals"):
+                flag = _boolean(expected)
+                if flag is not None:
+                    equal = column == flag
+                else:
+                    text = _text(expected)
+                    equal = np.where(column, text == "True", text == "False")
+                return equal if op == "equals" else ~equal
+            if op in ("isEmpty", "isNotEmpty"):
+                return np.full(len(column), op == "isNotEmpty")
+            return None
+
+        if op in ("equals", "notEquals"):
+            number = _number(expected)
+            equal = column == number if number is not None else np.zeros(len(column), dtype=bool)
+            return equal if op == "equals" else ~equal
+        if op in ("isEmpty", "isNotEmpty"):
+            return np.full(len(column), op == "isNotEmpty")
+        if op in ("in", "notIn"):
+            items = expected if isinstance(expected, (list, tuple, set)) else _text(expected).split(",")
+            numbers = [number for number in map(_number, items) if number is not None]
+            member = np.isin(column, numbers)
+            return member if op == "in" else ~member
+        if op in ("before", "after"):
+            threshold = _timestamp(expected)
+            seconds = column.astype(np.float64)
+            seconds = np.where(np.abs(seconds) > _EPOCH_MS_THRESHOLD, seconds / 1000, seconds)
+            return _ORDERINGS[op](seconds, threshold)
+        if op in _ORDERINGS:
+            threshold = _number(expected)
+            if threshold is None:
+                return None
+            # NaN compares False, like a value that can't be compared
+            return _ORDERINGS[op](column, threshold)
+        return None
+
+
+class _Group:
+    """AND/OR combination of leaves and groups"""
+
+    def __init__(self, logic: str, children: List[Any]):
+        self.logic = "OR" if str(logic).upper() == "OR" else "AND"
+        self.children = children
+        self.test = self._compile()
+
+    def _compile(self) -> Callable[[Dict], bool]:
+        # Chained closures short-circuit without a generator per record
+        def both(first, second):
+            return lambda record: first(record) and second(record)
+
+        def either(first, second):
+            return lambda record: first(record) or second(record)
+
+        combine = both if self.logic == "AND" else either
+        tests = [child.record_test() for child in self.children]
+        test = tests[0]
+        for other in tests[1:]:
+            test = combine(test, other)
+        return test
+
+    def record_test(self) -> Callable[[Dict], bool]:
+        return self.test
+
+    def describe(self) -> str:
+        parts = [child.describe() if isinstance(child, _Leaf) else f"({child.describe()})" for child in self.children]
+        return f" {self.logic} ".join(parts)
+
+    def column_mask(self, batch: RecordBatch) -> np.ndarray:
+        masks = [child.column_mask(batch) for child in self.children]
+        if len(masks) == 1:
+            return masks[0]
+        return np.logical_and.reduce(masks) if self.logic == "AND" else np.logical_or.reduce(masks)
+
+
+def _compile_rule(rule: Dict) -> Optional[Any]:
+    if isinstance(rule.get("conditions"), list):
+        children = [child for child in map(_compile_rule, rule["conditions"]) if child is not None]
+        return _Group(rule.get("logicalOperator", "AND"), children) if children else None
+    field = rule.get("field")
+    if not field:
+        return None
+    return _Leaf(field, rule.get("operator", "equals"), rule.get("value"))
+
+
+class Predicate:
+    """A condition node's compiled rule"""
+
+    def __init__(self, root: Any):
+        self.root = root
+        self._test = root.record_test()
+
+    def __call__(self, record: Any) -> bool:
+        return self._test(record if isinstance(record, dict) else {})
+
+    def describe(self) -> str:
+        return self.root.describe()
+
+    def mask(self, chunk: Any) -> np.ndarray:
+        """Per-row results of a list or RecordBatch chunk"""
+        if isinstance(chunk, RecordBatch):
+            return self.root.column_mask(chunk)
+        return np.fromiter(map(self._test, chunk), dtype=bool, count=len(chunk))
+
+    def partition(self, records: Sequence[Any]) -> Tuple[List, List]:
+        """(matching, non-matching) records in a single pass"""
+        true_records, false_records = [], []
+        keep, drop = true_records.append, false_records.append
+        if isinstance(self.root, _Leaf):
+            # Single comparison: test the field value without the per-record wrapper
+            field, test = self.root.field, self.root.test
+            for record in records:
+                (keep if test(record.get(field)) else drop)(record)
+        else:
+            test = self._test
+            for record in records:
+                (keep if test(record) else drop)(record)
+        return true_records, false_records
+
+
+def compile_condition(config: Dict) -> Predicate:
+    """Compile a condition node's config (raises ValueError for invalid rules, e.g. a bad regex)"""
+    leaf = _Leaf(config.get("conditionField"), config.get("conditionOperator", "equals"), config.get("conditionValue"))
+    extra = [rule for rule in map(_compile_rule, config.get("additionalConditions") or []) if rule is not None]
+    if not extra:
+        return Predicate(leaf)
+    return Predicate(_Group(config.get("logicalOperator", "AND"), [leaf] + extra))
@@ -0,0 +1,87 @@
+"""
+Token-bucket rate limiting for nodes that call external APIs
+
+A TokenBucket refills `rate` tokens per second up to `capacity`. Callers
+reserve tokens with `acquire(n)`; when the bucket is short the balance goes
+negative and the caller sleeps until its reservation is covered, so waiting
+callers are served in order without a lock. `adjust()` settles a reservation
+once the real cost is known (e.g. tokens used by an LLM call).
+
+`retry_delay()` is the backoff used by callers retrying 429/5xx responses.
+
+Buckets are shared process-wide by key (`shared_bucket("http:api.example.com",
+...)`), so concurrent nodes calling the same API draw from one budget.
+"""
+import asyncio
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second, holds at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity if capacity is not None else rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens now; returns the seconds to wait before using them"""
+        self._refill()
+        # Requests larger than the bucket would never fit; they wait for a full bucket
+        tokens = min(tokens, self.capacity)
+        self.tokens -= tokens
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """Wait until `tokens` are available; returns the seconds waited"""
+        delay = max(self.paused_until - time.monotonic(), 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return delay + wait
+
+    def adjust(self, tokens: float):
+        """Take (or give back, if negative) tokens after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - tokens)
+
+    def pause(self, seconds: float):
+        """Admit nothing for `seconds` (e.g. after a 429 with Retry-After); the saved-up tokens are kept"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_buckets: Dict[str, Tuple[float, float, TokenBucket]] = {}
+
+
+def shared_bucket(key: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """The process-wide bucket for `key` (recreated when its rate or capacity changes)"""
+    entry = _buckets.get(key)
+    if entry is None or entry[0] != rate or entry[1] != capacity:
+        entry = _buckets[key] = (rate, capacity, TokenBucket(rate, capacity))
+    return entry[2]
+
+
+def retry_delay(response, attempt: int, cap: float = 60.0) -> float:
+    """Seconds to wait before retrying: the response's Retry-After, or exponential backoff with jitter"""
+    headers = response.headers if response is not None else {}
+    for header, scale in (("retry-after-ms", 0.001), ("Retry-After", 1.0)):
+        value = headers.get(header)
+        if value:
+            try:
+                return min(max(float(value) * scale, 0.0), cap)
+            except ValueError:
+                pass
+    return min(0.5 * 2 ** attempt, cap / 2) * (0.5 + random.random() / 2)
@@ -0,0 +1,249 @@
+"""
+SQL queries over entity records for the fetchData node
+
+Entity records are stored one row per value (`record_values`). Instead of
+pulling every value of an entity and pivoting in Python, the query pivots in
+SQL (one `MAX(CASE ...)` column per property) and pushes down:
+
+- projection: `fetchProperties`, the properties to return (ids or names;
+  default all of them)
+- filters: `fetchFilters`, a list of {"property", "operator", "value"}
+  combined with AND; numeric properties (and numeric filter values)
+  compare as numbers
+- ordering: `fetchOrderBy` (a property, "id" or "createdAt") and
+  `fetchOrderDirection` ("asc"/"desc")
+- `fetchLimit`
+
+Records keep the original shape, {"id", "createdAt", <propertyId>: value}
+with a key for every value row of the record (NULL values and values of
+properties that were deleted included): each record's values are collected
+into one JSON object in SQL; only the properties used by filters and ordering
+are pivoted into columns. Rows are read from the cursor page by page.
+"""
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# Filter operators and their SQL; the names match the condition node's
+_COMPARISONS = {
+    "equals": "=",
+    "notEquals": "!=",
+    "greaterThan": ">",
+    "lessThan": "<",
+    "greaterOrEqual": ">=",
+    "lessOrEqual": "<=",
+}
+_OPERATOR_ALIASES = {
+    "not_equals": "notEquals",
+    "greater_than": "greaterThan",
+    "less_than": "lessThan",
+    "greater_or_equal": "greaterOrEqual",
+    "less_or_equal": "lessOrEqual",
+    "starts_with": "startsWith",
+    "ends_with": "endsWith",
+    "not_contains": "notContains",
+    "is_empty": "isEmpty",
+    "is_not_empty": "isNotEmpty",
+    "not_in": "notIn",
+}
+
+# Databases (by path) whose record indexes were already ensured by this process
+_indexed_databases = set()
+
+
+async def ensure_record_indexes(db, db_path: str):
+    """Create the indexes record queries rely on (the Node.js backend creates them too)"""
+    if db_path in _indexed_databases:
+        return
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_records_entity ON records(entityId)")
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_record_values_record_property ON record_values(recordId, propertyId)")
+    await db.commit()
+    _indexed_databases.add(db_path)
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return not math.isnan(value)
+    try:
+        return not math.isnan(float(str(value).strip()))
+    except ValueError:
+        return False
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _list(value: Any) -> List[Any]:
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [item.strip() for item in str(value or "").split(",") if item.strip()]
+
+
+class RecordQuery:
+    """A compiled fetchData query: SQL, parameters and the projected properties (None = all)"""
+
+    def __init__(self, sql: str, params: List[Any], count_sql: str, count_params: List[Any], columns: Optional[List[str]], limit: Optional[int]):
+        self.sql = sql
+        self.params = params
+        self.count_sql = count_sql
+        self.count_params = count_params
+        self.columns = columns
+        self.limit = limit
+
+    def record(self, row: Tuple) -> Dict:
+        """Result row -> record dict"""
+        record = {"id": row[0], "createdAt": row[1]}
+        values = json.loads(row[2])
+        if self.columns is None:
+            record.update(values)
+        else:
+            record.update((name, values[name]) for name in self.columns if name in values)
+        return record
+
+    async def count(self, db) -> int:
+        cursor = await db.execute(self.count_sql, self.count_params)
+        total = (await cursor.fetchone())[0]
+        return min(total, self.limit) if self.limit is not None else total
+
+    async def pages(self, db, page_size: int):
+        """Lists of records, `page_size` rows at a time"""
+        async with db.execute(self.sql, self.params) as cursor:
+            while True:
+                page = await cursor.fetchmany(page_size)
+                if not page:
+                    return
+                yield [self.record(row) for row in page]
+
+
+async def plan_record_query(db, entity_id: str, options: Dict) -> RecordQuery:
+    """Build the query for a fetchData node's config (raises ValueError for unknown properties or operators)"""
+    cursor = await db.execute("SELECT id, name, type FROM properties WHERE entityId = ?", [entity_id])
+    properties = await cursor.fetchall()
+    by_id = {row[0]: row for row in properties}
+    by_name = {row[1]: row for row in properties if row[1]}
+
+    def resolve(reference: Any) -> str:
+        """Property id for an id or a name (ids of values without a property row are kept)"""
+        reference = str(reference)
+        if reference in by_id:
+            return reference
+        if reference in by_name:
+            return by_name[reference][0]
+        return reference
+
+    def is_numeric_property(property_id: str) -> bool:
+        row = by_id.get(property_id)
+        return bool(row) and str(row[2] or "").lower() in ("number", "numeric", "integer", "float", "decimal")
+
+    selected = [resolve(reference) for reference in _list(options.get("fetchProperties"))]
+    columns = list(dict.fromkeys(selected)) or None
+
+    # Properties filters and ordering use (returned or not), one column each
+    pivoted: List[str] = []
+
+    def column_expression(reference: Any) -> str:
+        if reference in ("id", "createdAt"):
+            return f"r.{reference}"
+        property_id = resolve(reference)
+        if property_id not in pivoted:
+            pivoted.append(property_id)
+        return f"p{pivoted.index(property_id)}"
+
+    conditions: List[str] = []
+    condition_params: List[Any] = []
+    for rule in options.get("fetchFilters") or []:
+        reference = rule.get("property") or rule.get("field")
+        if not reference:
+            continue
+        operator = rule.get("operator", "equals")
+        operator = _OPERATOR_ALIASES.get(operator, operator)
+        value = rule.get("value")
+        column = column_expression(reference)
+        numeric = reference not in ("id", "createdAt") and (is_numeric_property(resolve(reference)) or _is_number(value))
+
+        if operator in _COMPARISONS:
+            if numeric and _is_number(value):
+                conditions.append(f"CAST({column} AS REAL) {_COMPARISONS[operator]} ?")
+                condition_params.append(float(value))
+            else:
+                conditions.append(f"{column} {_COMPARISONS[operator]} ?")
+                condition_params.append(str(value))
+            if operator == "notEquals":
+                conditions[-1] = f"({conditions[-1]} OR {column} IS NULL)"
+        elif operator in ("contains", "notContains", "startsWith", "endsWith"):
+            text = _escape_like(str(value if value is not None else ""))
+            pattern = {"contains": f"%{text}%", "notContains": f"%{text}%", "startsWith": f"{text}%", "endsWith": f"%{text}"}[operator]
+            if operator == "notContains":
+                conditions.append(f"({column} IS NULL OR {column} NOT LIKE ? ESCAPE '\\')")
+            else:
+                conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+            condition_params.append(pattern)
+        elif operator in ("in", "notIn"):
+            items = [str(item) for item in _list(value)]
+            if not items:
+                conditions.append("0" if operator == "in" else "1")
+                continue
+            placeholders = ", ".join("?" for _ in items)
+            if operator == "in":
+                conditions.append(f"{column} IN ({placeholders})")
+            else:
+                conditions.append(f"({column} IS NULL OR {column} NOT IN ({placeholders}))")
+            condition_params.extend(items)
+        elif operator == "isEmpty":
+            conditions.append(f"({column} IS NULL OR {column} = '')")
+        elif operator == "isNotEmpty":
+            conditions.append(f"({column} IS NOT NULL AND {column} != '')")
+        else:
+            raise ValueError(f"Unsupported fetchData filter operator: {operator}")
+
+    order_by = options.get("fetchOrderBy")
+    order = ""
+    if order_by:
+        direction = "DESC" if str(options.get("fetchOrderDirection", "asc")).lower() == "desc" else "ASC"
+        column = column_expression(order_by)
+        if order_by not in ("id", "createdAt") and is_numeric_property(resolve(order_by)):
+            column = f"CAST({column} AS REAL)"
+        # Records without the property go last, as in most UIs
+        order = f"ORDER BY {column} IS NULL, {column} {direction}, r.rowid"
+
+    limit = options.get("fetchLimit")
+    limit = int(limit) if limit not in (None, "") and int(limit) >= 0 else None
+
+    # One value column per pivoted property: MAX ignores the NULLs of the other
+    # properties' rows. Grouping by rowid walks idx_records_entity in insertion
+    # order, so unordered queries need no sort and return records in the order
+    # they were created
+    pivot = "".join(
+        f",\n                   MAX(CASE WHEN rv.propertyId = ? THEN rv.value END) AS p{index}"
+        for index in range(len(pivoted))
+    )
+    if columns is None:
+        # Without a projection every value of the record is read, which is
+        # cheaper than one index search per property
+        value_filter, value_params = "", []
+    else:
+        read = list(dict.fromkeys(columns + pivoted))
+        value_filter, value_params = f"AND rv.propertyId IN ({', '.join('?' for _ in read)})", read
+    having = f"HAVING {' AND '.join(conditions)}" if conditions else ""
+    grouped = f"""
+            SELECT r.id, r.createdAt,
+                   json_group_object(rv.propertyId, rv.value) FILTER (WHERE rv.propertyId != '') AS record_values{pivot}
+            FROM records r
+            LEFT JOIN record_values rv ON rv.recordId = r.id {value_filter}
+            WHERE r.entityId = ?
+            GROUP BY r.rowid
+            {having}
+    """
+    grouped_params = list(pivoted) + value_params + [entity_id] + condition_params
+
+    sql = grouped + order + (" LIMIT ?" if limit is not None else "")
+    params = grouped_params + ([limit] if limit is not None else [])
+    if conditions:
+        count_sql, count_params = f"SELECT COUNT(*) FROM ({grouped})", grouped_params
+    else:
+        count_sql, count_params = "SELECT COUNT(*) FROM records WHERE entityId = ?", [entity_id]
+
+    return RecordQuery(sql, params, count_sql, count_params, columns, limit)
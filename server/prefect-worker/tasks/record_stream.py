@@ -0,0 +1,265 @@
+"""
+Chunked record streams for row-wise transform nodes
+
+Row-wise nodes (condition, addField, splitColumns, join) and the
+timeSeriesAggregator pass large record sets to each other as a RecordStream instead of a materialized list
+(fetchData produces one for large results, saveRecords writes one chunk by chunk). A stream
+is a lazy sequence of bounded chunks: every transform wraps its input stream
+and processes one chunk at a time, so a chain of transforms holds at most one
+chunk per node in memory instead of a full copy of the dataset per node.
+Nodes that need the whole dataset call `collect()`.
+
+Chunks are columnar RecordBatches (tasks/columnar.py) when the records are
+plain dicts and RECORD_BATCH_COLUMNAR is on, and lists of dicts otherwise;
+consumers must accept both.
+
+Streams are re-iterable: each iteration recomputes the chunks from the source.
+The optimized flow runs every stream a node outputs exactly once, inside that
+node (`cache_streams`), so the node's duration and errors are its own and
+children read the kept chunks instead of recomputing the upstream chain. The
+flow drops the chunks once every child has read them. Execution logs store a
+stream or batch as its row count and a few sample records (`describe_streams`);
+only results leaving the worker are converted to records (`records_for_json`).
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+import config
+from tasks.columnar import RecordBatch, is_table, rows
+
+# A list of records or a RecordBatch
+Chunk = Union[List[Dict], RecordBatch]
+
+
+class RecordStream:
+    """Lazy, re-iterable sequence of record chunks"""
+
+    def __init__(self, chunks: Callable[[], AsyncIterator[Chunk]], length: Optional[int] = None):
+        self._chunks = chunks
+        # Row count when known without iterating (None after filters)
+        self.length = length
+        # Chunks held in memory (streams built by from_chunks / cache)
+        self.cached: Optional[List[Chunk]] = None
+
+    @classmethod
+    def from_records(
+        cls,
+        records: List[Dict],
+        chunk_size: Optional[int] = None,
+        columnar: Optional[bool] = None
+    ) -> "RecordStream":
+        """Stream an existing list in chunks, converted to RecordBatches as they are read"""
+        chunk_size = chunk_size or config.RECORD_STREAM_CHUNK_SIZE
+        columnar = config.RECORD_BATCH_COLUMNAR if columnar is None else columnar
+
+        async def chunks():
+            for start in range(0, len(records), chunk_size):
+                chunk = records[start:start + chunk_size]
+                yield RecordBatch.from_records(chunk) if columnar and is_table(chunk) else chunk
+                # Let other nodes run between chunks
+                await asyncio.sleep(0)
+
+        return cls(chunks, length=len(records))
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Chunk]) -> "RecordStream":
+        """Stream chunks that are already in memory"""
+        async def iterate():
+            for chunk in chunks:
+                yield chunk
+                await asyncio.sleep(0)
+
+        stream = cls(iterate, length=sum(len(chunk) for chunk in chunks))
+        stream.cached = chunks
+        return stream
+
+    @classmethod
+    def from_batch(cls, batch: RecordBatch, chunk_size: Optional[int] = None) -> "RecordStream":
+        """Stream a RecordBatch in chunks (views, nothing is copied)"""
+        chunk_size = chunk_size or config.RECORD_STREAM_CHUNK_SIZE
+
+        async def chunks():
+            for start in range(0, len(batch), chunk_size):
+                yield batch.slice(start, start + chunk_size)
+                await asyncio.sleep(0)
+
+        return cls(chunks, length=len(batch))
+
+    @classmethod
+    def concat(cls, *streams: "RecordStream") -> "RecordStream":
+        """Stream the records of several streams one after another"""
+        async def chunks():
+            for stream in streams:
+                async for chunk in stream:
+                    yield chunk
+
+        lengths = [stream.length for stream in streams]
+        return cls(chunks, length=None if None in lengths else sum(lengths))
+
+    def __aiter__(self) -> AsyncIterator[Chunk]:
+        return self._chunks()
+
+    def map_chunks(self, fn: Callable[[Chunk], Chunk], preserves_length: bool = True) -> "RecordStream":
+        """Lazily apply `fn` to every chunk; empty result chunks are dropped"""
+        async def chunks():
+            async for chunk in self:
+                out = fn(chunk)
+                if out:
+                    yield out
+
+        return RecordStream(chunks, length=self.length if preserves_length else None)
+
+    def map(self, fn: Callable[[Dict], Dict]) -> "RecordStream":
+        """Lazily apply `fn` to every record (batch chunks are converted to records)"""
+        return self.map_chunks(lambda chunk: [fn(record) for record in rows(chunk)])
+
+    def filter(self, predicate: Callable[[Dict], Any]) -> "RecordStream":
+        """Lazily keep the records matching `predicate` (batch chunks are converted to records)"""
+        return self.map_chunks(
+            lambda chunk: [record for record in rows(chunk) if predicate(record)],
+            preserves_length=False
+        )
+
+    async def first(self) -> Optional[Dict]:
+        """First record, without reading the rest of the stream"""
+        async for chunk in self:
+            return chunk.row(0) if isinstance(chunk, RecordBatch) else chunk[0]
+        return None
+
+    async def count(self) -> int:
+        """Number of records (iterates the stream unless the length is known)"""
+        if self.length is not None:
+            return self.length
+        total = 0
+        async for chunk in self:
+            total += len(chunk)
+        return total
+
+    async def collect(self) -> List[Dict]:
+        """Materialize the stream into a list"""
+        records = []
+        async for chunk in self:
+            records.extend(rows(chunk))
+        return records
+
+    async def cache(self) -> "RecordStream":
+        """Run the stream once and return a stream over the chunks it produced"""
+        if self.cached is not None:
+            return self
+        return RecordStream.from_chunks([chunk async for chunk in self])
+
+    def to_records(self) -> List[Dict]:
+        """Records of a cached stream"""
+        return [record for chunk in self.cached for record in rows(chunk)]
+
+    def describe(self, sample_rows: int = 0) -> Dict:
+        """JSON-safe summary used in logs: row count and, once cached, the first `sample_rows` records"""
+        summary = {"$recordStream": True, "rowCount": self.length}
+        if sample_rows > 0 and self.cached is not None:
+            sample = []
+            for chunk in self.cached:
+                if len(sample) >= sample_rows:
+                    break
+                head = sample_rows - len(sample)
+                sample.extend(chunk.slice(0, head).to_records() if isinstance(chunk, RecordBatch) else chunk[:head])
+            summary["sample"] = sample
+        return summary
+
+
+def to_stream(value: Any, min_rows: Optional[int] = None) -> Any:
+    """
+    Wrap RecordBatches and large record lists (top level or one level inside
+    a dict, e.g. inputA/inputB of a join) in streams. Everything else is
+    returned as is.
+    """
+    min_rows = config.RECORD_STREAM_MIN_ROWS if min_rows is None else min_rows
+
+    def streamable(v):
+        return isinstance(v, RecordBatch) or (min_rows > 0 and isinstance(v, list) and len(v) >= min_rows)
+
+    if isinstance(value, RecordBatch):
+        return RecordStream.from_batch(value)
+    if streamable(value):
+        return RecordStream.from_records(value)
+    if isinstance(value, dict) and any(streamable(v) for v in value.values()):
+        return {k: to_stream(v, min_rows) if streamable(v) else v for k, v in value.items()}
+    return value
+
+
+async def materialize(value: Any) -> Any:
+    """Collect streams and batches (top level or one level inside a dict) into lists of dicts"""
+    if isinstance(value, RecordStream):
+        return await value.collect()
+    if isinstance(value, RecordBatch):
+        return value.to_records()
+    if isinstance(value, dict) and any(isinstance(v, (RecordStream, RecordBatch)) for v in value.values()):
+        return {k: await materialize(v) for k, v in value.items()}
+    return value
+
+
+async def cache_streams(value: Any, depth: int = 2, _cached: Optional[Dict[int, RecordStream]] = None) -> Any:
+    """
+    Run every stream in a handler result (top level or within `depth` dict
+    levels, e.g. outputData and trueRecords) once and keep its chunks. A
+    stream referenced twice is run once. Values without streams are returned
+    unchanged (same object).
+    """
+    _cached = {} if _cached is None else _cached
+    if isinstance(value, RecordStream):
+        if id(value) not in _cached:
+            _cached[id(value)] = await value.cache()
+        return _cached[id(value)]
+    if depth > 0 and isinstance(value, dict) and contains_stream(value, depth):
+        return {k: await cache_streams(v, depth - 1, _cached) for k, v in value.items()}
+    return value
+
+
+def describe_streams(value: Any, sample_rows: Optional[int] = None, depth: int = 2) -> Any:
+    """
+    Replace streams and batches (top level or within `depth` dict levels)
+    with their row count and first `sample_rows` records (LOG_SAMPLE_ROWS by
+    default), for execution logs and outputs no node reads any more. Values
+    without streams are returned unchanged (same object).
+    """
+    sample_rows = config.LOG_SAMPLE_ROWS if sample_rows is None else sample_rows
+    if isinstance(value, (RecordStream, RecordBatch)):
+        return value.describe(sample_rows)
+    if depth > 0 and isinstance(value, dict) and contains_stream(value, depth):
+        return {k: describe_streams(v, sample_rows, depth - 1) for k, v in value.items()}
+    return value
+
+
+def records_for_json(value: Any) -> Any:
+    """
+    Replace cached streams and batches (up to two dict levels deep, e.g. a
+    node result's output.outputData) with their records, for results that
+    leave the worker. Streams that were never run are described by a
+    placeholder instead. Values without streams are returned unchanged
+    (same object).
+    """
+    if isinstance(value, RecordStream):
+        return value.to_records() if value.cached is not None else value.describe()
+    if isinstance(value, RecordBatch):
+        return value.to_records()
+    if isinstance(value, dict) and contains_stream(value):
+        return {k: records_for_json(v) for k, v in value.items()}
+    return value
+
+
+def contains_stream(value: Any, depth: int = 2) -> bool:
+    """True if a stream or batch is found at the top level or within `depth` dict levels"""
+    if isinstance(value, (RecordStream, RecordBatch)):
+        return True
+    if depth > 0 and isinstance(value, dict):
+        return any(contains_stream(v, depth - 1) for v in value.values())
+    return False
+
+
+def has_stream_placeholder(value: Any, depth: int = 2) -> bool:
+    """True if a stored value holds a `describe()` summary instead of the streamed records (as execution logs do)"""
+    if isinstance(value, dict):
+        if value.get("$recordStream") or value.get("$recordBatch"):
+            return True
+        if depth > 0:
+            return any(has_stream_placeholder(v, depth - 1) for v in value.values())
+    return False
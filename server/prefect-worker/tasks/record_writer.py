@@ -0,0 +1,191 @@
+"""
+Bulk writes for the saveRecords node
+
+Records are written with `executemany` in batches of SAVE_RECORDS_BATCH_SIZE
+rows, one transaction per batch, on a connection tuned for bulk loads (WAL,
+SAVE_RECORDS_SYNCHRONOUS). Each record is stored as JSON under a key taken
+from `saveKey` (one field or several, default "id"):
+
+- upsert (default): new keys are inserted, existing ones are overwritten
+  (their createdAt is kept)
+- insertNew: new keys are inserted, records whose key already exists are skipped
+- update: only existing keys are overwritten, other records are skipped
+- append: every record becomes a new row with a generated key (the legacy
+  'insert' mode, which created a record every time, is an alias)
+
+Records without a key value get a generated one (update skips them). The
+existing keys of each batch are looked up first, so the stats can tell
+inserted, updated and skipped records apart and `savedIds` only lists
+records that were written.
+"""
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+SAVE_MODES = {"insertNew", "upsert", "update", "append"}
+_SAVE_MODE_ALIASES = {"insert": "append", "appendOnly": "append", "append-only": "append", "replace": "upsert"}
+
+# Keys looked up per query when checking which records already exist
+_LOOKUP_CHUNK = 500
+
+
+def parse_save_mode(value: Any) -> str:
+    """The save mode; without one, records are upserted (the node always replaced existing keys)"""
+    mode = _SAVE_MODE_ALIASES.get(value or "upsert", value or "upsert")
+    if mode not in SAVE_MODES:
+        raise ValueError(f"Unknown save mode: {value}")
+    return mode
+
+
+def quote_identifier(name: str) -> str:
+    """Table name as a quoted SQL identifier"""
+    if not name or "\x00" in name:
+        raise ValueError(f"Invalid table name: {name!r}")
+    return '"' + name.replace('"', '""') + '"'
+
+
+def record_key(record: Any, key_fields: List[str]) -> Optional[str]:
+    """The record's key (None when a key field is missing or null)"""
+    if not isinstance(record, dict):
+        return None
+    values = [record.get(field) for field in key_fields]
+    if any(value is None or value == "" for value in values):
+        return None
+    if len(values) == 1:
+        return str(values[0])
+    return json.dumps(values, default=str)
+
+
+class RecordWriter:
+    """Writes records to a saveRecords table in batched transactions"""
+
+    def __init__(self, db, table_name: str, mode: str, key_fields: List[str], workflow_id: Optional[str], execution_id: Optional[str], batch_size: int):
+        self.db = db
+        self.table = quote_identifier(table_name)
+        self.mode = mode
+        self.key_fields = key_fields
+        self.workflow_id = workflow_id
+        self.execution_id = execution_id
+        self.batch_size = max(batch_size, 1)
+        self.saved_ids: List[str] = []
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    async def prepare(self, synchronous: str):
+        """Tune the connection for bulk writes and create the table"""
+        if synchronous.upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Invalid synchronous setting: {synchronous}")
+        await self.db.execute("PRAGMA journal_mode = WAL")
+        await self.db.execute(f"PRAGMA synchronous = {synchronous}")
+        await self.db.execute("PRAGMA busy_timeout = 5000")
+        await self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                id TEXT PRIMARY KEY,
+                data TEXT,
+                workflowId TEXT,
+                executionId TEXT,
+                createdAt TEXT,
+                updatedAt TEXT
+            )
+        """)
+        await self.db.commit()
+
+    def _statement(self) -> str:
+        columns = "(id, data, workflowId, executionId, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, ?)"
+        if self.mode == "insertNew":
+            return f"INSERT OR IGNORE INTO {self.table} {columns}"
+        if self.mode == "upsert":
+            return f"""
+                INSERT INTO {self.table} {columns}
+                ON CONFLICT(id) DO UPDATE SET
+                    data = excluded.data,
+                    workflowId = excluded.workflowId,
+                    executionId = excluded.executionId,
+                    updatedAt = excluded.updatedAt
+            """
+        if self.mode == "update":
+            return f"UPDATE {self.table} SET data = ?, workflowId = ?, executionId = ?, updatedAt = ? WHERE id = ?"
+        return f"INSERT INTO {self.table} {columns}"
+
+    async def write(self, records: Iterable[Any]):
+        """Write records, committing every `batch_size` rows"""
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                await self._write_batch(batch)
+                batch = []
+        if batch:
+            await self._write_batch(batch)
+
+    async def _existing_keys(self, keys: List[str]) -> set:
+        existing = set()
+        for start in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[start:start + _LOOKUP_CHUNK]
+            cursor = await self.db.execute(
+                f"SELECT id FROM {self.table} WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+            existing.update(row[0] for row in await cursor.fetchall())
+        return existing
+
+    async def _write_batch(self, records: List[Any]):
+        start = time.perf_counter()
+        now = datetime.now().isoformat()
+        keyed = [
+            (None if self.mode == "append" else record_key(record, self.key_fields), record)
+            for record in records
+        ]
+        existing = set()
+        if self.mode != "append":
+            existing = await self._existing_keys([key for key, _ in keyed if key is not None])
+
+        params = []
+        ids = []
+        seen = set()
+        for key, record in keyed:
+            if key is None:
+                if self.mode == "update":
+                    continue
+                key = str(uuid.uuid4())
+            elif self.mode == "insertNew" and (key in existing or key in seen):
+                continue
+            elif self.mode == "update" and key not in existing:
+                continue
+            data = json.dumps(record, default=str)
+            if self.mode == "update":
+                params.append((data, self.workflow_id, self.execution_id, now, key))
+            else:
+                params.append((key, data, self.workflow_id, self.execution_id, now, now))
+            if key in existing or key in seen:
+                self.updated += 1
+            else:
+                self.inserted += 1
+            seen.add(key)
+            ids.append(key)
+
+        if params:
+            await self.db.executemany(self._statement(), params)
+            await self.db.commit()
+
+        self.received += len(records)
+        self.saved_ids.extend(ids)
+        self.batches += 1
+        self.seconds += time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        written = self.inserted + self.updated
+        return {
+            "mode": self.mode,
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.received - written,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "rowsPerSecond": round(written / self.seconds) if self.seconds else None,
+        }
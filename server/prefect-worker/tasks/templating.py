@@ -0,0 +1,94 @@
+"""
+`{{field}}` templates filled from a record
+
+Used by per-row nodes (HTTP fan-out, per-row LLM prompts) to build requests
+from each input record. Fields may be dotted paths into nested objects
+(`{{customer.id}}`); missing fields render as empty strings. Objects and
+lists render as JSON.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Optional, Set
+from urllib.parse import quote
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+_MISSING = object()
+
+
+def lookup(record: Any, path: str) -> Any:
+    """Value of a field (or dotted path) in a record; None when missing"""
+    if not isinstance(record, dict):
+        return None
+    value = record.get(path, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = record
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return None
+    return value
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def placeholders(template: Any) -> Set[str]:
+    """Fields referenced by a template (strings, or dicts/lists of them)"""
+    if isinstance(template, str):
+        return set(_PLACEHOLDER.findall(template))
+    if isinstance(template, dict):
+        return set().union(*[placeholders(key) | placeholders(value) for key, value in template.items()])
+    if isinstance(template, list):
+        return set().union(*[placeholders(item) for item in template])
+    return set()
+
+
+def render_text(template: str, record: Any, encode: Optional[Callable[[str], str]] = None) -> str:
+    """Template with every placeholder replaced by the field's text (passed through `encode` if given)"""
+    def replace(match):
+        text = _text(lookup(record, match.group(1)))
+        return encode(text) if encode else text
+    return _PLACEHOLDER.sub(replace, template)
+
+
+def render_url(template: str, record: Any) -> str:
+    """URL template; field values are percent-encoded unless the placeholder is the whole URL"""
+    match = _PLACEHOLDER.fullmatch(template.strip())
+    if match:
+        return _text(lookup(record, match.group(1)))
+    return render_text(template, record, encode=lambda text: quote(text, safe=""))
+
+
+def render_value(template: Any, record: Any) -> Any:
+    """Render a JSON-like template: a string that is a single placeholder keeps the field's type"""
+    if isinstance(template, str):
+        match = _PLACEHOLDER.fullmatch(template.strip())
+        if match:
+            return lookup(record, match.group(1))
+        return render_text(template, record)
+    if isinstance(template, dict):
+        return {render_text(str(key), record): render_value(value, record) for key, value in template.items()}
+    if isinstance(template, list):
+        return [render_value(item, record) for item in template]
+    return template
+
+
+def render_pairs(pairs: Any, record: Any) -> Dict[str, str]:
+    """Headers/query params from a dict or a list of {key, value} rows, values rendered as text"""
+    if isinstance(pairs, dict):
+        items = pairs.items()
+    else:
+        items = [(pair.get("key"), pair.get("value")) for pair in pairs or [] if isinstance(pair, dict)]
+    return {
+        render_text(str(key), record): render_text(str(value if value is not None else ""), record)
+        for key, value in items if key
+    }
@@ -0,0 +1,78 @@
+"""
+Splitting long documents into overlapping chunks for map-reduce LLM calls
+
+Text is cut into chunks of about `chunk_tokens` estimated tokens (4
+characters per token, as in tasks/llm.py), preferably at paragraph, then
+line, then sentence, then word boundaries, and consecutive chunks share
+about `overlap_tokens` of text so statements on a boundary are seen whole.
+
+Page-based chunking groups whole pages instead. Pages come from a list of
+page texts when the input has one (the PDF node's `pageTexts`), otherwise
+from form feeds (`\\f`) in the text; text without page breaks is chunked by
+tokens. Chunks hold only document text, no page numbers, so a chunk whose
+pages didn't change is the same prompt (and LLM cache hit) wherever it sits.
+"""
+from typing import Any, List, Optional
+
+_CHARS_PER_TOKEN = 4
+_BOUNDARIES = ("\n\n", "\n", ". ", " ")
+
+
+def _cut(text: str, start: int, end: int) -> int:
+    """A boundary in the last half of text[start:end] to end the chunk at (or `end`)"""
+    if end >= len(text):
+        return len(text)
+    floor = start + (end - start) // 2
+    for boundary in _BOUNDARIES:
+        position = text.rfind(boundary, floor, end)
+        if position != -1:
+            return position + len(boundary)
+    return end
+
+
+def chunk_text(text: str, chunk_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """Overlapping chunks of about `chunk_tokens` tokens"""
+    size = max(chunk_tokens, 1) * _CHARS_PER_TOKEN
+    overlap = min(max(overlap_tokens, 0) * _CHARS_PER_TOKEN, size // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = _cut(text, start, start + size)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # Step back by the overlap, to the start of a word
+        next_start = max(end - overlap, start + 1)
+        if overlap:
+            space = text.find(" ", next_start, end)
+            next_start = space + 1 if space != -1 else next_start
+        start = next_start
+    return chunks
+
+
+def split_pages(document: Any) -> Optional[List[str]]:
+    """Page texts of a document (a dict with `pageTexts`, or text with form feeds); None if unknown"""
+    if isinstance(document, dict):
+        pages = document.get("pageTexts")
+        if isinstance(pages, list) and pages:
+            return [str(page) for page in pages]
+        document = document.get("text")
+    if isinstance(document, str) and "\f" in document:
+        return document.split("\f")
+    return None
+
+
+def chunk_pages(pages: List[str], pages_per_chunk: int, overlap_pages: int = 0) -> List[str]:
+    """Chunks of `pages_per_chunk` whole pages, consecutive chunks sharing `overlap_pages` pages"""
+    size = max(pages_per_chunk, 1)
+    step = max(size - max(overlap_pages, 0), 1)
+    chunks = []
+    for start in range(0, len(pages), step):
+        chunk = "\n\n".join(page.strip() for page in pages[start:start + size] if page.strip())
+        if chunk:
+            chunks.append(chunk)
+        if start + size >= len(pages):
+            break
+    return chunks
@@ -0,0 +1,460 @@
+"""
+Windowed time-series aggregation for the timeSeriesAggregator node
+
+Points are bucketed by timestamp into epoch-aligned windows of
+`timeSeriesInterval` (e.g. "5m"). Tumbling windows don't overlap; sliding
+windows of the same size start every `timeSeriesSlide`. Each window (per
+group of the `timeSeriesGroupBy` tag fields) becomes one output row:
+
+    {"tag": "T1", "timestamp": "2024-01-01T00:05:00Z", "windowEnd": "2024-01-01T00:10:00Z",
+     "pointCount": 42, "temperature": 21.3}
+
+With several aggregations the value fields are named `<field>_<aggregation>`.
+Aggregations are avg, min, max, sum, count, first, last, median and
+percentiles (p90, p99.9, ...). Everything is computed over NumPy arrays:
+points are sorted once by (window, group, timestamp) and every aggregation
+is a segmented reduction over that order.
+
+With `timeSeriesIncremental`, windows that ended before the newest point are
+final: the next run only aggregates and outputs the windows that were still
+open (for sliding windows, every window covering the newest point) and the
+ones after them. Per workflow and node, the `time_series_state` table only
+keeps where those windows start plus the count and timestamp sum of the
+points before; if those changed (data was edited or arrived late)
+everything is recomputed and output again.
+
+`downsample` reduces a series to a target number of points (LTTB or min/max
+envelopes) for the dataHistorian node.
+"""
+import hashlib
+import json
+import math
+import re
+import warnings
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+import numpy as np
+
+import config
+from tasks.columnar import RecordBatch
+
+TIMESTAMP_FIELDS = ("timestamp", "time", "createdAt", "date", "datetime")
+
+_INTERVAL_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_INTERVAL_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h|d|w)\s*$")
+_PERCENTILE_PATTERN = re.compile(r"^p(\d+(?:\.\d+)?)$")
+
+# Epoch numbers above this are taken as milliseconds
+_EPOCH_MS_THRESHOLD = 1e11
+
+# Sliding windows replicate every point into each window covering it
+MAX_OVERLAPPING_WINDOWS = 1000
+
+
+def parse_interval(value: Any) -> float:
+    """Window length in seconds from "30s", "5m", "8h", "1d"... (numbers are seconds)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return float(value)
+    match = _INTERVAL_PATTERN.match(str(value or ""))
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid time-series interval: {value!r} (expected e.g. '30s', '5m', '1h', '1d')")
+    return float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+def parse_fields(value: Any) -> List[str]:
+    """Field names from a list or a comma-separated string"""
+    names = value if isinstance(value, (list, tuple)) else str(value or "").split(",")
+    return [str(name).strip() for name in names if str(name).strip()]
+
+
+def parse_aggregations(value: Any) -> List[str]:
+    """Aggregation names from a list or a comma-separated string ('mean' and 'median' are aliases)"""
+    names = value if isinstance(value, (list, tuple)) else str(value or "avg").split(",")
+    aggregations = []
+    for name in names:
+        name = str(name).strip()
+        name = {"mean": "avg", "average": "avg", "median": "p50"}.get(name, name)
+        if not name:
+            continue
+        if name not in ("avg", "min", "max", "sum", "count", "first", "last"):
+            match = _PERCENTILE_PATTERN.match(name)
+            if not match or float(match.group(1)) > 100:
+                raise ValueError(f"Unknown time-series aggregation: {name}")
+        aggregations.append(name)
+    return aggregations or ["avg"]
+
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return value / 1000 if abs(value) > _EPOCH_MS_THRESHOLD else float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            value = datetime.fromisoformat(text[:-1] + "+00:00" if text.endswith("Z") else text)
+        except ValueError:
+            return math.nan
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    return math.nan
+
+
+def epoch_seconds(values: Any) -> np.ndarray:
+    """
+    Epoch seconds (float64, NaN where unparseable) of a column of ISO strings,
+    datetimes or epoch numbers (seconds or milliseconds); naive times are UTC
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iuf":
+        seconds = values.astype(np.float64)
+        return np.where(np.abs(seconds) > _EPOCH_MS_THRESHOLD, seconds / 1000, seconds)
+    values = list(values)
+    if values and all(type(value) is str for value in values):
+        # Offset-free ISO strings parse in one NumPy call; anything else falls back per value
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                parsed = np.array([v[:-1] if v.endswith("Z") else v for v in values], dtype="datetime64[ms]")
+            seconds = parsed.astype(np.int64).astype(np.float64) / 1000
+            seconds[np.isnat(parsed)] = np.nan
+            return seconds
+        except (ValueError, TypeError, DeprecationWarning, UserWarning):
+            pass
+    return np.fromiter(map(_epoch, values), dtype=np.float64, count=len(values))
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def numeric_values(values: Any) -> np.ndarray:
+    """float64 column, NaN for missing and non-numeric values"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iuf":
+        return values.astype(np.float64)
+    values = list(values)
+    return np.fromiter(map(_number, values), dtype=np.float64, count=len(values))
+
+
+def iso_times(seconds: np.ndarray) -> List[str]:
+    """UTC ISO-8601 strings ("...Z") of epoch seconds"""
+    millis = np.round(seconds * 1000).astype(np.int64).astype("datetime64[ms]")
+    unit = "s" if np.all(np.mod(seconds, 1) == 0) else "ms"
+    return [text + "Z" for text in np.datetime_as_string(millis, unit=unit).tolist()]
+
+
+class SeriesColumns:
+    """The columns an aggregation needs, collected from records or batches"""
+
+    def __init__(self, timestamp_field: Optional[str], group_by: List[str], fields: List[str]):
+        self.timestamp_field = timestamp_field
+        self.group_by = group_by
+        self.fields = fields
+        self._timestamps: List[np.ndarray] = []
+        self._groups: List[Any] = []
+        self._values: Dict[str, List[np.ndarray]] = {field: [] for field in fields}
+        self.count = 0
+
+    def add(self, chunk: Any):
+        if isinstance(chunk, RecordBatch):
+            def column(name):
+                array = chunk.columns.get(name)
+                if array is None:
+                    return [None] * len(chunk)
+                if array.dtype.kind in "iuf" and name not in chunk.present:
+                    return array
+                return chunk.values(name)
+        else:
+            def column(name):
+                return [record.get(name) for record in chunk]
+
+        self.count += len(chunk)
+        if self.timestamp_field:
+            self._timestamps.append(epoch_seconds(column(self.timestamp_field)))
+        if self.group_by:
+            self._groups.extend(zip(*[column(name) for name in self.group_by]))
+        for field in self.fields:
+            self._values[field].append(numeric_values(column(field)))
+
+    def timestamps(self) -> np.ndarray:
+        if not self.timestamp_field:
+            return np.zeros(self.count)
+        return np.concatenate(self._timestamps) if self._timestamps else np.empty(0)
+
+    def group_codes(self) -> Tuple[np.ndarray, List[Tuple]]:
+        """Per-point group index and the group keys, in order of first appearance"""
+        if not self.group_by:
+            return np.zeros(self.count, dtype=np.int64), [()]
+        index: Dict[Any, int] = {}
+        codes = np.fromiter(
+            (index.setdefault(key, len(index)) for key in self._groups),
+            dtype=np.int64,
+            count=len(self._groups)
+        )
+        return codes, list(index)
+
+    def values(self) -> Dict[str, np.ndarray]:
+        return {
+            field: np.concatenate(chunks) if chunks else np.empty(0)
+            for field, chunks in self._values.items()
+        }
+
+
+def _segment_starts(segments: np.ndarray) -> np.ndarray:
+    """Start positions of the runs of equal ids in a sorted id array"""
+    if not len(segments):
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+
+
+def _reduce(aggregation: str, segments: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+    """
+    Per-segment aggregation of `values` (time-ordered within each segment,
+    segment ids ascending); NaN for segments without values
+    """
+    valid = ~np.isnan(values)
+    segments = segments[valid]
+    values = values[valid]
+    counts = np.bincount(segments, minlength=count)
+    if aggregation == "count":
+        return counts.astype(np.float64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if aggregation in ("sum", "avg"):
+            sums = np.bincount(segments, weights=values, minlength=count)
+            if aggregation == "sum":
+                return np.where(counts > 0, sums, np.nan)
+            return sums / counts
+
+    result = np.full(count, np.nan)
+    starts = _segment_starts(segments)
+    if not len(starts):
+        return result
+    present = segments[starts]
+    if aggregation == "min":
+        result[present] = np.minimum.reduceat(values, starts)
+    elif aggregation == "max":
+        result[present] = np.maximum.reduceat(values, starts)
+    elif aggregation == "first":
+        result[present] = values[starts]
+    elif aggregation == "last":
+        result[present] = values[np.r_[starts[1:], len(values)] - 1]
+    else:
+        # Percentile with linear interpolation (np.percentile's default) over value-sorted segments
+        q = float(_PERCENTILE_PATTERN.match(aggregation).group(1)) / 100
+        ordered = values[np.lexsort((values, segments))]
+        sizes = counts[present]
+        position = starts + q * (sizes - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        result[present] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    return result
+
+
+def aggregate_windows(
+    timestamps: np.ndarray,
+    group_codes: np.ndarray,
+    values: Dict[str, np.ndarray],
+    aggregations: List[str],
+    size: Optional[float],
+    slide: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Aggregate points into windows of `size` seconds starting every `slide`
+    seconds (tumbling when slide is None or equal to size; size None puts
+    every point in a single window per group)
+
+    Returns {"start", "group", "pointCount", "values": {(field, aggregation): array}},
+    one entry per non-empty window, ordered by window start then group.
+    """
+    valid = ~np.isnan(timestamps)
+    rows = np.flatnonzero(valid)
+    times = timestamps[valid]
+
+    if size is None:
+        windows = np.zeros(len(rows), dtype=np.int64)
+        step = 0.0
+    else:
+        step = slide or size
+        overlap = int(math.ceil(size / step - 1e-9))
+        if overlap > MAX_OVERLAPPING_WINDOWS:
+            raise ValueError(f"Sliding windows overlap too much ({overlap} windows per point, max {MAX_OVERLAPPING_WINDOWS})")
+        pane = np.floor(times / step).astype(np.int64)
+        if overlap == 1:
+            windows = pane
+        else:
+            # A point belongs to every window k*step <= t < k*step + size
+            candidates = pane[None, :] - np.arange(overlap)[:, None]
+            covers = candidates * step + size > times[None, :]
+            windows = candidates[covers]
+            rows = np.broadcast_to(rows, candidates.shape)[covers]
+            times = np.broadcast_to(times, candidates.shape)[covers]
+
+    groups = group_codes[rows]
+    order = np.lexsort((times, groups, windows))
+    windows, groups, rows = windows[order], groups[order], rows[order]
+    changed = np.r_[True, (windows[1:] != windows[:-1]) | (groups[1:] != groups[:-1])] if len(rows) else np.empty(0, dtype=bool)
+    segments = np.cumsum(changed) - 1
+    starts = np.flatnonzero(changed)
+    count = len(starts)
+
+    return {
+        "start": windows[starts] * step,
+        "group": groups[starts],
+        "pointCount": np.diff(np.r_[starts, len(rows)]),
+        "values": {
+            (field, aggregation): _reduce(aggregation, segments, column[rows], count)
+            for field, column in values.items()
+            for aggregation in aggregations
+        }
+    }
+
+
+def select_windows(result: Dict[str, Any], mask: np.ndarray) -> Dict[str, Any]:
+    """The windows of an aggregate_windows result where `mask` is true"""
+    return {
+        "start": result["start"][mask],
+        "group": result["group"][mask],
+        "pointCount": result["pointCount"][mask],
+        "values": {key: values[mask] for key, values in result["values"].items()}
+    }
+
+
+def window_rows(
+    result: Dict[str, Any],
+    group_by: List[str],
+    group_keys: List[Tuple],
+    size: Optional[float],
+    aggregations: List[str]
+) -> List[Dict]:
+    """Output records of aggregate_windows' result"""
+    count = len(result["start"])
+    if not count:
+        return []
+    columns: Dict[str, List[Any]] = {}
+    for name_index, name in enumerate(group_by):
+        columns[name] = [group_keys[code][name_index] for code in result["group"].tolist()]
+    if size is not None:
+        columns["timestamp"] = iso_times(result["start"])
+        columns["windowEnd"] = iso_times(result["start"] + size)
+    columns["pointCount"] = result["pointCount"].tolist()
+    for (field, aggregation), values in result["values"].items():
+        name = field if len(aggregations) == 1 else f"{field}_{aggregation}"
+        if aggregation == "count":
+            columns[name] = [int(value) for value in values.tolist()]
+        else:
+            columns[name] = [None if math.isnan(value) else value for value in values.tolist()]
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def open_window_cutoff(latest: float, size: float, slide: Optional[float]) -> float:
+    """Start of the earliest window still open at `latest` (windows before it are final)"""
+    step = slide or size
+    return (math.floor((latest - size) / step) + 1) * step
+
+
+def state_key(workflow_id: str, node_id: str, settings: Dict) -> str:
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{workflow_id}:{node_id}:{digest[:16]}"
+
+
+async def _ensure_state_table(db):
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS time_series_state (
+            stateKey TEXT PRIMARY KEY,
+            state BLOB,
+            updatedAt TEXT
+        )
+    """)
+
+
+async def load_state(key: str) -> Optional[Dict]:
+    """Incremental state of a node, None if there is none"""
+    async with aiosqlite.connect(config.DATABASE_PATH) as db:
+        await _ensure_state_table(db)
+        cursor = await db.execute("SELECT state FROM time_series_state WHERE stateKey = ?", (key,))
+        row = await cursor.fetchone()
+    return json.loads(zlib.decompress(row[0])) if row else None
+
+
+async def save_state(key: str, state: Dict):
+    data = zlib.compress(json.dumps(state).encode("utf-8"), 6)
+    async with aiosqlite.connect(config.DATABASE_PATH) as db:
+        await _ensure_state_table(db)
+        await db.execute(
+            "INSERT OR REPLACE INTO time_series_state (stateKey, state, updatedAt) VALUES (?, ?, ?)",
+            (key, data, datetime.utcnow().isoformat())
+        )
+        await db.commit()
+
+
+def detect_fields(sample: Sequence[Dict], exclude: Sequence[str]) -> List[str]:
+    """Numeric fields of sample records, in order of appearance"""
+    fields: Dict[str, None] = {}
+    for record in sample:
+        for name, value in record.items():
+            if name in exclude or name in fields:
+                continue
+            if not math.isnan(_number(value)):
+                fields[name] = None
+    return list(fields)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling:
+    the first and last points, plus per bucket the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    A 2-D `y` (one series per row, sharing `x`) is downsampled row by row in
+    the same pass and gives one row of indices per series.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.broadcast_to(np.arange(n), y.shape).copy()
+    values = np.atleast_2d(y)
+    series = np.arange(len(values))
+    # threshold - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty((len(values), threshold), dtype=np.int64)
+    keep[:, 0], keep[:, -1] = 0, n - 1
+    previous = np.zeros(len(values), dtype=np.int64)
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = values[:, end:next_end].mean(axis=1, keepdims=True)
+        px = x[previous][:, None]
+        py = values[series, previous][:, None]
+        area = np.abs((px - next_x) * (values[:, start:end] - py) - (px - x[start:end]) * (next_y - py))
+        previous = start + np.argmax(area, axis=1)
+        keep[:, bucket + 1] = previous
+    return keep if y.ndim == 2 else keep[0]
+
+
+def min_max_envelope(y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of threshold/2 equal-size buckets, in time order"""
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    buckets = np.arange(n) * max(threshold // 2, 1) // n
+    order = np.lexsort((y, buckets))
+    starts = _segment_starts(buckets[order])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[order[starts], order[ends]])
+
+
+def downsample(x: np.ndarray, y: np.ndarray, threshold: int, method: str = "lttb") -> np.ndarray:
+    """Indices of at most `threshold` points (x ascending) keeping the shape of a 1-D series"""
+    if method == "minmax":
+        return min_max_envelope(y, threshold)
+    if method == "lttb":
+        return lttb(x, y, threshold)
+    raise ValueError(f"Unknown downsampling method: {method} (expected 'lttb' or 'minmax')")
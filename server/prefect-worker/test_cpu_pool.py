@@ -0,0 +1,75 @@
+"""
+Tests for the process-pool lane of CPU-bound handlers (cpu_pool.py)
+"""
+import asyncio
+
+import pytest
+
+from cpu_pool import CpuPool
+from tasks.node_handlers import handle_join
+from tasks.record_stream import RecordStream
+
+
+def test_only_known_large_inputs_are_dispatched():
+    pool = CpuPool(max_workers=1, min_rows=10)
+    join = {"type": "join", "config": {}}
+
+    assert pool.should_dispatch(join, {"inputA": [{}] * 6, "inputB": [{}] * 6})
+    assert not pool.should_dispatch(join, {"inputA": [{}] * 3, "inputB": [{}] * 3})
+    # Nothing to size (e.g. a dataHistorian query): runs inline
+    assert not pool.should_dispatch({"type": "dataHistorian", "config": {}}, {})
+    assert not pool.should_dispatch({"type": "addField", "config": {}}, [{}] * 100)
+    assert pool.should_dispatch({"type": "dataHistorian", "config": {"executionHint": "cpu"}}, {})
+
+
+def test_streams_cross_the_process_boundary_in_chunks():
+    pool = CpuPool(max_workers=1, min_rows=1)
+    node = {"id": "j", "type": "join", "config": {"joinStrategy": "concat"}}
+    records_a = [{"id": i, "side": "A"} for i in range(7)]
+    records_b = [{"id": i, "side": "B"} for i in range(5)]
+
+    async def run():
+        try:
+            result = await pool.run_handler(node, handle_join, {
+                "inputA": RecordStream.from_records(records_a, chunk_size=3),
+                "inputB": RecordStream.from_records(records_b, chunk_size=3, columnar=False),
+            }, None)
+            return result, await result["outputData"].collect()
+        finally:
+            await pool.shutdown()
+
+    result, output = asyncio.run(run())
+    assert pool.dispatched == 1
+    assert result["outputData"].cached is not None
+    assert output == records_a + records_b
+
+
+def test_cancelled_call_frees_its_worker():
+    pool = CpuPool(max_workers=1, min_rows=1)
+    # Every A row matches every B row: millions of output rows
+    slow = {"id": "slow", "type": "join", "config": {"joinStrategy": "mergeByKey", "joinKeys": "k"}}
+    side = [{"k": 1, "n": i} for i in range(3000)]
+    quick = {"id": "quick", "type": "join", "config": {"joinStrategy": "concat"}}
+
+    async def run():
+        try:
+            await pool.warm_up()
+            first_pid = pool._idle[0].process.pid
+            call = asyncio.create_task(pool.run_handler(slow, handle_join, {"inputA": side, "inputB": side}, None))
+            while not pool.stats()["busy"]:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.2)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+
+            # The slot is free right away, on a fresh worker
+            result = await asyncio.wait_for(pool.run_handler(quick, handle_join, {"inputA": [{"a": 1}], "inputB": []}, None), timeout=10)
+            return first_pid, pool._idle[0].process.pid, result
+        finally:
+            await pool.shutdown()
+
+    first_pid, pid, result = asyncio.run(run())
+    assert pool.recycled == 1
+    assert pid != first_pid
+    assert result["outputData"] == [{"a": 1}]
@@ -0,0 +1,75 @@
+"""
+Tests for the shared HTTP connection pool (http_clients.py)
+"""
+import asyncio
+import json
+
+import httpx
+
+from http_clients import HttpClientRegistry, _HostLimitedTransport
+
+
+class _Body(httpx.AsyncByteStream):
+    """Response body streamed like a real transport's (not read up front)"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+
+
+class _Backend(httpx.MockTransport):
+    """Sets a cookie on /login and echoes the Cookie header it receives"""
+
+    def __init__(self):
+        super().__init__(self._handle)
+        self.closed = 0
+
+    def _handle(self, request):
+        if request.url.path == "/login":
+            return httpx.Response(200, headers={"Set-Cookie": "session=secret; Path=/"}, stream=_Body(b""))
+        return httpx.Response(200, stream=_Body(json.dumps({"cookie": request.headers.get("cookie")}).encode()))
+
+    async def aclose(self):
+        self.closed += 1
+
+
+def _registry(backend):
+    registry = HttpClientRegistry()
+    registry._pools[asyncio.get_running_loop()] = _HostLimitedTransport(backend, per_host=2)
+    return registry
+
+
+def test_sessions_share_connections_but_not_cookies():
+    backend = _Backend()
+
+    async def run():
+        registry = _registry(backend)
+        async with registry.session(timeout=30.0) as client:
+            await client.get("https://api.example.com/login")
+            same_session = (await client.get("https://api.example.com/check")).json()
+        async with registry.session(timeout=30.0) as client:
+            next_session = (await client.get("https://api.example.com/check")).json()
+        closed_by_sessions = backend.closed
+        stats = registry.stats()
+        await registry.aclose()
+        return same_session, next_session, closed_by_sessions, stats
+
+    same_session, next_session, closed_by_sessions, stats = asyncio.run(run())
+    assert same_session == {"cookie": "session=secret"}
+    assert next_session == {"cookie": None}
+    assert closed_by_sessions == 0
+    assert backend.closed == 1
+    assert stats["requests"] == 3
+
+
+def test_sessions_default_to_httpx_timeout():
+    async def run():
+        registry = _registry(_Backend())
+        async with registry.session() as default, registry.session(timeout=60.0) as explicit:
+            return default.timeout, explicit.timeout
+
+    default, explicit = asyncio.run(run())
+    assert default == httpx.AsyncClient().timeout
+    assert explicit.read == 60.0
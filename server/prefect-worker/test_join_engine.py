@@ -0,0 +1,61 @@
+"""
+Tests for the join node's key joins (tasks/join_engine.py), in memory and
+spilled to disk
+"""
+import asyncio
+import json
+
+import pytest
+
+import config
+from tasks.node_handlers import handle_join
+
+A = [{"id": 1, "name": "a1"}, {"id": 2, "name": "a2"}, {"id": None, "name": "a-null"}]
+B = [{"id": 1, "name": "b1"}, {"id": 1, "name": "b1x"}, {"id": 3, "name": "b3"}, {"id": None, "name": "b-null"}]
+
+MATCHED = [{"id": 1, "name": "a1", "B_name": "b1"}, {"id": 1, "name": "a1", "B_name": "b1x"}]
+LEFT_ONLY = [{"id": 2, "name": "a2"}, {"id": None, "name": "a-null"}]
+RIGHT_ONLY = [{"id": 3, "B_name": "b3"}, {"id": None, "B_name": "b-null"}]
+
+
+@pytest.fixture(params=["hash", "spill"])
+def join_path(request, monkeypatch):
+    """Run each test with B in memory and with every join spilled to disk"""
+    if request.param == "spill":
+        monkeypatch.setattr(config, "JOIN_MEMORY_BUDGET_MB", 0)
+    return request.param
+
+
+def _join(how, **config_data):
+    node = {"config": {"joinStrategy": "mergeByKey", "joinKeys": "id", "joinType": how, **config_data}}
+    result = asyncio.run(handle_join.fn(node, {"inputA": A, "inputB": B}))
+    assert result["success"]
+    return result
+
+
+def _sorted(records):
+    return sorted(records, key=lambda record: json.dumps(record, sort_keys=True))
+
+
+@pytest.mark.parametrize("how, expected", [
+    ("inner", MATCHED),
+    ("left", MATCHED + LEFT_ONLY),
+    ("right", MATCHED + RIGHT_ONLY),
+    ("full", MATCHED + LEFT_ONLY + RIGHT_ONLY),
+    ("anti", LEFT_ONLY),
+])
+def test_join_types(join_path, how, expected):
+    result = _join(how)
+
+    assert _sorted(result["outputData"]) == _sorted(expected)
+    assert ("spilled to disk" in result["message"]) == (join_path == "spill")
+
+
+def test_outer_is_a_full_join(join_path):
+    assert _sorted(_join("outer")["outputData"]) == _sorted(MATCHED + LEFT_ONLY + RIGHT_ONLY)
+
+
+def test_first_duplicate_and_conflict_prefix(join_path):
+    output = _join("inner", joinDuplicates="first", joinConflictPrefix="right_")["outputData"]
+
+    assert output == [{"id": 1, "name": "a1", "right_name": "b1"}]
@@ -0,0 +1,74 @@
+"""
+Tests for node result memoization (node_result_cache.py)
+"""
+import asyncio
+
+from node_result_cache import NodeResultCache
+from tasks.record_stream import RecordStream, cache_streams
+
+NODE = {"id": "n", "type": "addField", "config": {"fieldName": "a", "cacheable": True}}
+
+
+def test_callers_get_their_own_copy_of_a_cached_result():
+    cache = NodeResultCache()
+
+    async def compute():
+        return {"success": True, "outputData": [{"id": 1, "tags": ["x"]}]}
+
+    async def run():
+        key = await cache.cache_key(NODE, [{"id": 1}])
+        first, first_status = await cache.get_or_compute(key, compute)
+        first["outputData"][0]["tags"].append("mutated")
+        first["outputData"].append({"id": 2})
+        second, second_status = await cache.get_or_compute(key, compute)
+        second["outputData"][0]["id"] = "mutated"
+        third, _ = await cache.get_or_compute(key, compute)
+        return first_status, second_status, second, third
+
+    first_status, second_status, second, third = asyncio.run(run())
+    assert (first_status, second_status) == ("miss", "hit")
+    assert second["outputData"] == [{"id": "mutated", "tags": ["x"]}]
+    assert third["outputData"] == [{"id": 1, "tags": ["x"]}]
+
+
+def test_coalesced_callers_get_a_copy():
+    cache = NodeResultCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return {"success": True, "outputData": [{"id": 1}]}
+
+    async def run():
+        key = await cache.cache_key(NODE, [{"id": 1}])
+        return await asyncio.gather(cache.get_or_compute(key, compute), cache.get_or_compute(key, compute))
+
+    (first, first_status), (second, second_status) = asyncio.run(run())
+    assert {first_status, second_status} == {"miss", "coalesced"}
+    assert first == second and first is not second
+    assert first["outputData"] is not second["outputData"]
+
+
+def test_streamed_inputs_and_outputs_are_cacheable_once_run():
+    cache = NodeResultCache()
+    records = [{"id": i} for i in range(10)]
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return await cache_streams({"success": True, "outputData": RecordStream.from_records(records, chunk_size=4)})
+
+    async def run():
+        streamed = await RecordStream.from_records(records, chunk_size=3).cache()
+        key = await cache.cache_key(NODE, streamed)
+        assert key == await cache.cache_key(NODE, records)
+        # A stream that was never run can't be hashed without running it
+        assert await cache.cache_key(NODE, RecordStream.from_records(records)) is None
+
+        await cache.get_or_compute(key, compute)
+        result, status = await cache.get_or_compute(key, compute)
+        return status, await result["outputData"].collect()
+
+    status, output = asyncio.run(run())
+    assert status == "hit"
+    assert calls == [1]
+    assert output == records
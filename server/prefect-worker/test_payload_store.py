@@ -0,0 +1,89 @@
+"""
+Tests for the content-addressed payload store (payload_store.py)
+"""
+import asyncio
+import sqlite3
+
+from payload_store import PAYLOAD_REF_KEY, PayloadStore
+
+
+def _store(database) -> PayloadStore:
+    return PayloadStore(db_path=database, inline_max_bytes=64)
+
+
+def _payload_rows(database):
+    conn = sqlite3.connect(database)
+    rows = conn.execute("SELECT hash, createdAt FROM execution_payloads").fetchall()
+    conn.close()
+    return rows
+
+
+def test_small_payloads_are_inlined(database):
+    store = _store(database)
+    assert asyncio.run(store.encode({"a": 1})) == '{"a": 1}'
+    assert asyncio.run(store.encode({})) is None
+
+
+def test_large_payload_is_stored_once_and_resolves(database):
+    store = _store(database)
+    records = [{"id": i, "name": f"row {i}"} for i in range(2000)]
+
+    async def run():
+        first = await store.encode(records)
+        second = await store.encode([dict(r) for r in records])
+        return first, second, await store.resolve(first)
+
+    first, second, resolved = asyncio.run(run())
+    assert PayloadStore.parse_ref(first)[PAYLOAD_REF_KEY].startswith("sha256:")
+    assert first == second
+    assert resolved == records
+    assert len(_payload_rows(database)) == 1
+
+
+def test_mutated_payload_is_stored_as_it_is_now(database):
+    store = _store(database)
+    records = [{"id": i} for i in range(100)]
+
+    async def run():
+        before = await store.encode(records)
+        records.append({"id": "new"})
+        after = await store.encode(records)
+        return before, after, await store.resolve(after)
+
+    before, after, resolved = asyncio.run(run())
+    assert before != after
+    assert resolved[-1] == {"id": "new"}
+
+
+def test_garbage_collection_keeps_referenced_payloads(database):
+    store = _store(database)
+
+    async def run():
+        kept = await store.encode([{"kept": i} for i in range(100)])
+        dropped = await store.encode([{"dropped": i} for i in range(100)])
+        conn = sqlite3.connect(database)
+        conn.execute(
+            "INSERT INTO execution_logs (id, executionId, outputData) VALUES ('log', 'exec', ?)",
+            (kept,)
+        )
+        conn.execute("UPDATE execution_payloads SET createdAt = '2000-01-01T00:00:00'")
+        conn.commit()
+        conn.close()
+        # A fresh store has nothing memoized that would keep the payloads alive
+        deleted = await _store(database).collect_garbage(min_age_seconds=60)
+        return kept, dropped, deleted
+
+    kept, dropped, deleted = asyncio.run(run())
+    assert deleted == 1
+    assert [row[0] for row in _payload_rows(database)] == [PayloadStore.parse_ref(kept)[PAYLOAD_REF_KEY]]
+
+
+def test_garbage_collection_spares_recent_payloads(database):
+    store = _store(database)
+
+    async def run():
+        await store.encode([{"recent": i} for i in range(100)])
+        return await _store(database).collect_garbage(min_age_seconds=3600)
+
+    assert asyncio.run(run()) == 0
+    assert len(_payload_rows(database)) == 1
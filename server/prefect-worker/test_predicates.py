@@ -0,0 +1,81 @@
+"""
+Tests for the condition node's compiled rules (tasks/predicates.py)
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from tasks.columnar import RecordBatch
+from tasks.predicates import compile_condition
+
+
+def _rule(field, op, value, **config):
+    return compile_condition({"conditionField": field, "conditionOperator": op, "conditionValue": value, **config})
+
+
+def test_comparisons_are_typed():
+    greater = _rule("n", "greaterThan", "5")
+    assert [greater({"n": n}) for n in (10, "10", 2, "2", "word", None)] == [True, True, False, False, False, False]
+    # 10 > 9 numerically, although "10" < "9" as text
+    assert _rule("n", ">", 9)({"n": "10"})
+
+    equals_true = _rule("flag", "equals", "true")
+    assert [equals_true({"flag": v}) for v in (True, False, "true", 1)] == [True, False, True, False]
+    assert _rule("n", "equals", "3")({"n": 3.0})
+
+    after = _rule("at", "after", "2026-01-01T00:00:00Z")
+    moment = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    assert [after({"at": v}) for v in ("2026-02-01", moment, moment.timestamp() * 1000, "2025-12-31", "soon")] == [True, True, True, False, False]
+
+
+def test_operator_aliases_and_membership():
+    assert _rule("s", "not_equals", "a")({"s": "b"})
+    assert _rule("s", "starts_with", "ab")({"s": "abc"})
+    assert _rule("s", "is_empty", None)({"s": ""})
+    assert _rule("s", "regex", "^a.c$")({"s": "abc"})
+    assert _rule("n", "in", "1, 2, x")({"n": 2}) and _rule("n", "in", "1, 2, x")({"n": "x"})
+    assert _rule("n", "not_in", [1, 2])({"n": 3})
+    # Unknown operators fall back to equals
+    assert _rule("s", "sameAs", "a")({"s": "a"})
+    with pytest.raises(ValueError):
+        _rule("s", "matches", "(")
+
+
+def test_groups_combine_with_and_or():
+    predicate = compile_condition({
+        "conditionField": "kind", "conditionOperator": "equals", "conditionValue": "a",
+        "logicalOperator": "AND",
+        "additionalConditions": [
+            {"logicalOperator": "OR", "conditions": [
+                {"field": "n", "operator": "<", "value": 0},
+                {"field": "n", "operator": ">", "value": 10},
+            ]},
+            {"field": "", "operator": "equals", "value": "ignored"},
+        ],
+    })
+
+    assert predicate.describe() == "kind equals a AND (n lessThan 0 OR n greaterThan 10)"
+    records = [{"kind": "a", "n": -1}, {"kind": "a", "n": 5}, {"kind": "b", "n": 20}, {"kind": "a", "n": 11}]
+    assert predicate.partition(records) == ([records[0], records[3]], [records[1], records[2]])
+
+
+def test_column_masks_match_record_tests():
+    records = [
+        {"n": 1, "f": 1.5, "flag": True, "s": "x"},
+        {"n": 7, "f": float("nan"), "flag": False, "s": "y"},
+        {"n": 12, "s": "x"},
+        {"n": 3, "f": 9.0, "flag": True},
+    ]
+    batch = RecordBatch.from_records(records)
+    rules = [
+        ("n", "greaterThan", "5"), ("n", "lessOrEqual", 3), ("n", "equals", "7"), ("n", "in", "1,12"),
+        ("f", "lessThan", 5), ("f", "isEmpty", None), ("flag", "equals", "true"), ("flag", "notEquals", True),
+        ("s", "equals", "x"), ("missing", "isEmpty", None), ("n", "greaterThan", "word"),
+    ]
+
+    for field, op, value in rules:
+        predicate = _rule(field, op, value, additionalConditions=[{"field": "n", "operator": "isNotEmpty"}])
+        expected = np.array([predicate(record) for record in records])
+        assert predicate.mask(batch).tolist() == expected.tolist(), (field, op, value)
+        assert predicate.mask(records).tolist() == expected.tolist()
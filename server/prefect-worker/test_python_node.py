@@ -151,6 +151,42 @@ y = 20
         print(f"❌ Unexpected error: {e}")
         print()
     
+    print("=" * 60)
+    print("🧪 Test 5: Vectorized DataFrame mode")
+    print("=" * 60)
+    
+    # Test 5: pandas DataFrame in, DataFrame out (transferred column by column)
+    node5 = {
+        "id": "test_node_5",
+        "type": "python",
+        "config": {
+            "dataMode": "dataframe",
+            "code": """
+def process(df):
+    df['total'] = df['price'] * df['quantity']
+    return df[df['total'] > 100]
+"""
+        }
+    }
+    
+    input_data5 = [{"price": 10 + i, "quantity": i % 20} for i in range(100000)]
+    
+    try:
+        result5 = await handle_python_node.fn(node5, input_data5)
+        if result5.get("success"):
+            output5 = result5.get("outputData")
+            rows5 = output5.to_records() if hasattr(output5, "to_records") else output5
+            expected5 = sum(1 for r in input_data5 if r["price"] * r["quantity"] > 100)
+            print("✅ Success!" if len(rows5) == expected5 else "❌ Wrong row count")
+            print(f"Rows: {len(rows5)} (expected {expected5})")
+            print(f"First row: {rows5[0]}")
+        else:
+            print(f"❌ Error: {result5.get('error')}")
+        print()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print()
+    
     print("=" * 60)
     print("✅ All tests completed!")
     print("=" * 60)
@@ -0,0 +1,73 @@
+"""
+Tests for the fetchData node's SQL queries (tasks/record_query.py)
+"""
+import asyncio
+import sqlite3
+
+from tasks.node_handlers import handle_fetch_data
+from tasks.record_stream import RecordStream
+
+
+def _seed(database):
+    conn = sqlite3.connect(database)
+    conn.executemany("INSERT INTO properties (id, entityId, name, type) VALUES (?, 'ent', ?, ?)", [
+        ("p_name", "name", "text"), ("p_size", "size", "number"), ("p_note", "note", "text"),
+    ])
+    conn.executemany("INSERT INTO records (id, entityId, createdAt) VALUES (?, 'ent', '2026-01-01')", [
+        ("r1",), ("r2",), ("r3",), ("r4",),
+    ])
+    conn.executemany("INSERT INTO record_values (id, recordId, propertyId, value) VALUES (?, ?, ?, ?)", [
+        ("v1", "r1", "p_name", "alpha"), ("v2", "r1", "p_size", "10"), ("v3", "r1", "p_note", None),
+        ("v4", "r2", "p_name", "beta"), ("v5", "r2", "p_size", "9"),
+        # A value whose property row was deleted
+        ("v6", "r2", "p_gone", "kept"),
+        ("v7", "r3", "p_name", "gamma"), ("v8", "r3", "p_size", "100"),
+    ])
+    conn.commit()
+    conn.close()
+
+
+def _fetch(config):
+    return asyncio.run(handle_fetch_data.fn({"config": {"entityId": "ent", **config}}))
+
+
+def test_records_keep_every_value_row(database):
+    _seed(database)
+
+    result = _fetch({})
+
+    assert result["outputData"] == [
+        {"id": "r1", "createdAt": "2026-01-01", "p_name": "alpha", "p_size": "10", "p_note": None},
+        {"id": "r2", "createdAt": "2026-01-01", "p_name": "beta", "p_size": "9", "p_gone": "kept"},
+        {"id": "r3", "createdAt": "2026-01-01", "p_name": "gamma", "p_size": "100"},
+        {"id": "r4", "createdAt": "2026-01-01"},
+    ]
+
+
+def test_projection_filters_order_and_limit(database):
+    _seed(database)
+
+    result = _fetch({
+        "fetchProperties": ["name", "p_note"],
+        "fetchFilters": [{"property": "size", "operator": "greaterThan", "value": "5"}],
+        "fetchOrderBy": "size",
+        "fetchOrderDirection": "desc",
+        "fetchLimit": 2,
+    })
+
+    # Sizes compare as numbers; the filtered and ordered property isn't returned
+    assert result["outputData"] == [
+        {"id": "r3", "createdAt": "2026-01-01", "p_name": "gamma"},
+        {"id": "r1", "createdAt": "2026-01-01", "p_name": "alpha", "p_note": None},
+    ]
+
+
+def test_results_stream_in_pages_only_on_request(database):
+    _seed(database)
+
+    result = _fetch({"fetchPageSize": 3})
+
+    assert isinstance(result["outputData"], RecordStream)
+    assert result["recordCount"] == 4
+    records = asyncio.run(result["outputData"].collect())
+    assert records == _fetch({})["outputData"]
@@ -0,0 +1,56 @@
+"""
+Tests for chunked record streams (tasks/record_stream.py)
+"""
+import asyncio
+
+from tasks.columnar import RecordBatch
+from tasks.record_stream import RecordStream, cache_streams, describe_streams, records_for_json
+
+
+def _counting_stream(records, runs):
+    async def chunks():
+        runs.append(1)
+        for start in range(0, len(records), 3):
+            yield RecordBatch.from_records(records[start:start + 3])
+
+    return RecordStream(chunks)
+
+
+def test_cache_streams_runs_each_stream_once():
+    records = [{"id": i} for i in range(10)]
+    runs = []
+    stream = _counting_stream(records, runs)
+
+    async def run():
+        result = await cache_streams({"outputData": stream, "trueRecords": stream, "count": 10})
+        first = await result["outputData"].collect()
+        second = await result["trueRecords"].collect()
+        return result, first, second
+
+    result, first, second = asyncio.run(run())
+    assert runs == [1]
+    assert result["outputData"] is result["trueRecords"]
+    assert first == second == records
+    assert result["count"] == 10
+
+
+def test_records_for_json_returns_records_of_cached_streams():
+    records = [{"id": i, "name": f"n{i}"} for i in range(5)]
+    cached = asyncio.run(cache_streams({"output": {"outputData": RecordStream.from_records(records, chunk_size=2)}}))
+
+    assert records_for_json(cached) == {"output": {"outputData": records}}
+    assert records_for_json({"outputData": RecordBatch.from_records(records)}) == {"outputData": records}
+    # Streams that never ran are described, not run
+    assert records_for_json(RecordStream.from_records(records))["$recordStream"] is True
+
+
+def test_describe_streams_keeps_row_counts_and_samples():
+    records = [{"id": i} for i in range(5)]
+    cached = asyncio.run(cache_streams({"output": {"outputData": RecordStream.from_records(records, chunk_size=2)}}))
+
+    assert describe_streams(cached, sample_rows=3) == {"output": {"outputData": {"$recordStream": True, "rowCount": 5, "sample": records[:3]}}}
+    batch = describe_streams({"outputData": RecordBatch.from_records(records)}, sample_rows=2)["outputData"]
+    assert batch == {"$recordBatch": True, "rowCount": 5, "columns": ["id"], "sample": records[:2]}
+    # Streams that never ran are described without a sample
+    assert describe_streams(RecordStream.from_records(records)) == {"$recordStream": True, "rowCount": 5}
+    assert describe_streams({"count": 5}) == {"count": 5}
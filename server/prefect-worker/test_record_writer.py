@@ -0,0 +1,68 @@
+"""
+Tests for the saveRecords node's bulk writes (tasks/record_writer.py)
+"""
+import asyncio
+import json
+import sqlite3
+
+from tasks.node_handlers import handle_save_records
+
+FIRST = [{"id": "a", "v": 1}, {"id": "b", "v": 1}]
+SECOND = [{"id": "b", "v": 2}, {"id": "c", "v": 2}, {"v": 2}]
+
+
+def _save(records, **config):
+    node = {"config": {"tableName": "saved", **config}}
+    return asyncio.run(handle_save_records.fn(node, records, {"workflow_id": "wf", "execution_id": "exec"}))
+
+
+def _rows(database):
+    conn = sqlite3.connect(database)
+    rows = conn.execute("SELECT id, data FROM saved ORDER BY rowid").fetchall()
+    conn.close()
+    return [(row_id, json.loads(data)["v"]) for row_id, data in rows]
+
+
+def _save_twice(database, mode):
+    _save(FIRST)
+    stats = _save(SECOND, saveMode=mode)["saveStats"]
+    return {key: stats[key] for key in ("inserted", "updated", "skipped")}, _rows(database)
+
+
+def test_unset_mode_replaces_existing_records(database):
+    _save(FIRST)
+    result = _save(SECOND)
+
+    assert result["saveStats"]["mode"] == "upsert"
+    rows = _rows(database)
+    assert rows[:3] == [("a", 1), ("b", 2), ("c", 2)]
+    assert len(rows) == 4
+
+
+def test_insert_new_skips_existing_keys(database):
+    stats, rows = _save_twice(database, "insertNew")
+
+    assert stats == {"inserted": 2, "updated": 0, "skipped": 1}
+    assert rows[:3] == [("a", 1), ("b", 1), ("c", 2)]
+
+
+def test_update_only_overwrites_existing_keys(database):
+    stats, rows = _save_twice(database, "update")
+
+    assert stats == {"inserted": 0, "updated": 1, "skipped": 2}
+    assert rows == [("a", 1), ("b", 2)]
+
+
+def test_append_keeps_every_record(database):
+    stats, rows = _save_twice(database, "append")
+
+    assert stats == {"inserted": 3, "updated": 0, "skipped": 0}
+    assert [value for _, value in rows] == [1, 1, 2, 2, 2]
+    assert rows[2][0] not in ("b", "c")
+
+
+def test_legacy_insert_appends(database):
+    stats, rows = _save_twice(database, "insert")
+
+    assert stats == {"inserted": 3, "updated": 0, "skipped": 0}
+    assert len(rows) == 5
@@ -0,0 +1,109 @@
+"""
+Tests for the python node sandbox (sandbox_pool.py / sandbox_worker.py)
+"""
+import asyncio
+
+from sandbox_pool import SandboxPool
+
+POISON = '''
+def process(data):
+    pd.DataFrame.sum = lambda self, *args, **kwargs: "poisoned"
+    json.JSONDecoder.decode = lambda self, s, **kwargs: "poisoned"
+    return pd.DataFrame({"a": [1, 2]}).sum()
+'''
+
+CHECK = '''
+def process(data):
+    return {"sum": pd.DataFrame({"a": [1, 2]}).sum().tolist(), "json": json.loads('{"x": 1}')}
+'''
+
+
+BYPASSES = '''
+def process(data):
+    df = pd.DataFrame({"a": [1, 2]})
+    ndframe = type(df).__mro__[1]
+    wrap_close = [cls for cls in ().__class__.__base__.__subclasses__() if cls.__name__ == "_wrap_close"][0]
+    os = wrap_close.__init__.__globals__
+    attempts = {
+        "pandas internals": lambda: pd.core.generic,
+        "module builtins": lambda: json.__builtins__,
+        "NDFrame.to_csv": lambda: ndframe.to_csv(df, PATH + "/csv"),
+        "NDFrame.to_pickle": lambda: ndframe.to_pickle(df, PATH + "/pickle"),
+        "ndarray.tofile": lambda: np.array([1]).tofile(PATH + "/array"),
+        "os.open": lambda: os["open"](PATH + "/raw", os["O_CREAT"] | os["O_WRONLY"]),
+        "os.system": lambda: os["system"]("touch " + PATH + "/system"),
+        "os.remove": lambda: os["remove"](PATH + "/keep"),
+    }
+    reached = []
+    for name, attempt in attempts.items():
+        try:
+            attempt()
+            reached.append(name)
+        except:
+            pass
+    return reached
+'''
+
+USAGE = '''
+def process(data):
+    df = pd.DataFrame(data)
+    df["at"] = pd.to_datetime(df["at"]).dt.tz_localize("UTC").dt.tz_convert("Europe/Madrid")
+    return {
+        "csv": df[["g", "v"]].to_csv(index=False),
+        "pivot": df.pivot_table(index="g", values="v", aggfunc="sum").to_dict()["v"],
+        "mean": float(df.describe().loc["mean", "v"]),
+        "bins": pd.qcut(df["v"], 2, labels=False).tolist(),
+        "hour": int(df["at"].dt.hour.iloc[0]),
+    }
+'''
+
+
+def _run(*calls, timeout=10):
+    """Run (code, input) calls one after the other on a single worker"""
+    async def run():
+        pool = SandboxPool(size=1, timeout=timeout)
+        try:
+            results = [await pool.run(code, input_data) for code, input_data in calls]
+        finally:
+            await pool.shutdown()
+        return results, pool.started
+
+    return asyncio.run(run())
+
+
+def test_calls_dont_see_what_earlier_calls_patched():
+    (poisoned, checked), started = _run((POISON, []), (CHECK, []))
+
+    assert poisoned["result"] == "poisoned"
+    assert checked == {"result": {"sum": [3], "json": {"x": 1}}, "stdout": ""}
+    assert started == 1
+
+
+def test_timed_out_call_leaves_the_worker_usable():
+    (timed_out, checked), started = _run(
+        ("def process(data):\n    while True:\n        pass", []), (CHECK, []), timeout=1
+    )
+
+    assert "timed out" in timed_out["error"]
+    assert checked["result"]["sum"] == [3]
+    assert started == 1
+
+
+def test_file_writers_and_escapes_are_blocked(tmp_path):
+    (tmp_path / "keep").write_text("")
+    code = f"PATH = {str(tmp_path)!r}\n" + BYPASSES
+
+    [result], _ = _run((code, []))
+
+    assert result == {"result": [], "stdout": ""}
+    assert [path.name for path in tmp_path.iterdir()] == ["keep"]
+
+
+def test_regular_pandas_use_still_works():
+    records = [{"g": "a", "v": 1, "at": "2026-01-01T12:00:00"}, {"g": "b", "v": 3, "at": "2026-01-02T12:00:00"}]
+
+    [result], _ = _run((USAGE, records))
+
+    assert result["result"] == {
+        "csv": "g,v\na,1\nb,3\n", "pivot": {"a": 1, "b": 3}, "mean": 2.0, "bins": [0, 1], "hour": 13
+    }
@@ -0,0 +1,44 @@
+"""
+Tests for splitting long documents into chunks (tasks/text_chunks.py)
+"""
+import asyncio
+
+from tasks.node_handlers import handle_pdf_input
+from tasks.text_chunks import chunk_pages, chunk_text, split_pages
+
+
+def test_text_chunks_end_at_boundaries_and_overlap():
+    paragraphs = [f"Paragraph {n} " + "word " * 30 for n in range(10)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = chunk_text(text, chunk_tokens=100, overlap_tokens=10)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    # Every chunk ends at a paragraph, line, sentence or word boundary
+    assert all(chunk.endswith("word") for chunk in chunks)
+    # Consecutive chunks share text
+    assert all(previous[-20:] in chunk for previous, chunk in zip(chunks, chunks[1:]))
+    assert chunks[0].startswith("Paragraph 0") and "Paragraph 9" in chunks[-1]
+
+
+def test_page_chunks_dont_depend_on_page_numbers():
+    pages = [f"Text of page {n}." for n in range(6)]
+
+    chunks = chunk_pages(pages, pages_per_chunk=2)
+    shifted = chunk_pages(["Cover.", "Contents."] + pages, pages_per_chunk=2)
+
+    assert chunks == ["Text of page 0.\n\nText of page 1.", "Text of page 2.\n\nText of page 3.", "Text of page 4.\n\nText of page 5."]
+    # The same pages make the same chunk (and LLM cache key) wherever they are
+    assert shifted[1:] == chunks
+    assert chunk_pages(pages, pages_per_chunk=3, overlap_pages=1)[1] == "Text of page 2.\n\nText of page 3.\n\nText of page 4."
+
+
+def test_pdf_node_output_splits_into_pages():
+    node = {"config": {"pdfText": "one\n\ntwo", "pageTexts": ["one", "two"], "pages": 2, "fileName": "a.pdf"}}
+
+    output = asyncio.run(handle_pdf_input.fn(node))["outputData"]
+
+    assert split_pages(output) == ["one", "two"]
+    assert split_pages({"text": "one\ftwo"}) == ["one", "two"]
+    assert split_pages({"text": "no page breaks"}) is None
@@ -0,0 +1,105 @@
+"""
+Tests for windowed time-series aggregation and downsampling (tasks/time_series.py)
+"""
+import asyncio
+
+import numpy as np
+
+from tasks.node_handlers import handle_data_historian, handle_time_series_aggregator
+from tasks.time_series import lttb, min_max_envelope
+
+NODE = {"id": "agg", "config": {"timeSeriesInterval": "1m", "timeSeriesIncremental": True}}
+
+
+def _reference_lttb(x, y, threshold):
+    """Textbook LTTB, one point at a time"""
+    n = len(x)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = [0]
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        px, py = x[kept[-1]], y[kept[-1]]
+        areas = [abs((px - next_x) * (y[i] - py) - (px - x[i]) * (next_y - py)) for i in range(start, end)]
+        kept.append(start + int(np.argmax(areas)))
+    return np.array(kept + [n - 1])
+
+
+def test_lttb_matches_the_reference_for_every_series():
+    rng = np.random.default_rng(7)
+    x = np.cumsum(rng.uniform(0.5, 1.5, 1000))
+    y = rng.normal(size=(3, 1000)).cumsum(axis=1)
+
+    kept = lttb(x, y, 50)
+
+    assert kept.shape == (3, 50)
+    for series in range(3):
+        np.testing.assert_array_equal(kept[series], _reference_lttb(x, y[series], 50))
+    np.testing.assert_array_equal(lttb(x, y[0], 50), kept[0])
+
+
+def test_downsampling_keeps_spikes():
+    y = np.zeros(1000)
+    y[437] = 100
+    y[702] = -100
+
+    assert {437, 702} <= set(lttb(np.arange(1000.0), y, 20).tolist())
+    assert {437, 702} <= set(min_max_envelope(y, 20).tolist())
+
+
+def _points(minutes):
+    return [{"timestamp": f"2026-01-01T00:{minute:02}:{second:02}Z", "value": minute} for minute in range(minutes) for second in (0, 30)]
+
+
+def test_incremental_runs_output_only_windows_that_changed(database):
+    async def run(points):
+        return await handle_time_series_aggregator.fn(NODE, points, {"workflow_id": "wf"})
+
+    first = asyncio.run(run(_points(3)))
+    second = asyncio.run(run(_points(5)))
+    # An edited point before the open window: everything is recomputed
+    edited = _points(5)
+    edited[0]["timestamp"] = "2026-01-01T00:00:10Z"
+    third = asyncio.run(run(edited))
+
+    assert [row["timestamp"] for row in first["outputData"]] == [
+        "2026-01-01T00:00:00Z", "2026-01-01T00:01:00Z", "2026-01-01T00:02:00Z"
+    ]
+    # The window still open at the end of the first run is output again with its new points
+    assert [row["timestamp"] for row in second["outputData"]] == [
+        "2026-01-01T00:02:00Z", "2026-01-01T00:03:00Z", "2026-01-01T00:04:00Z"
+    ]
+    assert second["metadata"]["incremental"] == {"since": "2026-01-01T00:02:00Z", "processedPoints": 6, "reset": False}
+    assert len(third["outputData"]) == 5
+    assert third["metadata"]["incremental"]["reset"] is True
+
+
+HISTORIAN = {
+    "dataHistorianConnectionId": "c", "dataHistorianTags": ["T1", "T2"],
+    "dataHistorianStartTime": "2026-01-01T00:00:00", "dataHistorianEndTime": "2026-01-01T10:00:00",
+    "dataHistorianMaxPoints": 100,
+}
+
+
+def test_historian_returns_data_points_by_default():
+    output = asyncio.run(handle_data_historian.fn({"config": HISTORIAN}))["outputData"]
+
+    assert len(output["dataPoints"]) == 200
+    assert output["dataPoints"][:2] == [{"tag": "T1", **output["tags"]["T1"][0]}, {"tag": "T2", **output["tags"]["T2"][0]}]
+    assert output["tags"]["T1"][0]["timestamp"] == "2026-01-01T00:00:00"
+
+
+def test_historian_returns_downsampled_per_tag_arrays_on_request():
+    node = {"config": {**HISTORIAN, "dataHistorianOutputFormat": "columnar"}}
+
+    result = asyncio.run(handle_data_historian.fn(node))
+
+    output = result["outputData"]
+    assert "dataPoints" not in output
+    assert set(output["tags"]) == {"T1", "T2"}
+    for series in output["tags"].values():
+        assert len(series["timestamps"]) == len(series["values"]) == 100
+        assert series["timestamps"][0] == "2026-01-01T00:00:00"
+        assert series["timestamps"][-1] == "2026-01-01T10:00:00"
+    assert result["metadata"]["rawPointCount"] == 2 * 601
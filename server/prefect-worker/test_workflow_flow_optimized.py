@@ -0,0 +1,111 @@
+"""
+Tests for the optimized workflow flow (flows/workflow_flow_optimized.py)
+run end to end against a scratch database and a temporary Prefect API
+"""
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import config
+from payload_store import payload_store
+
+
+def _seed(database, records: int):
+    conn = sqlite3.connect(database)
+    conn.execute("INSERT INTO entities (id, name) VALUES ('ent', 'Readings')")
+    conn.execute("INSERT INTO properties (id, entityId, name, type) VALUES ('p_value', 'ent', 'value', 'number')")
+    for i in range(records):
+        conn.execute("INSERT INTO records (id, entityId, createdAt) VALUES (?, 'ent', '2026-01-01')", (f"r{i:03}",))
+        conn.execute("INSERT INTO record_values (id, recordId, propertyId, value) VALUES (?, ?, 'p_value', ?)", (f"v{i}", f"r{i:03}", str(i)))
+    conn.execute("INSERT INTO workflow_executions (id, workflowId, status) VALUES ('exec', 'wf', 'pending')")
+    conn.commit()
+    conn.close()
+
+
+def _save_workflow(database, nodes, connections):
+    conn = sqlite3.connect(database)
+    conn.execute(
+        "INSERT INTO workflows (id, name, data) VALUES ('wf', 'test', ?)",
+        (json.dumps({"nodes": nodes, "connections": connections}),)
+    )
+    conn.commit()
+    conn.close()
+
+
+def _logs(database, status):
+    conn = sqlite3.connect(database)
+    rows = conn.execute(
+        "SELECT nodeId, outputData FROM execution_logs WHERE executionId = 'exec' AND status = ?",
+        (status,)
+    ).fetchall()
+    conn.close()
+    return {node_id: asyncio.run(payload_store.resolve(output)) for node_id, output in rows}
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    """Stream every record list of at least 10 rows, in chunks of 7"""
+    monkeypatch.setattr(config, "RECORD_STREAM_MIN_ROWS", 10)
+    monkeypatch.setattr(config, "RECORD_STREAM_CHUNK_SIZE", 7)
+
+
+def test_streamed_outputs_are_logged_as_samples_and_returned_as_records(database, prefect_harness, streaming):
+    from flows.workflow_flow_optimized import workflow_flow_optimized
+
+    _seed(database, 40)
+    _save_workflow(database, [
+        {"id": "fetch", "type": "fetchData", "config": {"entityId": "ent"}},
+        {"id": "cond", "type": "condition", "config": {
+            "processingMode": "perRow", "conditionField": "p_value", "conditionOperator": "equals", "conditionValue": "3"
+        }},
+        {"id": "add", "type": "addField", "config": {"fieldName": "flag", "fieldValue": "x"}},
+    ], [
+        {"fromNodeId": "fetch", "toNodeId": "cond"},
+        {"fromNodeId": "cond", "toNodeId": "add", "fromPort": "false"},
+    ])
+
+    result = asyncio.run(workflow_flow_optimized(workflow_id="wf", execution_id="exec", inputs={}))
+
+    assert result["status"] == "completed"
+    # The terminal node's records leave the worker in full
+    output = result["nodeResults"]["add"]["output"]["outputData"]
+    assert len(output) == 39
+    assert all(record["flag"] == "x" for record in output)
+    # The condition's streams were dropped once its child had read them
+    true_records = result["nodeResults"]["cond"]["output"]["trueRecords"]
+    assert true_records == {"$recordStream": True, "rowCount": 1, "sample": [{"id": "r003", "createdAt": "2026-01-01", "p_value": "3"}]}
+
+    logs = _logs(database, "completed")
+    assert logs["add"]["outputData"] == {"$recordStream": True, "rowCount": 39, "sample": output[:config.LOG_SAMPLE_ROWS]}
+    assert logs["cond"]["falseRecords"]["rowCount"] == 39
+    conn = sqlite3.connect(database)
+    (input_text,) = conn.execute("SELECT inputData FROM execution_logs WHERE nodeId = 'add' AND status = 'completed'").fetchone()
+    conn.close()
+    assert asyncio.run(payload_store.resolve(input_text))["rowCount"] == 39
+
+
+def test_rerun_reports_upstream_nodes_that_cannot_be_reused():
+    from flows.workflow_flow_optimized import seed_from_previous_execution
+    from flows.workflow_plan import WorkflowPlan
+
+    plan = WorkflowPlan(
+        [{"id": node_id, "type": "addField"} for node_id in ("a", "b", "c", "d")],
+        [
+            {"fromNodeId": "a", "toNodeId": "b"},
+            {"fromNodeId": "b", "toNodeId": "d"},
+            {"fromNodeId": "c", "toNodeId": "d"},
+        ]
+    )
+    previous_logs = {
+        "a": {"id": "la", "outputData": json.dumps({"success": True, "outputData": [{"id": 1}]})},
+        # Logged before streams were cached
+        "b": {"id": "lb", "outputData": json.dumps({"success": True, "outputData": {"$recordStream": True, "rowCount": 5}})},
+    }
+
+    rerun, seeded, upstream_reruns = asyncio.run(seed_from_previous_execution(plan, previous_logs, "d"))
+
+    assert rerun == {"b", "c", "d"}
+    assert list(seeded) == ["a"]
+    assert upstream_reruns == {"b": "streamedOutput", "c": "notCompleted"}
@@ -8,7 +8,7 @@
 const express = require('express');
 const router = express.Router();
 const { authenticateToken } = require('../auth');
-const { generateId, logActivity } = require('../utils/helpers');
+const { generateId, logActivity, parseExecutionPayload } = require('../utils/helpers');
 
 module.exports = function({ db }) {
 
@@ -424,7 +424,7 @@ router.get('/dashboards/:dashboardId/widgets/:widgetId/data', authenticateToken,
         // Extract data based on outputPath
         let data = null;
         if (execution.nodeResults) {
-            const nodeResults = JSON.parse(execution.nodeResults);
+            const nodeResults = await parseExecutionPayload(db, execution.nodeResults);
             if (connection.outputPath) {
                 // Navigate JSON path (e.g., "results.node1.outputData")
                 const parts = connection.outputPath.split('.');
@@ -443,7 +443,7 @@ router.get('/dashboards/:dashboardId/widgets/:widgetId/data', authenticateToken,
                 data = nodeResults;
             }
         } else if (execution.finalOutput) {
-            data = JSON.parse(execution.finalOutput);
+            data = await parseExecutionPayload(db, execution.finalOutput);
         }
         
         res.json({
@@ -495,14 +495,14 @@ router.post('/dashboards/:dashboardId/generate-widget-from-workflow', authentica
         // Extract data from execution
         let workflowData = null;
         if (execution.nodeResults) {
-            const nodeResults = JSON.parse(execution.nodeResults);
+            const nodeResults = await parseExecutionPayload(db, execution.nodeResults);
             if (nodeId && nodeResults[nodeId]) {
                 workflowData = nodeResults[nodeId].outputData || nodeResults[nodeId];
             } else {
                 workflowData = nodeResults;
             }
         } else if (execution.finalOutput) {
-            workflowData = JSON.parse(execution.finalOutput);
+            workflowData = await parseExecutionPayload(db, execution.finalOutput);
         }
         
         if (!workflowData) {
@@ -41,6 +41,27 @@ function parseCSVLine(line) {
     return result;
 }
 
+// Parse a PDF, also keeping the text of each page (pdf-parse joins pages with
+// blank lines; the LLM node can chunk long documents by page)
+async function parsePdfWithPages(dataBuffer) {
+    const pageTexts = [];
+    const pdfData = await pdfParse(dataBuffer, {
+        // pdf-parse's default page renderer, recording each page's text
+        pagerender: (pageData) => pageData.getTextContent({ normalizeWhitespace: false, disableCombineTextItems: false })
+            .then((textContent) => {
+                let lastY;
+                let text = '';
+                for (const item of textContent.items) {
+                    text += (lastY == item.transform[5] || !lastY) ? item.str : '\n' + item.str;
+                    lastY = item.transform[5];
+                }
+                pageTexts.push(text);
+                return text;
+            })
+    });
+    return { ...pdfData, pageTexts };
+}
+
     // Helper function to extract text from files
 async function extractFileContent(filename) {
     const filePath = path.join(uploadsDir, filename);
@@ -309,7 +330,7 @@ router.post('/parse-pdf', authenticateToken, upload.single('file'), async (req,
         const dataBuffer = fs.readFileSync(filePath);
         
         // Parse PDF
-        const pdfData = await pdfParse(dataBuffer);
+        const pdfData = await parsePdfWithPages(dataBuffer);
 
         // Clean up uploaded file after parsing
         fs.unlinkSync(filePath);
@@ -327,6 +348,7 @@ router.post('/parse-pdf', authenticateToken, upload.single('file'), async (req,
                     nodeId,
                     {
                         text: pdfData.text,
+                        pageTexts: pdfData.pageTexts,
                         pages: pdfData.numpages,
                         info: pdfData.info,
                         metadata: pdfData.metadata,
@@ -362,6 +384,7 @@ router.post('/parse-pdf', authenticateToken, upload.single('file'), async (req,
             success: true,
             useGCS: false,
             text: pdfData.text,
+            pageTexts: pdfData.pageTexts,
             pages: pdfData.numpages,
             info: pdfData.info,
             metadata: pdfData.metadata,
@@ -8,7 +8,7 @@
 const express = require('express');
 const router = express.Router();
 const { authenticateToken } = require('../auth');
-const { generateId, logActivity, logSecurityEvent } = require('../utils/helpers');
+const { generateId, logActivity, logSecurityEvent, parseExecutionPayload } = require('../utils/helpers');
 const { openDb } = require('../db');
 const { WorkflowExecutor } = require('../workflowExecutor');
 const { prefectClient } = require('../prefectClient');
@@ -658,6 +658,13 @@ router.get('/executions/:executionId', authenticateToken, async (req, res) => {
                 [executionId]
             );
             
+            // Resolve payload references of the logs returned
+            const recentLogs = logs.slice(-10);
+            for (const log of recentLogs) {
+                log.inputData = await parseExecutionPayload(db, log.inputData);
+                log.outputData = await parseExecutionPayload(db, log.outputData);
+            }
+            
             return res.json({
                 executionId,
                 workflowId: execution.workflowId,
@@ -671,7 +678,7 @@ router.get('/executions/:executionId', authenticateToken, async (req, res) => {
                     completedNodes: logs.filter(l => l.status === 'completed').length,
                     failedNodes: logs.filter(l => l.status === 'error').length
                 },
-                logs: logs.slice(-10)
+                logs: recentLogs
             });
         }
     } catch (error) {
@@ -885,8 +892,8 @@ router.get('/workflow/execution/:execId', authenticateToken, async (req, res) =>
 
         // Parse JSON fields
         execution.inputs = execution.inputs ? JSON.parse(execution.inputs) : null;
-        execution.nodeResults = execution.nodeResults ? JSON.parse(execution.nodeResults) : null;
-        execution.finalOutput = execution.finalOutput ? JSON.parse(execution.finalOutput) : null;
+        execution.nodeResults = await parseExecutionPayload(db, execution.nodeResults);
+        execution.finalOutput = await parseExecutionPayload(db, execution.finalOutput);
 
         // If using Prefect, try to get additional progress info
         if (execution.status === 'running' || execution.status === 'pending') {
@@ -925,10 +932,10 @@ router.get('/workflow/execution/:execId/logs', authenticateToken, async (req, re
         );
 
         // Parse JSON fields
-        logs.forEach(log => {
-            log.inputData = log.inputData ? JSON.parse(log.inputData) : null;
-            log.outputData = log.outputData ? JSON.parse(log.outputData) : null;
-        });
+        for (const log of logs) {
+            log.inputData = await parseExecutionPayload(db, log.inputData);
+            log.outputData = await parseExecutionPayload(db, log.outputData);
+        }
 
         res.json(logs);
     } catch (error) {
@@ -979,14 +986,14 @@ router.get('/workflow/:id/executions', authenticateToken, async (req, res) => {
         `, [id, req.user.orgId, limit]);
 
         // Parse JSON fields
-        const parsed = executions.map(e => ({
+        const parsed = await Promise.all(executions.map(async e => ({
             ...e,
             inputs: e.inputs ? JSON.parse(e.inputs) : null,
-            nodeResults: e.nodeResults ? JSON.parse(e.nodeResults) : null,
-            finalOutput: e.finalOutput ? JSON.parse(e.finalOutput) : null,
+            nodeResults: await parseExecutionPayload(db, e.nodeResults),
+            finalOutput: await parseExecutionPayload(db, e.finalOutput),
             triggeredByName: e.triggeredByName || null,
             versionNumber: e.versionNumber || null
-        }));
+        })));
 
         res.json(parsed);
     } catch (error) {
@@ -1184,7 +1191,7 @@ router.post('/workflow/execution/:execId/resume', authenticateToken, async (req,
         executor.nodes = workflowData.nodes || [];
         executor.connections = workflowData.connections || [];
         executor.workflow = workflow;
-        executor.nodeResults = execution.nodeResults ? JSON.parse(execution.nodeResults) : {};
+        executor.nodeResults = (await parseExecutionPayload(db, execution.nodeResults)) || {};
 
         // Update status to running
         await db.run('UPDATE workflow_executions SET status = ? WHERE id = ?', ['running', execId]);
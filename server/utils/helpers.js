@@ -2,6 +2,8 @@
  * Shared helper functions used across route modules
  */
 
+const zlib = require('zlib');
+
 /**
  * Generate a short unique ID
  */
@@ -89,9 +91,27 @@ async function logSecurityEvent(db, {
     }
 }
 
+/**
+ * Parse a JSON execution column (nodeResults, finalOutput, inputData, outputData).
+ * The Prefect worker stores large payloads once, zlib-compressed, in
+ * execution_payloads and writes a {"$payloadRef": "sha256:..."} reference instead.
+ */
+async function parseExecutionPayload(db, text) {
+    if (!text) return null;
+    const value = JSON.parse(text);
+    if (value && typeof value === 'object' && !Array.isArray(value) && typeof value.$payloadRef === 'string') {
+        const row = await db.get('SELECT encoding, data FROM execution_payloads WHERE hash = ?', [value.$payloadRef]);
+        if (!row) return null;
+        const raw = row.encoding === 'zlib' ? zlib.inflateSync(row.data) : row.data;
+        return JSON.parse(raw.toString('utf8'));
+    }
+    return value;
+}
+
 module.exports = {
     generateId,
     logActivity,
-    logSecurityEvent
+    logSecurityEvent,
+    parseExecutionPayload
 };
 
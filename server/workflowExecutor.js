@@ -501,7 +501,8 @@ class WorkflowExecutor {
                 outputData: {
                     text: pdfData.text,
                     fileName: pdfData.fileName || config.fileName,
-                    pages: pdfData.pages
+                    pages: pdfData.pages,
+                    ...(Array.isArray(pdfData.pageTexts) ? { pageTexts: pdfData.pageTexts } : {})
                 },
                 source: 'gcs'
             };
@@ -516,7 +517,8 @@ class WorkflowExecutor {
                 outputData: {
                     text: pdfText,
                     fileName: config.fileName,
-                    pages: config.pages
+                    pages: config.pages,
+                    ...(Array.isArray(config.pageTexts) ? { pageTexts: config.pageTexts } : {})
                 },
                 source: 'inline'
             };
@@ -528,7 +530,9 @@ class WorkflowExecutor {
     async handleSaveRecords(node, inputData) {
         const entityId = node.config?.entityId;
         const tableName = node.config?.tableName || node.config?.entityName || 'saved_records';
-        const mode = node.config?.saveMode || 'insert'; // insert, upsert, update
+        // upsert (default), insertNew, update or append; legacy 'insert' always created records
+        const saveMode = node.config?.saveMode || 'upsert';
+        const mode = saveMode === 'insert' ? 'append' : saveMode;
         
         // Detect if this is time-series data from OT nodes
         const isTimeSeriesData = this.detectTimeSeriesData(inputData);
@@ -556,36 +560,29 @@ class WorkflowExecutor {
             const savedIds = [];
 
             for (const record of records) {
-                const recordId = record.id || generateId();
+                const keyed = mode !== 'append' && record.id;
+                const recordId = keyed ? record.id : generateId();
                 const now = new Date().toISOString();
                 const timestamp = record.timestamp || record.createdAt || now;
                 
-                if (mode === 'upsert' && record.id) {
-                    // Check if exists
-                    const existing = await this.db.get(
-                        `SELECT id FROM ${tableName} WHERE id = ?`,
-                        [record.id]
-                    );
+                // Check if exists
+                const existing = keyed
+                    ? await this.db.get(`SELECT id FROM ${tableName} WHERE id = ?`, [record.id])
+                    : null;
+                // insertNew skips existing IDs, update skips new ones
+                if (existing ? mode === 'insertNew' : mode === 'update') {
+                    continue;
+                }
+                
+                if (existing) {
+                    const updateQuery = isTimeSeriesData
+                        ? `UPDATE ${tableName} SET data = ?, updatedAt = ?, timestamp = ? WHERE id = ?`
+                        : `UPDATE ${tableName} SET data = ?, updatedAt = ? WHERE id = ?`;
+                    const updateParams = isTimeSeriesData
+                        ? [JSON.stringify(record), now, timestamp, record.id]
+                        : [JSON.stringify(record), now, record.id];
                     
-                    if (existing) {
-                        const updateQuery = isTimeSeriesData
-                            ? `UPDATE ${tableName} SET data = ?, updatedAt = ?, timestamp = ? WHERE id = ?`
-                            : `UPDATE ${tableName} SET data = ?, updatedAt = ? WHERE id = ?`;
-                        const updateParams = isTimeSeriesData
-                            ? [JSON.stringify(record), now, timestamp, record.id]
-                            : [JSON.stringify(record), now, record.id];
-                        
-                        await this.db.run(updateQuery, updateParams);
-                    } else {
-                        const insertQuery = isTimeSeriesData
-                            ? `INSERT INTO ${tableName} (id, data, workflowId, executionId, createdAt, updatedAt, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)`
-                            : `INSERT INTO ${tableName} (id, data, workflowId, executionId, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, ?)`;
-                        const insertParams = isTimeSeriesData
-                            ? [recordId, JSON.stringify(record), this.workflow?.id, this.executionId, now, now, timestamp]
-                            : [recordId, JSON.stringify(record), this.workflow?.id, this.executionId, now, now];
-                        
-                        await this.db.run(insertQuery, insertParams);
-                    }
+                    await this.db.run(updateQuery, updateParams);
                 } else {
                     const insertQuery = isTimeSeriesData
                         ? `INSERT INTO ${tableName} (id, data, workflowId, executionId, createdAt, updatedAt, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)`